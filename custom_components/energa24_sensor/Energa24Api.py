@@ -1,30 +1,107 @@
 import requests
 from datetime import datetime, timedelta
 from .EnergaAuth import EnergaAuth
-from .PgpList import ppg_list_from_dict
 from .PpgReadingForMeter import ppg_reading_for_meter_from_dict, PpgReadingForMeter, MeterReading
-from .Invoices import invoices_from_dict, Invoices
+from .Invoices import InvoicesList, Invoices
+from .cache import SwrCache
+from .const import REQUEST_TIMEOUT
+from .decoders import TYPED_DECODER, decode_dashboard, decode_invoices
+from .shared_cache import shared_cache_for
+from .streaming import CHUNK_SIZE, iter_invoices, ppg_list_from_stream
 
 DEVICES_LIST_URL = "https://24.energa.pl/api/dashboard"
 READINGS_URL = "https://ebok.myorlen.pl/crm/get-all-ppg-readings-for-meter?pageSize=10&pageNumber=1&api-version=3.0&idPpg="
-INVOICES_URL = "https://24.energa.pl/api/clients/{clientNumber}/accounts/{accountNumber}/invoices?page=0&size=10&localDateTo={now_date}&localDateFrom={from_date}"
+INVOICES_URL = "https://24.energa.pl/api/clients/{clientNumber}/accounts/{accountNumber}/invoices?page={page}&size={size}&localDateTo={now_date}&localDateFrom={from_date}"
+# Longest date range the invoices endpoint accepts in one request
+INVOICES_MAX_DAYS = 180
+INVOICES_PAGE_SIZE = 10
+
+# Seconds a response is served from cache before it is revalidated in the background
+DEFAULT_TTLS = {
+    "token": 4 * 60,
+    "dashboard": 24 * 60 * 60,
+    "invoices": 60 * 60,
+}
+# Seconds past the TTL a stale value may still be served; tokens must not outlive their expiry,
+# and a response is refetched before serving once revalidating it failed for a whole TTL
+DEFAULT_MAX_STALE = {
+    "token": 60,
+    "dashboard": 24 * 60 * 60,
+    "invoices": 60 * 60,
+}
+
+
+class ClientClosedError(Exception):
+    pass
+
 
 class Energa24Api:
 
-    def __init__(self, username, password) -> None:
+    def __init__(self, username, password, ttls=None, max_stale=None, shared_cache_dir=None) -> None:
+        """``shared_cache_dir`` (or $ENERGA24_CACHE_DIR) shares tokens and responses with other processes."""
+        ttls = DEFAULT_TTLS if ttls is None else ttls
         self.auth = EnergaAuth(username, password)
+        self.session = requests.Session()
+        self.cache = SwrCache(ttls, DEFAULT_MAX_STALE if max_stale is None else max_stale)
+        self.shared_cache = shared_cache_for(username, password, ttls, shared_cache_dir)
+        self.closed = False
+
+    def close(self):
+        """Releases connections and cached data without waiting for requests in flight.
+
+        Those finish within REQUEST_TIMEOUT on their executor thread; their results
+        are dropped and any further call raises ClientClosedError.
+        """
+        self.closed = True
+        self.cache.close()
+        self.session.close()
+        self.auth.close()
+
+    def _check_open(self):
+        if self.closed:
+            raise ClientClosedError("Energa24 client was closed")
 
     def login(self):
+        self._check_open()
         return self.auth.login()
 
-    def meterList(self):
-        token_type, token, key_cloak_id = self.auth.login()
+    def cached_login(self):
+        self._check_open()
+        token_type, token, keycloak_id = self._cached("token", None, self.auth.login)
+        # the token may have come from another process
+        self.auth.use_token(token, keycloak_id)
+        return token_type, token, keycloak_id
+
+    def _cached(self, endpoint, key, fetch):
+        if self.shared_cache is None:
+            return self.cache.get(endpoint, key, fetch)
+        return self.cache.get(endpoint, key, lambda: self.shared_cache.get_aged(endpoint, key, fetch))
+
+    def get_headers(self):
+        self.cached_login()
+        return self.auth.get_headers()
+
+    def meterList(self, cached=True):
+        """``cached=False`` fetches the list past the cache and leaves the cached one as it is."""
+        self._check_open()
+        if not cached:
+            return self._fetch_meter_list()
+        return self._cached("dashboard", None, self._fetch_meter_list)
+
+    def _fetch_meter_list(self):
+        token_type, token, key_cloak_id = self.cached_login()
         data = {"keycloakId": key_cloak_id['sub'], "email": key_cloak_id['email']}
         headers = self.auth.get_headers()
-        return ppg_list_from_dict(requests.post(DEVICES_LIST_URL, headers=headers, json=data).json()['clients'][0]['invoiceProfile'][0])
+        with self.session.post(DEVICES_LIST_URL, headers=headers, json=data, stream=True,
+                               timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            if TYPED_DECODER:
+                return decode_dashboard(response.content)
+            return ppg_list_from_stream(response.iter_content(chunk_size=CHUNK_SIZE))
 
-    def readingForMeter(self, meter_id, account_number, client_number):
-        invoices = self.invoices(account_number, client_number).invoices_list
+    def readingForMeter(self, meter_id, account_number, client_number, invoices=None):
+        if invoices is None:
+            invoices = self.invoices(account_number, client_number).invoices_list
         
         # Filter invoices for this meter (PPE) and sort by date descending
         meter_invoices = [i for i in invoices if i.id_pp == meter_id and i.end_date]
@@ -79,14 +156,41 @@ class Energa24Api:
             token_expire_date_utc=datetime.now()
         )
 
-    def invoices(self, account_number, client_number):
-        headers = self.auth.get_headers()
-        now = datetime.now()
-        now_date = now.strftime("%Y-%m-%d")
-        from_date = (now - timedelta(days=180)).strftime("%Y-%m-%d")
-        return invoices_from_dict(requests.get(INVOICES_URL.format(
+    def invoices(self, account_number, client_number, cached=True):
+        """``cached=False`` fetches the invoices past the cache and leaves the cached ones as they are."""
+        self._check_open()
+        if not cached:
+            return self._fetch_invoices(account_number, client_number)
+        return self._cached("invoices", (account_number, client_number),
+                            lambda: self._fetch_invoices(account_number, client_number))
+
+    def _fetch_invoices(self, account_number, client_number):
+        return InvoicesList(invoices_list=list(self.iter_invoices(account_number, client_number)))
+
+    def iter_invoices(self, account_number, client_number, from_date=None, to_date=None,
+                      page=0, size=INVOICES_PAGE_SIZE):
+        """Yields the invoices of one page (never cached).
+
+        Without msgspec they are yielded one by one while the body is still being received.
+
+        Without dates the last INVOICES_MAX_DAYS days are requested.
+        """
+        self._check_open()
+        headers = self.get_headers()
+        to_date = to_date or datetime.now().date()
+        from_date = from_date or to_date - timedelta(days=INVOICES_MAX_DAYS)
+        with self.session.get(INVOICES_URL.format(
             accountNumber=account_number,
             clientNumber=client_number,
-            now_date=now_date,
-            from_date=from_date
-        ), headers=headers).json())
+            now_date=to_date.strftime("%Y-%m-%d"),
+            from_date=from_date.strftime("%Y-%m-%d"),
+            page=page,
+            size=size
+        ), headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            # an error page must fail the refresh, not read as an account without invoices
+            response.raise_for_status()
+            if TYPED_DECODER:
+                # one typed pass over the page beats incremental decoding into dicts
+                yield from decode_invoices(response.content)
+            else:
+                yield from iter_invoices(response.iter_content(chunk_size=CHUNK_SIZE))
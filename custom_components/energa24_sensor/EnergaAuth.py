@@ -4,6 +4,7 @@ import uuid
 import requests
 import jwt
 from urllib.parse import urlparse, parse_qs
+from .const import REQUEST_TIMEOUT
 from .utils import generate_pkce_challenge, generate_code_verifier
 
 _LOGGER = logging.getLogger(__name__)
@@ -21,6 +22,10 @@ class EnergaAuth:
         self._token = None
         self._keycloak_id = None
 
+    @property
+    def session(self):
+        return self._session
+
     def login(self):
         """Performs the login flow and returns token_type, access_token, and keycloak_id."""
         verifier = generate_code_verifier(96)
@@ -32,7 +37,7 @@ class EnergaAuth:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36',
         }
 
-        response_page = self._session.get(init_url, headers=headers)
+        response_page = self._session.get(init_url, headers=headers, timeout=REQUEST_TIMEOUT)
         pattern = r'id="oid-button"[^>]*href="([^"]+)"'
 
         match = re.search(pattern, response_page.text)
@@ -40,7 +45,7 @@ class EnergaAuth:
         if match:
             raw_url = match.group(1)
             clean_url = BASE_URL + raw_url.replace('&amp;', '&')
-            response_page = self._session.get(clean_url, headers=headers)
+            response_page = self._session.get(clean_url, headers=headers, timeout=REQUEST_TIMEOUT)
             match = re.search(r'action="([^"]+)"', response_page.text)
             if match:
                 post_url = match.group(1).replace('&amp;', '&')
@@ -49,7 +54,8 @@ class EnergaAuth:
                     'password': self.password,
                     'credentialId': ''
                 }
-                final_response = self._session.post(post_url, data=payload, headers=headers)
+                final_response = self._session.post(post_url, data=payload, headers=headers,
+                                                    timeout=REQUEST_TIMEOUT)
                 if final_response.status_code == 200:
                     fragment = urlparse(final_response.url).fragment
                     parsed_dict = {k: v[0] for k, v in parse_qs(fragment).items()}
@@ -62,7 +68,7 @@ class EnergaAuth:
                             'code_verifier': verifier
                         }
                         headers.update({'Referer': 'https://24.energa.pl/ss/dashboard'})
-                        res_auth = self._session.post(TOKEN_URL, headers=headers, data=data)
+                        res_auth = self._session.post(TOKEN_URL, headers=headers, data=data, timeout=REQUEST_TIMEOUT)
                         if res_auth.status_code == 200:
                             response = res_auth.json()
                             self._token = response.get('access_token')
@@ -82,6 +88,16 @@ class EnergaAuth:
             'Content-Type': 'application/json',
         }
     
+    def use_token(self, token, keycloak_id):
+        """Adopts a token obtained elsewhere, e.g. by another process."""
+        self._token = token
+        self._keycloak_id = keycloak_id
+
+    def close(self):
+        """Closes pooled connections and forgets the token."""
+        self._session.close()
+        self._token = None
+
     def get_keycloak_id(self):
         if not self._keycloak_id:
             self.login()
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, List, TypeVar, Callable, Type, cast
+from typing import Any, List, Optional, TypeVar, Callable, Type, cast
 import dateutil.parser
 
 T = TypeVar("T")
@@ -10,15 +10,25 @@ def from_str(x: Any) -> str:
     return str(x) if x is not None else ""
 
 
-def from_datetime(x: Any) -> datetime:
-    if x is None:
-        return datetime.now()
-    return dateutil.parser.parse(x)
+def from_datetime(x: Any) -> Optional[datetime]:
+    # a missing date stays missing: the time of parsing would differ on every refresh
+    if x is None or x == "":
+        return None
+    if isinstance(x, datetime):
+        return x
+    try:
+        return datetime.fromisoformat(x)
+    except (TypeError, ValueError):
+        # Dotted local dates such as 31.12.2023 are day first; other forms keep dateutil's default
+        return dateutil.parser.parse(x, dayfirst="." in x)
 
 
 def from_float(x: Any) -> float:
-    if x is None:
+    if x is None or x == "":
         return 0.0
+    if isinstance(x, str):
+        # Amounts may come with a decimal comma, e.g. "123,45"
+        x = x.replace(",", ".")
     return float(x)
 
 
@@ -51,15 +61,15 @@ def to_class(c: Type[T], x: Any) -> dict:
 @dataclass
 class Invoices:
     number: str
-    date: datetime
-    sell_date: datetime
+    date: Optional[datetime]
+    sell_date: Optional[datetime]
     gross_amount: float
     amount_to_pay: float
     wear: float
     wear_kwh: float
-    paying_deadline_date: datetime
-    start_date: datetime
-    end_date: datetime
+    paying_deadline_date: Optional[datetime]
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
     is_paid: bool
     id_pp: str
     type: str
@@ -67,40 +77,62 @@ class Invoices:
 
     @staticmethod
     def from_dict(obj: Any) -> 'Invoices':
-        assert isinstance(obj, dict)
-        
-        # New API Mapping
-        number = from_str(obj.get("invoiceNumber"))
-        date = from_datetime(obj.get("issueDate"))
-        
+        if not isinstance(obj, dict):
+            raise ValueError("Invoice item is not a JSON object: {!r}".format(obj))
+
         # PPES handling
         ppes = obj.get("ppes", [])
         first_ppe = ppes[0] if isinstance(ppes, list) and len(ppes) > 0 else {}
+        if not isinstance(first_ppe, dict):
+            first_ppe = {}
+
+        return Invoices.from_fields(
+            invoice_number=obj.get("invoiceNumber"),
+            issue_date=obj.get("issueDate"),
+            payment_date=obj.get("paymentDate"),
+            invoice_amount=obj.get("invoiceAmount"),
+            payment=obj.get("payment"),
+            status=obj.get("status"),
+            document_type=obj.get("documentType"),
+            ppe_number=first_ppe.get("ppeNumber"),
+            ppe_start_date=first_ppe.get("startDate"),
+            ppe_end_date=first_ppe.get("endDate"),
+            consumption=first_ppe.get("consumption"),
+        )
+
+    @staticmethod
+    def from_fields(invoice_number: Any, issue_date: Any, payment_date: Any, invoice_amount: Any,
+                    payment: Any, status: Any, document_type: Any, ppe_number: Any = None,
+                    ppe_start_date: Any = None, ppe_end_date: Any = None, consumption: Any = None) -> 'Invoices':
+        """Maps raw invoice fields (and those of its first PPE) whatever decoder produced them."""
+        # New API Mapping
+        number = from_str(invoice_number)
+        date = from_datetime(issue_date)
         
         # Dates from PPE or Invoice
-        start_date = from_datetime(first_ppe.get("startDate")) if first_ppe.get("startDate") else date
-        end_date = from_datetime(first_ppe.get("endDate")) if first_ppe.get("endDate") else date
+        start_date = from_datetime(ppe_start_date) or date
+        end_date = from_datetime(ppe_end_date) or date
         sell_date = end_date # Best guess for sell_date
         
-        gross_amount = from_float(obj.get("invoiceAmount"))
-        payment = from_float(obj.get("payment"))
+        gross_amount = from_float(invoice_amount)
+        payment = from_float(payment)
         # If status is PAID, assume 0 to pay? 
         # sensor logic checks is_paid, so amount_to_pay is relevant when !is_paid.
         # We can just store the remaining amount.
         amount_to_pay = gross_amount - payment
         
-        wear = from_float(first_ppe.get("consumption"))
-        wear_kwh = from_float(first_ppe.get("consumption")) # Assuming unit is kWh as per example
+        wear = from_float(consumption)
+        wear_kwh = from_float(consumption) # Assuming unit is kWh as per example
         
-        paying_deadline_date = from_datetime(obj.get("paymentDate"))
+        paying_deadline_date = from_datetime(payment_date)
         
-        status_str = obj.get("status", "")
+        status_str = from_str(status)
         is_paid = status_str == "PAID"
         
         # id_pp -> dmsId
-        id_pp = from_str(first_ppe.get("ppeNumber"))
+        id_pp = from_str(ppe_number)
         
-        type_str = from_str(obj.get("documentType"))
+        type_str = from_str(document_type)
         
         return Invoices(
             number=number,
@@ -123,9 +155,9 @@ class Invoices:
         # Simplified to_dict, mostly for consistency if needed
         result: dict = {
             "invoiceNumber": self.number,
-            "issueDate": self.date.isoformat(),
+            "issueDate": self.date.isoformat() if self.date else None,
             "invoiceAmount": self.gross_amount,
-            "paymentDate": self.paying_deadline_date.isoformat(),
+            "paymentDate": self.paying_deadline_date.isoformat() if self.paying_deadline_date else None,
             "status": self.status,
             "dmsId": self.id_pp,
             "documentType": self.type
@@ -159,3 +191,16 @@ def invoices_from_dict(s: Any) -> InvoicesList:
 
 def invoices_to_dict(x: InvoicesList) -> Any:
     return to_class(InvoicesList, x)
+
+
+def invoice_to_record(x: Invoices) -> dict:
+    """Flat, lossless JSON representation keyed by attribute name (for checkpoints and caches)."""
+    return {name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in x.__dict__.items()}
+
+
+def invoice_from_record(record: dict) -> Invoices:
+    values = dict(record)
+    for name in ("date", "sell_date", "paying_deadline_date", "start_date", "end_date"):
+        values[name] = datetime.fromisoformat(values[name]) if values[name] is not None else None
+    return Invoices(**values)
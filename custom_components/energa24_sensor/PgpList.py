@@ -10,7 +10,9 @@ T = TypeVar("T")
 def from_str(x: Any) -> str:
     if isinstance(x, str):
         return x
-    return ""
+    if x is None:
+        return ""
+    return str(x)
 
 
 def from_datetime(x: Any) -> datetime:
@@ -71,7 +73,7 @@ class PpgList:
 
     @staticmethod
     def from_dict(obj: Any) -> 'PpgList':
-        ppg_list = from_list(PpgListElement.from_dict, obj.get("ppes"))
+        ppg_list = from_list(PpgListElement.from_dict, obj.get("ppes") or [])
         account_number = from_str(obj.get("accountNumber"))
         client_number = from_str(obj.get("clientNumber"))
         return PpgList(ppg_list, account_number, client_number)
@@ -11,7 +11,10 @@ def from_str(x: Any) -> str:
 
 
 def from_datetime(x: Any) -> datetime:
-    return dateutil.parser.parse(x)
+    try:
+        return datetime.fromisoformat(x)
+    except (TypeError, ValueError):
+        return dateutil.parser.parse(x)
 
 
 def from_int(x: Any) -> int:
@@ -54,20 +57,19 @@ class MeterReading:
     @staticmethod
     def from_dict(obj: Any) -> 'MeterReading':
         assert isinstance(obj, dict)
-        status = from_str(obj.get("Status"))
-        reading_date_local = from_datetime(obj.get("ReadingDateLocal"))
-        reading_date_utc = from_datetime(obj.get("ReadingDateUtc"))
-        pp_id = int(from_str(obj.get("PpId")))
-        value = from_int(obj.get("Value"))
-        value2 = from_none(obj.get("Value2"))
-        value3 = from_none(obj.get("Value3"))
-        meter_number = from_str(obj.get("MeterNumber"))
-        region_code = from_str(obj.get("RegionCode"))
-        wear = from_int(obj.get("Wear"))
-        type = from_str(obj.get("Type"))
-        color = from_str(obj.get("Color"))
-        return MeterReading(status, reading_date_local, reading_date_utc, pp_id, value, value2, value3, meter_number,
-                            region_code, wear, type, color)
+        return MeterReading.from_fields(obj.get("Status"), obj.get("ReadingDateLocal"), obj.get("ReadingDateUtc"),
+                                        obj.get("PpId"), obj.get("Value"), obj.get("Value2"), obj.get("Value3"),
+                                        obj.get("MeterNumber"), obj.get("RegionCode"), obj.get("Wear"),
+                                        obj.get("Type"), obj.get("Color"))
+
+    @staticmethod
+    def from_fields(status: Any, reading_date_local: Any, reading_date_utc: Any, pp_id: Any, value: Any,
+                    value2: Any, value3: Any, meter_number: Any, region_code: Any, wear: Any, type: Any,
+                    color: Any) -> 'MeterReading':
+        return MeterReading(from_str(status), from_datetime(reading_date_local), from_datetime(reading_date_utc),
+                            int(from_str(pp_id) or 0), from_int(value), from_none(value2), from_none(value3),
+                            from_str(meter_number), from_str(region_code), from_int(wear), from_str(type),
+                            from_str(color))
 
     def to_dict(self) -> dict:
         result: dict = {"Status": from_str(self.status), "ReadingDateLocal": self.reading_date_local.isoformat(),
@@ -92,7 +94,7 @@ class PpgReadingForMeter:
     @staticmethod
     def from_dict(obj: Any) -> 'PpgReadingForMeter':
         assert isinstance(obj, dict)
-        meter_readings = from_list(MeterReading.from_dict, obj.get("MeterReadings"))
+        meter_readings = from_list(MeterReading.from_dict, obj.get("MeterReadings") or [])
         code = from_int(obj.get("Code"))
         message = from_none(obj.get("Message"))
         display_to_end_user = from_bool(obj.get("DisplayToEndUser"))
@@ -3,16 +3,23 @@ import voluptuous as vol
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.config_entries import SOURCE_IMPORT
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import CONF_MAX_CONCURRENCY, DATA_COORDINATORS, DOMAIN, HISTORY_FILE
+from .discovery import meters_store
+from .history import HistoryStore
+from .services import async_register_services
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Required(CONF_USERNAME): cv.string,
     vol.Required(CONF_PASSWORD): cv.string,
+    vol.Optional(CONF_MAX_CONCURRENCY): cv.positive_int,
 })
 
-DOMAIN = "energa24_sensor"
 
 async def async_setup(hass, config):
-    hass.data[DOMAIN] = {}
+    hass.data.setdefault(DOMAIN, {})
+    async_register_services(hass)
 
     if not hass.config_entries.async_entries(DOMAIN) and DOMAIN in config:
         hass.async_create_task(
@@ -25,13 +32,30 @@ async def async_setup(hass, config):
 
 
 async def async_setup_entry(hass, config_entry):
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
+    hass.data.setdefault(DOMAIN, {})
 
     await hass.config_entries.async_forward_entry_setups(config_entry, ["sensor"])
+    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
     return True
 
 
+async def async_reload_entry(hass, config_entry):
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
+
 async def async_unload_entry(hass, config_entry):
-    await hass.config_entries.async_forward_entry_unload(config_entry, "sensor")
-    return True
+    # the coordinator shuts down and the shared client is released through async_on_unload
+    return await hass.config_entries.async_forward_entry_unload(config_entry, "sensor")
+
+
+async def async_remove_entry(hass, config_entry):
+    """Deletes the stored PPE list and, unless another entry still uses it, the account history."""
+    store = meters_store(hass, config_entry.entry_id)
+    record = await store.async_load()
+    await store.async_remove()
+    account_number = record.get("accountNumber") if record else None
+    coordinators = hass.data.get(DOMAIN, {}).get(DATA_COORDINATORS, {})
+    if not account_number or any(x.account_number == account_number for x in coordinators.values()):
+        return
+    history = HistoryStore(hass.config.path(STORAGE_DIR, HISTORY_FILE.format(account_number=account_number)))
+    await hass.async_add_executor_job(history.remove)
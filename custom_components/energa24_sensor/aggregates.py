@@ -0,0 +1,182 @@
+"""Per-meter invoice aggregates maintained incrementally as invoices are ingested."""
+import dataclasses
+import heapq
+import itertools
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .Invoices import Invoices
+
+INVOICE_FIELDS = tuple(field.name for field in dataclasses.fields(Invoices))
+
+
+def invoice_key(invoice: Invoices) -> Hashable:
+    return invoice.number or invoice_fingerprint(invoice)
+
+
+def invoice_fingerprint(invoice: Invoices) -> tuple:
+    return tuple(getattr(invoice, name) for name in INVOICE_FIELDS)
+
+
+def is_unpaid(invoice: Invoices) -> bool:
+    return not invoice.is_paid and (invoice.amount_to_pay or 0) > 0
+
+
+def is_priced(invoice: Invoices) -> bool:
+    return invoice.wear is not None \
+        and invoice.wear != 0 \
+        and invoice.gross_amount is not None \
+        and invoice.gross_amount != 0
+
+
+class MeterAggregates:
+    """Unpaid total, next payment and latest priced invoice of one meter.
+
+    Invoices are upserted and removed one at a time; every read is O(1). The two
+    heaps use lazy deletion: an entry is valid only while its sequence number is
+    the current one for that invoice, stale tops are pruned after each mutation.
+    """
+
+    def __init__(self, meter_id: str) -> None:
+        self.meter_id = meter_id
+        self._invoices: Dict[Hashable, Tuple[int, Invoices, tuple, float]] = {}
+        self._unpaid_total = 0.0
+        self._by_date: List[Tuple[float, int, Hashable]] = []
+        self._priced_by_date: List[Tuple[float, int, Hashable]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._invoices)
+
+    @property
+    def unpaid_total(self) -> float:
+        return round(self._unpaid_total, 2)
+
+    @property
+    def next_payment(self) -> Optional[Invoices]:
+        return self._top(self._by_date)
+
+    @property
+    def latest_priced(self) -> Optional[Invoices]:
+        return self._top(self._priced_by_date)
+
+    def upsert(self, invoice: Invoices) -> bool:
+        """Inserts or replaces an invoice; returns False when nothing changed."""
+        key = invoice_key(invoice)
+        fingerprint = invoice_fingerprint(invoice)
+        current = self._invoices.get(key)
+        if current is not None and current[2] == fingerprint:
+            return False
+        if current is not None:
+            self._unpaid_total -= current[3]
+        sequence = next(self._sequence)
+        amount_to_pay = invoice.amount_to_pay if is_unpaid(invoice) else 0
+        self._invoices[key] = (sequence, invoice, fingerprint, amount_to_pay)
+        self._unpaid_total += amount_to_pay
+        # an undated invoice is neither the next payment nor the latest priced one
+        if invoice.date is not None:
+            timestamp = invoice.date.timestamp()
+            heapq.heappush(self._by_date, (timestamp, sequence, key))
+            if is_priced(invoice):
+                heapq.heappush(self._priced_by_date, (-timestamp, sequence, key))
+        self._prune()
+        return True
+
+    def remove(self, key: Hashable) -> bool:
+        current = self._invoices.pop(key, None)
+        if current is None:
+            return False
+        self._unpaid_total -= current[3]
+        if not self._invoices:
+            self._unpaid_total = 0.0
+        self._prune()
+        return True
+
+    def sync(self, invoices: Iterable[Invoices]) -> bool:
+        """Makes the aggregates reflect exactly ``invoices``; returns True if anything changed."""
+        seen = set()
+        changed = False
+        for invoice in invoices:
+            seen.add(invoice_key(invoice))
+            changed |= self.upsert(invoice)
+        for key in [key for key in self._invoices if key not in seen]:
+            changed |= self.remove(key)
+        return changed
+
+    def _top(self, heap) -> Optional[Invoices]:
+        return self._invoices[heap[0][2]][1] if heap else None
+
+    def _prune(self) -> None:
+        for heap in (self._by_date, self._priced_by_date):
+            while heap:
+                current = self._invoices.get(heap[0][2])
+                if current is not None and current[0] == heap[0][1]:
+                    break
+                heapq.heappop(heap)
+            # rebuild when stale entries dominate so the heaps do not grow without bound
+            if len(heap) > 2 * len(self._invoices) + 16:
+                heap[:] = [entry for entry in heap
+                           if entry[2] in self._invoices and self._invoices[entry[2]][0] == entry[1]]
+                heapq.heapify(heap)
+
+
+class AccountAggregates:
+    """MeterAggregates of every meter of an account, fed from one invoices list."""
+
+    def __init__(self) -> None:
+        self.meters: Dict[str, MeterAggregates] = {}
+
+    def meter(self, meter_id: str) -> MeterAggregates:
+        aggregates = self.meters.get(meter_id)
+        if aggregates is None:
+            aggregates = self.meters[meter_id] = MeterAggregates(meter_id)
+        return aggregates
+
+    def sync(self, invoices: Iterable[Invoices]) -> bool:
+        by_meter: Dict[str, List[Invoices]] = {meter_id: [] for meter_id in self.meters}
+        for invoice in invoices:
+            by_meter.setdefault(invoice.id_pp, []).append(invoice)
+        changed = False
+        for meter_id, meter_invoices in by_meter.items():
+            changed |= self.meter(meter_id).sync(meter_invoices)
+        return changed
+
+
+@dataclasses.dataclass(frozen=True)
+class AccountTotals:
+    """Figures over every meter of an account, derived once per refresh."""
+    unpaid_total: float
+    unpaid_invoices: int
+    last_period_kwh: Optional[float]
+    last_period_start: Optional[datetime]
+    last_period_end: Optional[datetime]
+    next_due_date: Optional[datetime]
+    next_due_amount: Optional[float]
+    next_due_ppes: Tuple[str, ...]
+
+
+def account_totals(aggregates: AccountAggregates, meter_ids: Sequence[str],
+                   invoices: Iterable[Invoices]) -> AccountTotals:
+    """Sums the per-meter aggregates and finds the earliest deadline of the unpaid invoices.
+
+    The last period is each meter's latest priced invoice, so its kWh matches the
+    meters' cost tracking sensors; invoices of meters no longer listed are ignored.
+    """
+    meters = [aggregates.meter(meter_id) for meter_id in meter_ids]
+    latest = [x.latest_priced for x in meters if x.latest_priced is not None]
+
+    current = set(meter_ids)
+    unpaid = [x for x in invoices if x.id_pp in current and is_unpaid(x)]
+    dated = [x for x in unpaid if x.paying_deadline_date is not None]
+    next_due_date = min((x.paying_deadline_date for x in dated), default=None)
+    due = [x for x in dated if x.paying_deadline_date == next_due_date]
+    return AccountTotals(
+        unpaid_total=round(sum(x.unpaid_total for x in meters), 2),
+        unpaid_invoices=len(unpaid),
+        last_period_kwh=round(sum(x.wear_kwh or 0 for x in latest), 3) if latest else None,
+        last_period_start=min((x.start_date for x in latest if x.start_date is not None), default=None),
+        last_period_end=max((x.end_date for x in latest if x.end_date is not None), default=None),
+        next_due_date=next_due_date,
+        next_due_amount=round(sum(x.amount_to_pay for x in due), 2) if due else None,
+        next_due_ppes=tuple(sorted({x.id_pp for x in due})),
+    )
@@ -0,0 +1,154 @@
+"""Windowed, resumable backfill of invoice history older than INVOICES_MAX_DAYS."""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .Energa24Api import INVOICES_MAX_DAYS, Energa24Api
+from .Invoices import Invoices, InvoicesList, invoice_from_record, invoice_to_record
+from .aggregates import invoice_key
+from .paging import PAGE_SIZE, Window, iter_window, split_windows
+
+_LOGGER = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 2
+
+
+class BackfillIncomplete(Exception):
+    """Some windows failed; the finished ones are checkpointed and a rerun resumes."""
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / ``rate`` seconds apart across all threads."""
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class InvoiceBackfill:
+    """Fetches a long date range window by window, concurrently and under a rate limit.
+
+    ``checkpoint_path`` is a JSON Lines file: a header, then one line per
+    finished window with its invoices, appended as the window finishes. A rerun
+    after an interruption only fetches the missing windows; a last line cut
+    short by the interruption is dropped.
+    """
+
+    def __init__(self, api: Energa24Api, account_number: str, client_number: str,
+                 checkpoint_path: Optional[str] = None, window_days: int = INVOICES_MAX_DAYS,
+                 max_workers: int = 4, requests_per_second: float = 2.0,
+                 page_size: int = PAGE_SIZE) -> None:
+        self.api = api
+        self.account_number = account_number
+        self.client_number = client_number
+        self.checkpoint_path = checkpoint_path
+        self.window_days = window_days
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self._rate_limiter = RateLimiter(requests_per_second)
+
+    def run(self, start: date, end: Optional[date] = None) -> InvoicesList:
+        """Returns every invoice issued in [start, end], deduplicated like the history file."""
+        end = end or date.today()
+        completed, checkpoint_size = self._load_checkpoint()
+        self._start_checkpoint(checkpoint_size)
+        windows = split_windows(start, end, self.window_days)
+        pending = [w for w in windows if _window_key(w) not in completed]
+        _LOGGER.info("Backfill of %s: %d windows to fetch, %d already done",
+                     self.account_number, len(pending), len(windows) - len(pending))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_window, window): window for window in pending}
+            failed = 0
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    invoices = future.result()
+                except Exception as e:
+                    failed += 1
+                    _LOGGER.error("Backfill window %s failed: %s", _window_key(window), e)
+                    continue
+                completed[_window_key(window)] = [invoice_to_record(x) for x in invoices]
+                self._append_checkpoint(window, completed[_window_key(window)])
+        if failed:
+            raise BackfillIncomplete("{} of {} windows failed, rerun to resume".format(
+                failed, len(pending)))
+
+        merged: Dict[Hashable, Invoices] = {}
+        for window in windows:
+            for record in completed[_window_key(window)]:
+                invoice = invoice_from_record(record)
+                merged[invoice_key(invoice)] = invoice
+        return InvoicesList(invoices_list=sorted(
+            merged.values(), key=lambda z: z.date.timestamp() if z.date is not None else -math.inf))
+
+    def fetch_window(self, window: Window) -> List[Invoices]:
+        return list(iter_window(self.api, self.account_number, self.client_number, window, self.page_size,
+                                self._rate_limiter.acquire))
+
+    def _checkpoint_header(self) -> dict:
+        return {"version": CHECKPOINT_VERSION, "account_number": self.account_number,
+                "window_days": self.window_days}
+
+    def _load_checkpoint(self) -> Tuple[Dict[str, list], Optional[int]]:
+        """Finished windows and the bytes of the checkpoint holding them; None when it must start over."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}, None
+        completed = {}
+        with open(self.checkpoint_path, "rb") as f:
+            if _json_line(f.readline()) != self._checkpoint_header():
+                _LOGGER.warning("Ignoring checkpoint %s written for another backfill", self.checkpoint_path)
+                return {}, None
+            size = f.tell()
+            for line in f:
+                record = _json_line(line)
+                if record is None:
+                    break
+                completed[record["window"]] = record["invoices"]
+                size += len(line)
+        return completed, size
+
+    def _start_checkpoint(self, size: Optional[int]) -> None:
+        if not self.checkpoint_path:
+            return
+        if size is None:
+            with open(self.checkpoint_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self._checkpoint_header()) + "\n")
+        else:
+            # drops a line cut short by an interrupted run, so appends start on a line of their own
+            with open(self.checkpoint_path, "r+b") as f:
+                f.truncate(size)
+
+    def _append_checkpoint(self, window: Window, records: list) -> None:
+        if not self.checkpoint_path:
+            return
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"window": _window_key(window), "invoices": records}) + "\n")
+
+
+def _json_line(line: bytes) -> Optional[dict]:
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _window_key(window: Window) -> str:
+    return "{}/{}".format(window[0].isoformat(), window[1].isoformat())
@@ -0,0 +1,143 @@
+"""Stale-while-revalidate cache used by Energa24Api."""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+
+
+class Aged(NamedTuple):
+    """A fetch result that was already ``age`` seconds old, e.g. read from a shared cache."""
+    value: Any
+    age: float
+
+
+def _entry(result: Any, now: float) -> _Entry:
+    if isinstance(result, Aged):
+        return _Entry(result.value, now - max(0.0, result.age))
+    return _Entry(result, now)
+
+
+class SwrCache:
+    """Caches fetch results per endpoint with a separate TTL for each endpoint.
+
+    Within ``ttl`` the cached value is returned as is. Past it the stale value is
+    still returned right away and a single background thread revalidates it; a
+    value older than ``ttl + max_stale`` is refetched synchronously instead. An
+    endpoint without a ``max_stale`` may serve a stale value for one more TTL.
+    Concurrent misses of the same key wait for one fetch instead of each calling
+    upstream. Endpoints without a TTL are not cached. A fetch may return an
+    ``Aged`` value, which then expires ``age`` seconds sooner.
+    """
+
+    def __init__(self, ttls: Mapping[str, float], max_stale: Optional[Mapping[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttls = dict(ttls)
+        self.max_stale = dict(max_stale or {})
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Hashable], _Entry] = {}
+        self._key_locks: Dict[Tuple[str, Hashable], threading.Lock] = {}
+        self._revalidating: Dict[Tuple[str, Hashable], threading.Thread] = {}
+        self._listeners: List[Callable[[str, Hashable], None]] = []
+        self._closed = False
+
+    def add_listener(self, listener: Callable[[str, Hashable, Optional[Exception]], None]) -> Callable[[], None]:
+        """Calls ``listener(endpoint, key, error)`` from the worker thread after each background revalidation.
+
+        ``error`` is None when the revalidation stored a fresh value, else what it raised.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def get(self, endpoint: str, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            result = fetch()
+            return result.value if isinstance(result, Aged) else result
+        cache_key = (endpoint, key)
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < ttl:
+                return entry.value
+            if age < ttl + self.max_stale.get(endpoint, ttl):
+                self._revalidate(cache_key, fetch)
+                return entry.value
+        return self._fetch(cache_key, fetch, entry)
+
+    def peek(self, endpoint: str, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get((endpoint, key))
+        return entry.value if entry is not None else None
+
+    def put(self, endpoint: str, key: Hashable, value: Any, age: float = 0.0) -> None:
+        """Stores ``value`` as if it had been fetched ``age`` seconds ago."""
+        self._entries[(endpoint, key)] = _Entry(value, self._clock() - max(0.0, age))
+
+    @property
+    def entries(self) -> Mapping[Tuple[str, Hashable], _Entry]:
+        """Read-only view of the cached entries by ``(endpoint, key)``."""
+        return MappingProxyType(self._entries)
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        with self._lock:
+            for cache_key in [k for k in self._entries if endpoint is None or k[0] == endpoint]:
+                del self._entries[cache_key]
+
+    def close(self) -> None:
+        """Drops every entry and listener; revalidations still running are discarded when they finish."""
+        with self._lock:
+            self._closed = True
+            self._entries.clear()
+            self._listeners.clear()
+
+    def _fetch(self, cache_key, fetch, seen: Optional[_Entry]) -> Any:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry is not seen:
+                # another caller fetched it while we were waiting
+                return entry.value
+            entry = _entry(fetch(), self._clock())
+            with self._lock:
+                if not self._closed:
+                    self._entries[cache_key] = entry
+            return entry.value
+
+    def _revalidate(self, cache_key, fetch) -> None:
+        with self._lock:
+            if self._closed or cache_key in self._revalidating:
+                return
+            thread = threading.Thread(target=self._run_revalidation, args=(cache_key, fetch),
+                                      name="energa24-revalidate-{}".format(cache_key[0]), daemon=True)
+            self._revalidating[cache_key] = thread
+        thread.start()
+
+    def _run_revalidation(self, cache_key, fetch) -> None:
+        error = None
+        try:
+            entry = _entry(fetch(), self._clock())
+            with self._lock:
+                if self._closed:
+                    return
+                self._entries[cache_key] = entry
+        except Exception as e:
+            if self._closed:
+                return
+            _LOGGER.warning("Revalidation of %s failed, keeping the stale value: %s", cache_key[0], e)
+            error = e
+        finally:
+            with self._lock:
+                self._revalidating.pop(cache_key, None)
+        for listener in list(self._listeners):
+            listener(*cache_key, error)
@@ -2,10 +2,12 @@ from typing import Optional, Dict, Any
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
-from homeassistant.config_entries import ConfigFlow
+from homeassistant.config_entries import ConfigFlow, OptionsFlow
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.core import callback
 
 from .Energa24Api import Energa24Api
+from .const import CONF_MAX_CONCURRENCY, CONF_MEMORY_SOFT_CAP, DEFAULT_MAX_CONCURRENCY, DEFAULT_MEMORY_SOFT_CAP
 
 AUTH_SCHEMA = vol.Schema({
     vol.Required(CONF_USERNAME): cv.string,
@@ -16,6 +18,11 @@ AUTH_SCHEMA = vol.Schema({
 class Energa24EnergyConfigFlow(ConfigFlow, domain="energa24_sensor"):
     """Example config flow."""
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return Energa24OptionsFlow()
+
     async def async_step_import(self, import_config):
         return self.async_abort(reason="one_instance_at_a_time_please")
 
@@ -33,3 +40,17 @@ class Energa24EnergyConfigFlow(ConfigFlow, domain="energa24_sensor"):
         return self.async_show_form(
             step_id="user", data_schema=AUTH_SCHEMA, errors=errors, description_placeholders=description_placeholders
         )
+
+
+class Energa24OptionsFlow(OptionsFlow):
+
+    async def async_step_init(self, user_input: Optional[Dict[str, Any]] = None):
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+        options = self.config_entry.options
+        return self.async_show_form(step_id="init", data_schema=vol.Schema({
+            vol.Optional(CONF_MAX_CONCURRENCY, default=options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)):
+                vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+            vol.Optional(CONF_MEMORY_SOFT_CAP, default=options.get(CONF_MEMORY_SOFT_CAP, DEFAULT_MEMORY_SOFT_CAP)):
+                vol.All(vol.Coerce(int), vol.Range(min=0)),
+        }))
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+DOMAIN = "energa24_sensor"
+
+SCAN_INTERVAL = timedelta(hours=8)
+
+CONF_MAX_CONCURRENCY = "max_concurrency"
+DEFAULT_MAX_CONCURRENCY = 4
+# MiB an account may hold before its oldest forecast history is evicted, 0 for no cap
+CONF_MEMORY_SOFT_CAP = "memory_soft_cap"
+DEFAULT_MEMORY_SOFT_CAP = 0
+
+EVENT_INVOICE_ADDED = "energa24_invoice_added"
+EVENT_INVOICE_CHANGED = "energa24_invoice_changed"
+
+# Key of the shared ClientRegistry in hass.data[DOMAIN]
+DATA_CLIENTS = "clients"
+# Key of the coordinators by config entry id in hass.data[DOMAIN]
+DATA_COORDINATORS = "coordinators"
+# Key of the MemoryMonitors by config entry id in hass.data[DOMAIN]
+DATA_MEMORY = "memory"
+
+# Binary invoice and reading history of an account, in the .storage directory
+HISTORY_FILE = "energa24_sensor.{account_number}.history"
+# Storage key of the last known PPE list of a config entry
+METERS_STORE = "energa24_sensor.{entry_id}.meters"
+
+# (connect, read) seconds for every Energa request, so unload never waits longer on one
+REQUEST_TIMEOUT = (10, 30)
+
+SERVICE_PROFILE_REFRESH = "profile_refresh"
+# Directory in .storage the profile_refresh results go to by default
+PROFILE_DIR = "energa24_profiles"
+# Service field naming the config entry to act on
+CONF_ENTRY_ID = "entry_id"
@@ -0,0 +1,331 @@
+"""Account-level refresh shared by all entities of one Energa24 login."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .Energa24Api import Energa24Api
+from .Invoices import Invoices, InvoicesList, invoice_to_record
+from .PgpList import PpgList, PpgListElement
+from .PpgReadingForMeter import MeterReading
+from .aggregates import AccountAggregates, AccountTotals, account_totals
+from .const import DEFAULT_MAX_CONCURRENCY, EVENT_INVOICE_ADDED, EVENT_INVOICE_CHANGED, SCAN_INTERVAL
+from .delta import InvoiceDelta, InvoiceDeltaTracker, event_value
+from .discovery import meter_list_record
+from .forecast import KEPT_INVOICES, AccountForecasts, Forecast
+from .history import HistoryFormatError, HistoryStore
+from .proration import AccountProration, DailyUsage
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MeterSnapshot:
+    reading: Optional[MeterReading]
+    summary: Dict[str, object]
+    latest_priced: Optional[Invoices]
+    forecast: Optional[Forecast] = None
+    usage: Optional[DailyUsage] = None
+
+
+@dataclass(frozen=True)
+class AccountSnapshot:
+    invoices: InvoicesList
+    meters: Dict[str, MeterSnapshot] = field(default_factory=dict)
+    totals: Optional[AccountTotals] = None
+
+
+@dataclass(frozen=True)
+class RefreshResult:
+    """What the fetch and per-meter work of a refresh hand to its event-loop part."""
+    pgps: PpgList
+    added: List[PpgListElement]
+    removed: List[str]
+    invoices: InvoicesList
+    meters: List[MeterSnapshot]
+
+
+MeterListener = Callable[[List[PpgListElement], List[str]], None]
+
+
+class Energa24Coordinator(DataUpdateCoordinator[AccountSnapshot]):
+    """Fetches the invoices of an account once and derives every meter's state from them.
+
+    Per-meter work runs concurrently on the executor, at most ``max_concurrency``
+    meters at a time, so a refresh takes about as long as the slowest meter
+    instead of the sum of all of them.
+
+    The PPE list is read through the client cache on every refresh, which costs
+    nothing until the dashboard TTL passes and the cache re-checks it in the
+    background. Meters that appear or disappear are reported to the meter
+    listeners; the others keep their state.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: Energa24Api, pgps: PpgList,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, config_entry=None,
+                 history_path: Optional[str] = None, meters_store: Optional[Store] = None) -> None:
+        super().__init__(hass, _LOGGER, config_entry=config_entry,
+                         name="Energa24 {}".format(pgps.account_number), update_interval=SCAN_INTERVAL)
+        self.api = api
+        self.account_number = pgps.account_number
+        self.client_number = pgps.client_number
+        self.meters: Dict[str, PpgListElement] = {x.ppe_number: x for x in pgps.ppg_list}
+        self.meter_ids: List[str] = list(self.meters)
+        self.aggregates = AccountAggregates()
+        self.proration = AccountProration()
+        self.forecasts = AccountForecasts()
+        for meter_id in self.meter_ids:
+            self.aggregates.meter(meter_id)
+            self.proration.meter(meter_id)
+            self.forecasts.meter(meter_id)
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._delta = InvoiceDeltaTracker()
+        self.history = HistoryStore(history_path) if history_path else None
+        self._forecasts_seeded = self.history is None
+        self.evicted_invoices = 0
+        self._eviction: Optional[float] = None
+        self._pending: Set[asyncio.Future] = set()
+        # held for a whole refresh, so a profiled one never overlaps a scheduled one
+        self.refresh_lock = asyncio.Lock()
+        self._meter_listeners: List[MeterListener] = []
+        self._meters_store = meters_store
+        # the PPE list last written to the store; every fetch of the dashboard gives a new object
+        self._stored_meter_list = pgps
+        # what the last background revalidation of this account's data raised, None once one succeeds
+        self.revalidation_error: Optional[Exception] = None
+        self._remove_cache_listener = api.cache.add_listener(self._on_revalidated)
+
+    def _on_revalidated(self, endpoint: str, key, error: Optional[Exception]) -> None:
+        """Called from the cache worker thread after revalidating the invoices or the PPE list.
+
+        A fresh value is picked up by a refresh; a failure is kept so diagnostics
+        show why the entities still report the stale one.
+        """
+        if endpoint != "dashboard" and (endpoint != "invoices" or key != (self.account_number, self.client_number)):
+            return
+        self.hass.loop.call_soon_threadsafe(self._revalidated, endpoint, error)
+
+    @callback
+    def _revalidated(self, endpoint: str, error: Optional[Exception]) -> None:
+        self.revalidation_error = error
+        if error is None:
+            self.hass.async_create_task(self.async_request_refresh())
+        else:
+            _LOGGER.warning("Energa24 %s of %s could not be revalidated, serving the stale value: %s", endpoint,
+                            self.account_number, error)
+
+    @property
+    def invoice_delta(self) -> InvoiceDeltaTracker:
+        """Fingerprints of the invoices seen so far, used to find the delta of each refresh."""
+        return self._delta
+
+    @property
+    def refreshing(self) -> bool:
+        return self.refresh_lock.locked() or bool(self._pending)
+
+    @callback
+    def async_add_meter_listener(self, listener: MeterListener) -> Callable[[], None]:
+        """Calls ``listener(added, removed)`` after a refresh that found new or removed PPEs."""
+        self._meter_listeners.append(listener)
+        return lambda: self._meter_listeners.remove(listener)
+
+    async def async_shutdown(self) -> None:
+        """Stops scheduled refreshes and abandons the running one.
+
+        Executor jobs cannot be interrupted, so their futures are cancelled instead:
+        the refresh stops waiting at once and whatever the jobs return is dropped.
+        """
+        self._remove_cache_listener()
+        for future in list(self._pending):
+            future.cancel()
+        await super().async_shutdown()
+        self.data = None
+
+    async def _async_run(self, target: Callable[..., Any], *args) -> Any:
+        future = self.hass.async_add_executor_job(target, *args)
+        self._pending.add(future)
+        try:
+            return await future
+        finally:
+            self._pending.discard(future)
+
+    async def _async_update_data(self) -> AccountSnapshot:
+        async with self.refresh_lock:
+            await self.async_prepare_refresh()
+            try:
+                pgps = await self._async_run(self.api.meterList)
+                added, removed = self._sync_meters(pgps)
+                invoices = await self._async_run(self.api.invoices, self.account_number, self.client_number)
+                meters = await asyncio.gather(
+                    *(self._async_refresh_meter(meter_id, invoices.invoices_list) for meter_id in self.meter_ids))
+            except Exception as e:
+                raise UpdateFailed("Energa24 refresh failed: {}".format(e)) from e
+            return await self.async_finish_refresh(RefreshResult(pgps, added, removed, invoices, list(meters)))
+
+    async def async_prepare_refresh(self) -> None:
+        """Seeds the forecasts from the history file once and runs a requested eviction.
+
+        The caller must hold ``refresh_lock``.
+        """
+        if not self._forecasts_seeded:
+            await self._async_seed_forecasts()
+        if self._eviction is not None:
+            self._evict_history(self._eviction)
+
+    async def async_finish_refresh(self, result: RefreshResult) -> AccountSnapshot:
+        """Reports changed meters and invoices, saves the history and returns the new snapshot.
+
+        The caller must hold ``refresh_lock``.
+        """
+        if result.added or result.removed:
+            self._meters_changed(result.added, result.removed)
+        if result.pgps is not self._stored_meter_list and result.pgps.ppg_list:
+            self._store_meter_list(result.pgps)
+        delta = self._delta.update(result.invoices.invoices_list)
+        if delta:
+            self._fire_invoice_events(delta)
+        if self.history is not None and (delta is None or delta):
+            await self._async_save_history(result.invoices.invoices_list, result.meters)
+        return self._account_snapshot(result.invoices, result.meters)
+
+    def _sync_meters(self, pgps: PpgList) -> Tuple[List[PpgListElement], List[str]]:
+        current = {x.ppe_number: x for x in pgps.ppg_list}
+        if not current and self.meters:
+            # an empty dashboard is far more likely a bad response than every meter gone
+            _LOGGER.warning("Energa24 dashboard of %s lists no meters, keeping %s", self.account_number,
+                            ", ".join(self.meters))
+            return [], []
+        added = [x for ppe, x in current.items() if ppe not in self.meters]
+        removed = [ppe for ppe in self.meters if ppe not in current]
+        for ppe in removed:
+            self.aggregates.meters.pop(ppe, None)
+            self.proration.meters.pop(ppe, None)
+            self.forecasts.meters.pop(ppe, None)
+        for x in added:
+            self.aggregates.meter(x.ppe_number)
+            self.proration.meter(x.ppe_number)
+            self.forecasts.meter(x.ppe_number)
+        self.meters = current
+        self.meter_ids = list(current)
+        return added, removed
+
+    def _meters_changed(self, added: List[PpgListElement], removed: List[str]) -> None:
+        _LOGGER.info("Energa24 meters of %s changed, added: %s, removed: %s", self.account_number,
+                     [x.ppe_number for x in added], removed)
+        for listener in list(self._meter_listeners):
+            listener(added, removed)
+
+    def _store_meter_list(self, pgps: PpgList) -> None:
+        """Saves a freshly fetched PPE list, so its ``fetchedAt`` tells the next start how old it is."""
+        self._stored_meter_list = pgps
+        if self._meters_store is not None:
+            self._meters_store.async_delay_save(lambda: meter_list_record(pgps))
+
+    def request_history_eviction(self, fraction: float) -> None:
+        """Evicts ``fraction`` of the kept invoice history at the start of the next refresh.
+
+        Deferred so it never runs while the refresh's executor jobs use the history.
+        """
+        self._eviction = max(fraction, self._eviction or 0.0)
+
+    def _evict_history(self, fraction: float) -> None:
+        self._eviction = None
+        evicted = sum(x.evict_oldest(fraction) for x in self.forecasts.meters.values())
+        self.evicted_invoices += evicted
+        _LOGGER.debug("Evicted %d invoices of %s from the forecast history", evicted, self.account_number)
+
+    async def _async_seed_forecasts(self) -> None:
+        """Teaches the forecasts the invoices kept in the history file, older than the API window.
+
+        Only the trailing records a forecast keeps are decoded, not the whole file.
+        """
+        self._forecasts_seeded = True
+        try:
+            invoices = await self._async_run(self._history_invoices)
+        except (OSError, HistoryFormatError) as e:
+            _LOGGER.warning("Could not read Energa24 history from %s: %s", self.history.path, e)
+            return
+        for meter_id in self.meter_ids:
+            self.forecasts.meter(meter_id).sync(x for x in invoices if x.id_pp == meter_id)
+
+    def _history_invoices(self) -> List[Invoices]:
+        snapshot = self.history.open()
+        if snapshot is None:
+            return []
+        with snapshot:
+            return snapshot.invoices.recent(KEPT_INVOICES * len(self.meter_ids))
+
+    async def _async_save_history(self, invoices: List[Invoices], meters: List[MeterSnapshot]) -> None:
+        readings = [x.reading for x in meters if x.reading is not None]
+        try:
+            await self._async_run(self.history.merge, invoices, readings)
+        except OSError as e:
+            _LOGGER.warning("Could not save Energa24 history to %s: %s", self.history.path, e)
+
+    def _fire_invoice_events(self, delta: InvoiceDelta) -> None:
+        """Fires one event per new or changed invoice, carrying only what changed.
+
+        Invoices dropping out of the 180-day window are not reported.
+        """
+        account = {"account_number": self.account_number, "client_number": self.client_number}
+        for invoice in delta.added:
+            self.hass.bus.async_fire(EVENT_INVOICE_ADDED, {**account, "invoice": invoice_to_record(invoice)})
+        for invoice, changes in delta.changed:
+            self.hass.bus.async_fire(EVENT_INVOICE_CHANGED, {
+                **account,
+                "invoice_number": invoice.number,
+                "ppe": invoice.id_pp,
+                "changes": {name: {"old": event_value(old), "new": event_value(new)}
+                            for name, (old, new) in changes.items()},
+            })
+
+    def refresh_blocking(self) -> RefreshResult:
+        """The fetch and per-meter work of one refresh, run one after another on the calling thread.
+
+        Used to profile a refresh, so the PPE list and invoices are fetched past the
+        client cache without dropping it; the caller must hold ``refresh_lock`` and
+        pass the result to ``async_finish_refresh``.
+        """
+        pgps = self.api.meterList(cached=False)
+        added, removed = self._sync_meters(pgps)
+        invoices = self.api.invoices(self.account_number, self.client_number, cached=False)
+        meters = [self._meter_snapshot(meter_id, invoices.invoices_list) for meter_id in self.meter_ids]
+        return RefreshResult(pgps, added, removed, invoices, meters)
+
+    def _account_snapshot(self, invoices: InvoicesList, meters: List[MeterSnapshot]) -> AccountSnapshot:
+        return AccountSnapshot(invoices=invoices, meters=dict(zip(self.meter_ids, meters)),
+                               totals=account_totals(self.aggregates, self.meter_ids, invoices.invoices_list))
+
+    async def _async_refresh_meter(self, meter_id: str, invoices: List[Invoices]) -> MeterSnapshot:
+        async with self._semaphore:
+            return await self._async_run(self._meter_snapshot, meter_id, invoices)
+
+    def _meter_snapshot(self, meter_id: str, invoices: List[Invoices]) -> MeterSnapshot:
+        meter_invoices = [x for x in invoices if x.id_pp == meter_id]
+        aggregates = self.aggregates.meter(meter_id)
+        aggregates.sync(meter_invoices)
+        proration = self.proration.meter(meter_id)
+        proration.sync(meter_invoices)
+        forecast = self.forecasts.meter(meter_id)
+        forecast.sync(meter_invoices)
+
+        readings = self.api.readingForMeter(meter_id, self.account_number, self.client_number,
+                                            invoices=meter_invoices).meter_readings
+        reading = max(readings, key=lambda z: z.reading_date_utc) if readings else None
+
+        next_payment_item = aggregates.next_payment
+        summary = {
+            "sumOfUnpaidInvoices": aggregates.unpaid_total,
+            "nextPaymentDate": next_payment_item.paying_deadline_date if next_payment_item else None,
+            "nextPaymentWear": next_payment_item.wear if next_payment_item else None,
+            "nextPaymentWearKWH": next_payment_item.wear_kwh if next_payment_item else None,
+            "nextPaymentAmountToPay": next_payment_item.amount_to_pay if next_payment_item else None
+        }
+        return MeterSnapshot(reading=reading, summary=summary, latest_priced=aggregates.latest_priced,
+                             forecast=forecast.forecast(), usage=proration.usage())
@@ -0,0 +1,139 @@
+"""Decoding of Energa24 response bodies straight from bytes.
+
+With msgspec installed the body is decoded in one pass into small typed wire
+structs that only hold the fields we map; unknown keys are skipped without
+building dicts. Without it the body is loaded with orjson (or json) and mapped
+through the usual ``from_dict`` functions. Both paths share the field mapping of
+``Invoices.from_fields`` and ``MeterReading.from_fields``, so they decode to
+equal objects.
+"""
+import json
+from typing import Any, List, Optional
+
+from .Invoices import Invoices, invoices_from_dict
+from .PgpList import PpgList, PpgListElement, from_str, ppg_list_from_dict
+from .PpgReadingForMeter import MeterReading
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional speed-up
+    msgspec = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - optional speed-up
+    _loads = json.loads
+
+if msgspec is not None:
+    class _WireInvoicePpe(msgspec.Struct, rename="camel"):
+        ppe_number: Any = None
+        start_date: Any = None
+        end_date: Any = None
+        consumption: Any = None
+
+    class _WireInvoice(msgspec.Struct, rename="camel"):
+        invoice_number: Any = None
+        issue_date: Any = None
+        payment_date: Any = None
+        invoice_amount: Any = None
+        payment: Any = None
+        status: Any = None
+        document_type: Any = None
+        ppes: Optional[List[_WireInvoicePpe]] = None
+
+    class _WirePpgListElement(msgspec.Struct):
+        ppe_number: Any = msgspec.field(default=None, name="ppeNumber")
+        collection_point_card: Any = msgspec.field(default=None, name="collectionPointCard")
+        mp_id_dms: Any = msgspec.field(default=None, name="mpIdDMS")
+
+    class _WireProfile(msgspec.Struct, rename="camel"):
+        account_number: Any = None
+        client_number: Any = None
+        ppes: Optional[List[_WirePpgListElement]] = None
+
+    class _WireClient(msgspec.Struct, rename="camel"):
+        invoice_profile: List[_WireProfile]
+
+    class _WireDashboard(msgspec.Struct):
+        clients: List[_WireClient]
+
+    class _WireMeterReading(msgspec.Struct, rename="pascal"):
+        status: Any = None
+        reading_date_local: Any = None
+        reading_date_utc: Any = None
+        pp_id: Any = None
+        value: Any = None
+        value2: Any = None
+        value3: Any = None
+        meter_number: Any = None
+        region_code: Any = None
+        wear: Any = None
+        type: Any = None
+        color: Any = None
+
+    class _WireMeterReadings(msgspec.Struct):
+        meter_readings: Optional[List[_WireMeterReading]] = msgspec.field(default=None, name="MeterReadings")
+
+    _invoices_decoder = msgspec.json.Decoder(List[_WireInvoice])
+    _dashboard_decoder = msgspec.json.Decoder(_WireDashboard)
+    _meter_readings_decoder = msgspec.json.Decoder(_WireMeterReadings)
+    _decode_errors = (msgspec.ValidationError,)
+else:
+    _invoices_decoder = _dashboard_decoder = _meter_readings_decoder = None
+    _decode_errors = ()
+
+TYPED_DECODER = msgspec is not None
+
+
+def decode_invoices(body: bytes) -> List[Invoices]:
+    """Decodes an invoices response body; anything but a list raises ValueError."""
+    if _invoices_decoder is not None:
+        try:
+            wire_invoices = _invoices_decoder.decode(body)
+        except _decode_errors:
+            # shapes the typed schema does not cover, e.g. an error object
+            pass
+        else:
+            return [_invoice_from_wire(x) for x in wire_invoices]
+    data = _loads(body)
+    if not isinstance(data, list):
+        raise ValueError("Invoices response is not a JSON array")
+    return invoices_from_dict(data).invoices_list
+
+
+def decode_dashboard(body: bytes) -> PpgList:
+    """Decodes the PPEs of the first invoice profile of a dashboard response body."""
+    if _dashboard_decoder is not None:
+        try:
+            profile = _dashboard_decoder.decode(body).clients[0].invoice_profile[0]
+        except _decode_errors:
+            pass
+        else:
+            return PpgList([PpgListElement(from_str(x.ppe_number), from_str(x.collection_point_card),
+                                           from_str(x.mp_id_dms)) for x in profile.ppes or []],
+                           from_str(profile.account_number), from_str(profile.client_number))
+    return ppg_list_from_dict(_loads(body)["clients"][0]["invoiceProfile"][0])
+
+
+def decode_meter_readings(body: bytes) -> List[MeterReading]:
+    if _meter_readings_decoder is not None:
+        try:
+            wire_readings = _meter_readings_decoder.decode(body).meter_readings
+        except _decode_errors:
+            pass
+        else:
+            return [MeterReading.from_fields(x.status, x.reading_date_local, x.reading_date_utc, x.pp_id,
+                                             x.value, x.value2, x.value3, x.meter_number, x.region_code,
+                                             x.wear, x.type, x.color) for x in wire_readings or []]
+    return [MeterReading.from_dict(x) for x in _loads(body).get("MeterReadings") or []]
+
+
+def _invoice_from_wire(x) -> Invoices:
+    ppe = x.ppes[0] if x.ppes else None
+    if ppe is None:
+        return Invoices.from_fields(x.invoice_number, x.issue_date, x.payment_date, x.invoice_amount,
+                                    x.payment, x.status, x.document_type)
+    return Invoices.from_fields(x.invoice_number, x.issue_date, x.payment_date, x.invoice_amount,
+                                x.payment, x.status, x.document_type, ppe.ppe_number, ppe.start_date,
+                                ppe.end_date, ppe.consumption)
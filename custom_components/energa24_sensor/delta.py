@@ -0,0 +1,57 @@
+"""Differences between consecutive invoice snapshots of an account."""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .Invoices import Invoices
+from .aggregates import INVOICE_FIELDS, invoice_fingerprint, invoice_key
+
+
+@dataclass
+class InvoiceDelta:
+    added: List[Invoices] = field(default_factory=list)
+    changed: List[Tuple[Invoices, Dict[str, Tuple[object, object]]]] = field(default_factory=list)
+    removed: List[Hashable] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class InvoiceDeltaTracker:
+    """Remembers the last snapshot by invoice number and field hash.
+
+    The first snapshot only sets the baseline, so a restart does not report the
+    whole history as new.
+    """
+
+    def __init__(self) -> None:
+        self._known: Optional[Dict[Hashable, Tuple[int, tuple]]] = None
+
+    def update(self, invoices: Iterable[Invoices]) -> Optional[InvoiceDelta]:
+        invoices = list(invoices)
+        current: Dict[Hashable, Tuple[int, tuple]] = {}
+        for invoice in invoices:
+            fingerprint = invoice_fingerprint(invoice)
+            current[invoice_key(invoice)] = (hash(fingerprint), fingerprint)
+        previous, self._known = self._known, current
+        if previous is None:
+            return None
+
+        delta = InvoiceDelta()
+        for invoice in invoices:
+            key = invoice_key(invoice)
+            known = previous.get(key)
+            if known is None:
+                delta.added.append(invoice)
+            elif known[0] != current[key][0]:
+                delta.changed.append((invoice, _changed_fields(known[1], current[key][1])))
+        delta.removed = [key for key in previous if key not in current]
+        return delta
+
+
+def _changed_fields(old: tuple, new: tuple) -> Dict[str, Tuple[object, object]]:
+    return {name: (a, b) for name, a, b in zip(INVOICE_FIELDS, old, new) if a != b}
+
+
+def event_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
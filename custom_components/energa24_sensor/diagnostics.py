@@ -0,0 +1,34 @@
+"""Diagnostics of the Energa24 integration."""
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_COORDINATORS, DATA_MEMORY, DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry) -> Dict[str, Any]:
+    coordinator = hass.data.get(DOMAIN, {}).get(DATA_COORDINATORS, {}).get(config_entry.entry_id)
+    monitor = hass.data.get(DOMAIN, {}).get(DATA_MEMORY, {}).get(config_entry.entry_id)
+    diagnostics = {
+        "entry": {
+            "data": async_redact_data(dict(config_entry.data), TO_REDACT),
+            "options": dict(config_entry.options),
+        },
+    }
+    if coordinator is not None:
+        diagnostics["account"] = {
+            "meters": len(coordinator.meter_ids),
+            "last_update_success": coordinator.last_update_success,
+            "revalidation_error": repr(coordinator.revalidation_error) if coordinator.revalidation_error else None,
+            "forecast_invoices_kept": sum(x.invoices_kept for x in coordinator.forecasts.meters.values()),
+        }
+    if monitor is not None:
+        if monitor.report is None:
+            await monitor.async_sample()
+        diagnostics["memory"] = monitor.as_dict()
+    return diagnostics
@@ -0,0 +1,53 @@
+"""PPE list of an account kept across restarts.
+
+Setup reads the last known list from storage and hands it to the client cache
+with its real age, so a restart within the dashboard TTL does not call the
+dashboard at all, and a list up to one more TTL older is served at once while
+the cache re-checks it in the background. An even older list is refetched first.
+"""
+import time
+from typing import Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .Energa24Api import Energa24Api
+from .PgpList import PpgList, PpgListElement
+from .const import METERS_STORE
+
+STORAGE_VERSION = 1
+
+
+def meters_store(hass: HomeAssistant, entry_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, METERS_STORE.format(entry_id=entry_id))
+
+
+def meter_list_record(pgps: PpgList) -> dict:
+    return {
+        "accountNumber": pgps.account_number,
+        "clientNumber": pgps.client_number,
+        "ppes": [x.to_dict() for x in pgps.ppg_list],
+        "fetchedAt": time.time(),
+    }
+
+
+def meter_list_from_record(record: dict) -> PpgList:
+    return PpgList([PpgListElement.from_dict(x) for x in record.get("ppes") or []],
+                   record.get("accountNumber") or "", record.get("clientNumber") or "")
+
+
+async def async_discover_meters(hass: HomeAssistant, api: Energa24Api, store: Optional[Store] = None) -> PpgList:
+    """Returns the PPE list of the account, primed from ``store`` when it holds one.
+
+    A list fetched here, because none was stored or the stored one was too old,
+    is saved with its new ``fetchedAt``; the coordinator saves later ones.
+    """
+    record = await store.async_load() if store is not None else None
+    primed = None
+    if record and record.get("ppes") and api.cache.peek("dashboard", None) is None:
+        primed = meter_list_from_record(record)
+        api.cache.put("dashboard", None, primed, age=time.time() - record.get("fetchedAt", 0))
+    pgps = await hass.async_add_executor_job(api.meterList)
+    if store is not None and (not record or pgps is not primed):
+        await store.async_save(meter_list_record(pgps))
+    return pgps
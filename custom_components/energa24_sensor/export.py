@@ -0,0 +1,157 @@
+"""Standalone export of invoice history for many Energa24 accounts.
+
+Nothing here imports Home Assistant; the command line front end is the
+top-level energa24_cli.py script.
+"""
+from __future__ import annotations
+
+import csv
+import dataclasses
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from typing import IO, Callable, Iterable, Iterator, Optional, Tuple
+
+from .Energa24Api import Energa24Api
+from .Invoices import Invoices
+from .paging import iter_window, split_windows
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("jsonl", "csv")
+ACCOUNT_FIELDS = ["username", "client_number", "account_number"]
+INVOICE_FIELDS = [field.name for field in dataclasses.fields(Invoices)]
+# How far back an export goes without an explicit start day
+EXPORT_HISTORY_DAYS = 10 * 365
+
+
+def read_credentials(stream: IO[str]) -> Iterator[Tuple[str, str]]:
+    """Yields (username, password) pairs from a CSV file with a header row."""
+    for row in csv.DictReader(stream):
+        username = (row.get("username") or "").strip()
+        if not username:
+            continue
+        yield username, row.get("password") or ""
+
+
+def fetch_account(username: str, password: str, write: Callable[[dict], None], since: date,
+                  until: Optional[date] = None) -> None:
+    """Pages through the account's invoices issued in [since, until] and writes each one as it is decoded."""
+    api = Energa24Api(username, password)
+    try:
+        pgps = api.meterList()
+        account = {
+            "username": username,
+            "client_number": pgps.client_number,
+            "account_number": pgps.account_number,
+        }
+        for window in split_windows(since, until or date.today()):
+            for invoice in iter_window(api, pgps.account_number, pgps.client_number, window):
+                write(invoice_record(account, invoice))
+    finally:
+        api.close()
+
+
+def invoice_record(account: dict, invoice: Invoices) -> dict:
+    record = dict(account)
+    for name in INVOICE_FIELDS:
+        value = getattr(invoice, name)
+        record[name] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+class JsonlWriter:
+    def __init__(self, stream: IO[str]) -> None:
+        self._stream = stream
+
+    def write(self, record: dict) -> None:
+        self._stream.write(json.dumps(record, ensure_ascii=False))
+        self._stream.write("\n")
+
+
+class CsvWriter:
+    def __init__(self, stream: IO[str]) -> None:
+        self._writer = csv.DictWriter(stream, fieldnames=ACCOUNT_FIELDS + INVOICE_FIELDS)
+        self._writer.writeheader()
+
+    def write(self, record: dict) -> None:
+        self._writer.writerow(record)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclasses.dataclass
+class ExportStats:
+    accounts: int = 0
+    failed_accounts: int = 0
+    records: int = 0
+    elapsed: float = 0.0
+    peak_rss: Optional[int] = None
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        rss = "n/a" if self.peak_rss is None else "{:.1f} MiB".format(self.peak_rss / (1024 * 1024))
+        return "Exported {} invoices from {} accounts ({} failed) in {:.2f}s, {:.1f} records/s, peak RSS {}".format(
+            self.records, self.accounts, self.failed_accounts, self.elapsed, self.records_per_second, rss)
+
+
+def export_invoices(credentials: Iterable[Tuple[str, str]], writer, workers: int = 4,
+                    since: Optional[date] = None) -> ExportStats:
+    """Fetches every account since ``since`` on a bounded worker pool, writing records as they are decoded.
+
+    At most ``workers`` accounts are in flight at a time and no account is
+    buffered, so memory does not grow with the history. Records of concurrent
+    accounts interleave, and a failing account keeps what it already wrote.
+    """
+    stats = ExportStats()
+    started = time.perf_counter()
+    since = since or date.today() - timedelta(days=EXPORT_HISTORY_DAYS)
+    credentials = iter(credentials)
+    lock = threading.Lock()
+
+    def write(record: dict) -> None:
+        with lock:
+            writer.write(record)
+            stats.records += 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def submit_next() -> bool:
+            try:
+                username, password = next(credentials)
+            except StopIteration:
+                return False
+            pending[executor.submit(fetch_account, username, password, write, since)] = username
+            return True
+
+        while len(pending) < workers and submit_next():
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                username = pending.pop(future)
+                stats.accounts += 1
+                try:
+                    future.result()
+                except Exception as e:
+                    stats.failed_accounts += 1
+                    _LOGGER.error("Export failed for %s: %s", username, e)
+                submit_next()
+    stats.elapsed = time.perf_counter() - started
+    stats.peak_rss = peak_rss_bytes()
+    return stats
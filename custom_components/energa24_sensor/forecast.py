@@ -0,0 +1,214 @@
+"""Forecast of a meter's next invoice, updated in O(1) per new invoice.
+
+Each invoice is turned into daily rates, kWh per day and PLN per day, over its
+billing period. Every rate has its own additive-trend, multiplicative-season
+exponential smoothing model:
+
+* the level is the deseasonalised daily rate,
+* the trend is the change of the level per day, because periods are irregular,
+* the seasonal index is per calendar month of the period's midpoint.
+
+The next invoice is predicted to cover as many days as the smoothed period
+length. Before an invoice is learned it is predicted first, from its own
+length, and the error goes into a running MAPE. The MAPE is therefore the
+one-step-ahead accuracy on past data, not a fit.
+
+Invoices arriving in billing order are learned one at a time. A corrected
+invoice or one older than the last learned period replays the known history
+in order instead. That is rare, because the API returns invoices by date.
+
+Only the latest KEPT_INVOICES invoices of a meter are kept for replays, which
+is also all of the history a meter needs to be seeded with.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from .Invoices import Invoices
+from .aggregates import invoice_key
+
+LEVEL_SMOOTHING = 0.5
+TREND_SMOOTHING = 0.2
+SEASON_SMOOTHING = 0.3
+LENGTH_SMOOTHING = 0.5
+# Invoices kept per meter for replays: three years of monthly billing
+KEPT_INVOICES = 36
+
+
+@dataclass(frozen=True)
+class Forecast:
+    kwh: float
+    gross_amount: float
+    period_start: datetime
+    period_end: datetime
+    mape_kwh: Optional[float]
+    mape_gross_amount: Optional[float]
+    samples: int
+
+
+def is_forecastable(invoice: Invoices) -> bool:
+    return bool(invoice.wear_kwh) and invoice.wear_kwh > 0 \
+        and bool(invoice.gross_amount) and invoice.gross_amount > 0 \
+        and invoice.start_date is not None and invoice.end_date is not None \
+        and invoice.end_date > invoice.start_date
+
+
+class SeasonalRate:
+    """Holt-Winters style smoothing of a daily rate observed over irregular periods."""
+
+    def __init__(self) -> None:
+        self.level: Optional[float] = None
+        self.trend = 0.0
+        self.season: Dict[int, float] = {}
+        self._last_day: Optional[float] = None
+        self._error_sum = 0.0
+        self._errors = 0
+
+    @property
+    def mape(self) -> Optional[float]:
+        return round(100 * self._error_sum / self._errors, 1) if self._errors else None
+
+    def predict(self, day: float, month: int) -> Optional[float]:
+        """Daily rate at ``day`` (a proleptic Gregorian day number) in ``month``."""
+        if self.level is None:
+            return None
+        ahead = day - self._last_day
+        return max(0.0, (self.level + self.trend * ahead) * self.season.get(month, 1.0))
+
+    def update(self, rate: float, day: float, month: int) -> None:
+        predicted = self.predict(day, month)
+        if predicted is not None and rate > 0:
+            self._error_sum += abs(predicted - rate) / rate
+            self._errors += 1
+
+        index = self.season.get(month, 1.0)
+        deseasonalised = rate / index
+        if self.level is None:
+            self.level = deseasonalised
+        else:
+            ahead = max(day - self._last_day, 1.0)
+            previous = self.level
+            self.level = LEVEL_SMOOTHING * deseasonalised \
+                + (1 - LEVEL_SMOOTHING) * (previous + self.trend * ahead)
+            self.trend = TREND_SMOOTHING * (self.level - previous) / ahead + (1 - TREND_SMOOTHING) * self.trend
+        if self.level > 0:
+            self.season[month] = SEASON_SMOOTHING * rate / self.level + (1 - SEASON_SMOOTHING) * index
+        self._last_day = day
+
+
+class MeterForecast:
+    """Next-invoice forecast of one meter, fed with that meter's invoices."""
+
+    def __init__(self, kept_invoices: int = KEPT_INVOICES) -> None:
+        self.kept_invoices = kept_invoices
+        self._invoices: Dict[Hashable, Invoices] = {}
+        self._fingerprints: Dict[Hashable, tuple] = {}
+        # periods ending up to here were learned but are no longer kept for replays
+        self._evicted_until: Optional[datetime] = None
+        self._reset()
+
+    def __len__(self) -> int:
+        return self._samples
+
+    @property
+    def invoices_kept(self) -> int:
+        """Invoices kept for replays, at most ``kept_invoices``."""
+        return len(self._invoices)
+
+    def _reset(self) -> None:
+        self._kwh = SeasonalRate()
+        self._cost = SeasonalRate()
+        self._length: Optional[float] = None
+        self._last_end: Optional[datetime] = None
+        self._samples = 0
+
+    def sync(self, invoices: Iterable[Invoices]) -> bool:
+        """Learns new invoices; returns True if the forecast changed.
+
+        Invoices missing from ``invoices`` are kept, since the window of the
+        invoices endpoint moves on while the history stays valid.
+        """
+        new: List[Invoices] = []
+        replay = False
+        for invoice in invoices:
+            if not is_forecastable(invoice):
+                continue
+            key = invoice_key(invoice)
+            if self._evicted_until is not None and invoice.end_date <= self._evicted_until \
+                    and key not in self._fingerprints:
+                continue
+            # payments do not change what the model learned from an invoice
+            fingerprint = (invoice.start_date, invoice.end_date, invoice.wear_kwh, invoice.gross_amount)
+            known = self._fingerprints.get(key)
+            if known == fingerprint:
+                continue
+            replay |= known is not None or (self._last_end is not None and invoice.end_date <= self._last_end)
+            self._invoices[key] = invoice
+            self._fingerprints[key] = fingerprint
+            new.append(invoice)
+        if not new:
+            return False
+        if replay:
+            self._reset()
+            new = list(self._invoices.values())
+        for invoice in sorted(new, key=lambda x: x.end_date):
+            self._learn(invoice)
+        self._forget_oldest(len(self._invoices) - self.kept_invoices)
+        return True
+
+    def evict_oldest(self, fraction: float) -> int:
+        """Forgets the oldest ``fraction`` of the invoices kept for replays; the model keeps what it learned.
+
+        A later replay only sees the invoices still kept.
+        """
+        return self._forget_oldest(min(len(self._invoices), int(len(self._invoices) * fraction + 0.999)))
+
+    def _forget_oldest(self, count: int) -> int:
+        if count <= 0:
+            return 0
+        oldest = sorted(self._invoices, key=lambda k: self._invoices[k].end_date)[:count]
+        for key in oldest:
+            end = self._invoices.pop(key).end_date
+            del self._fingerprints[key]
+            self._evicted_until = end if self._evicted_until is None else max(self._evicted_until, end)
+        return count
+
+    def forecast(self) -> Optional[Forecast]:
+        if self._last_end is None:
+            return None
+        start = self._last_end
+        end = start + timedelta(days=round(self._length))
+        middle = start + (end - start) / 2
+        day, month = _day(middle), middle.month
+        days = (end - start) / timedelta(days=1)
+        return Forecast(kwh=round(self._kwh.predict(day, month) * days, 1),
+                        gross_amount=round(self._cost.predict(day, month) * days, 2),
+                        period_start=start, period_end=end,
+                        mape_kwh=self._kwh.mape, mape_gross_amount=self._cost.mape, samples=self._samples)
+
+    def _learn(self, invoice: Invoices) -> None:
+        days = (invoice.end_date - invoice.start_date) / timedelta(days=1)
+        middle = invoice.start_date + (invoice.end_date - invoice.start_date) / 2
+        day, month = _day(middle), middle.month
+        self._kwh.update(invoice.wear_kwh / days, day, month)
+        self._cost.update(invoice.gross_amount / days, day, month)
+        self._length = days if self._length is None else LENGTH_SMOOTHING * days + (1 - LENGTH_SMOOTHING) * self._length
+        self._last_end = invoice.end_date
+        self._samples += 1
+
+
+class AccountForecasts:
+    """One MeterForecast per meter of an account."""
+
+    def __init__(self) -> None:
+        self.meters: Dict[str, MeterForecast] = {}
+
+    def meter(self, meter_id: str) -> MeterForecast:
+        forecast = self.meters.get(meter_id)
+        if forecast is None:
+            forecast = self.meters[meter_id] = MeterForecast()
+        return forecast
+
+
+def _day(value: datetime) -> float:
+    return value.replace(tzinfo=None).toordinal() + value.hour / 24
@@ -0,0 +1,453 @@
+"""Compact on-disk history of an account's invoices and meter readings.
+
+Layout (little endian)::
+
+    header    magic, version, record counts and section offsets
+    invoices  fixed-width records sorted by issue date
+    readings  fixed-width records sorted by reading date (UTC)
+    strings   u32 offset table followed by the UTF-8 blob
+    segments  zero or more appended merges, each one:
+              segment header, u64 offsets of the records it replaces,
+              invoice and reading records, and the strings new to the file
+
+Dates are microseconds since the Unix epoch; tz-aware values are stored in UTC
+with a flag so they load aware again. Every text field is an index into the
+string table, so repeated PPE numbers, types and statuses are stored once.
+A segment's strings continue the numbering of the tables before it.
+
+A merge appends only the records that are new or changed as one segment, so a
+refresh writes a few hundred bytes instead of the whole history; every
+COMPACT_SEGMENTS merges the file is rewritten sorted and without replaced
+records. A segment cut short by a crash is ignored and overwritten by the next
+merge.
+
+The file is memory-mapped on load: opening it reads only the header, and a
+record (or string) is decoded when asked for, so the OS pages in just the
+recent part of the history a refresh needs.
+"""
+import bisect
+import logging
+import math
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .Invoices import Invoices
+from .PpgReadingForMeter import MeterReading
+from .aggregates import invoice_key
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"E24H"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIIIQQQ")
+# number, 5 dates, gross, to pay, wear, wear kWh, id_pp, type, status, flags
+_INVOICE = struct.Struct("<I5q4dIIIB")
+# status, local and UTC date, pp id, value, meter number, region, wear, type, color, flags
+_READING = struct.Struct("<I2qqqIIqIIB")
+_OFFSET = struct.Struct("<I")
+SEGMENT_MAGIC = b"E24S"
+# magic, invoice, reading, replaced record and new string counts
+_SEGMENT = struct.Struct("<4sIIII")
+_REPLACED = struct.Struct("<Q")
+# appended segments a merge tolerates before it rewrites the file
+COMPACT_SEGMENTS = 16
+
+_EPOCH = datetime(1970, 1, 1)
+_INVOICE_DATES = ("date", "sell_date", "paying_deadline_date", "start_date", "end_date")
+_PAID = 1 << 7
+# stands for a missing date, and sorts before every real one
+_MISSING = -(1 << 63)
+
+
+class HistoryFormatError(Exception):
+    pass
+
+
+def _to_epoch(value: Optional[datetime]) -> Tuple[int, bool]:
+    if value is None:
+        return _MISSING, False
+    aware = value.tzinfo is not None
+    if aware:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(microseconds=1), aware
+
+
+def _from_epoch(micros: int, aware: bool) -> Optional[datetime]:
+    if micros == _MISSING:
+        return None
+    value = _EPOCH + timedelta(microseconds=micros)
+    return value.replace(tzinfo=timezone.utc) if aware else value
+
+
+def _to_float(value: Optional[float]) -> float:
+    # NaN stands for a missing amount
+    return math.nan if value is None else value
+
+
+def _from_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class _StringTable:
+    """Numbers strings from ``first`` on, reusing the ``known`` ones of the tables before it."""
+
+    def __init__(self, known: Optional[Dict[str, int]] = None, first: int = 0) -> None:
+        self.index: Dict[str, int] = dict(known or {})
+        self.strings: List[str] = []
+        self.first = first
+
+    def add(self, value: str) -> int:
+        value = value or ""
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = self.first + len(self.strings)
+            self.strings.append(value)
+        return position
+
+    def pack(self) -> bytes:
+        blobs = [x.encode("utf-8") for x in self.strings]
+        offsets = bytearray()
+        position = 0
+        for blob in blobs:
+            offsets += _OFFSET.pack(position)
+            position += len(blob)
+        offsets += _OFFSET.pack(position)
+        return bytes(offsets) + b"".join(blobs)
+
+
+def _pack_invoice(x: Invoices, add: Callable[[str], int]) -> bytes:
+    flags = _PAID if x.is_paid else 0
+    dates = []
+    for bit, name in enumerate(_INVOICE_DATES):
+        micros, aware = _to_epoch(getattr(x, name))
+        dates.append(micros)
+        flags |= aware << bit
+    return _INVOICE.pack(add(x.number), *dates, *map(_to_float, (x.gross_amount, x.amount_to_pay, x.wear, x.wear_kwh)),
+                         add(x.id_pp), add(x.type), add(x.status), flags)
+
+
+def _pack_reading(x: MeterReading, add: Callable[[str], int]) -> bytes:
+    local, local_aware = _to_epoch(x.reading_date_local)
+    utc, utc_aware = _to_epoch(x.reading_date_utc)
+    return _READING.pack(add(x.status), local, utc, x.pp_id or 0, x.value or 0,
+                         add(x.meter_number), add(x.region_code), x.wear or 0,
+                         add(x.type), add(x.color), local_aware | utc_aware << 1)
+
+
+def _stored_form(pack: Callable[[object, Callable[[str], int]], bytes], x) -> tuple:
+    """What the file keeps of ``x``: equal for two records exactly when storing either gives the same record."""
+    texts = []
+
+    def add(value: str) -> int:
+        texts.append(value or "")
+        return 0
+
+    return pack(x, add), tuple(texts)
+
+
+def write_history(path: str, invoices: Iterable[Invoices], readings: Iterable[MeterReading]) -> None:
+    """Writes a history file atomically; records are sorted oldest first."""
+    strings = _StringTable()
+    invoice_records, reading_records = _pack_records(invoices, readings, strings)
+    invoices_offset = _HEADER.size
+    readings_offset = invoices_offset + len(invoice_records)
+    strings_offset = readings_offset + len(reading_records)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(invoice_records) // _INVOICE.size,
+                          len(reading_records) // _READING.size, len(strings.strings),
+                          invoices_offset, readings_offset, strings_offset)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(invoice_records)
+        f.write(reading_records)
+        f.write(strings.pack())
+    os.replace(tmp_path, path)
+
+
+def _pack_records(invoices: Iterable[Invoices], readings: Iterable[MeterReading],
+                  strings: _StringTable) -> Tuple[bytes, bytes]:
+    invoice_records = b"".join(_pack_invoice(x, strings.add) for x in sorted(
+        invoices, key=lambda z: _to_epoch(z.date)[0]))
+    reading_records = b"".join(_pack_reading(x, strings.add) for x in sorted(
+        readings, key=lambda z: _to_epoch(z.reading_date_utc)[0]))
+    return invoice_records, reading_records
+
+
+def _pack_segment(invoices: List[Invoices], readings: List[MeterReading], replaced: List[int],
+                  strings: _StringTable) -> bytes:
+    invoice_records, reading_records = _pack_records(invoices, readings, strings)
+    header = _SEGMENT.pack(SEGMENT_MAGIC, len(invoices), len(readings), len(replaced), len(strings.strings))
+    return header + b"".join(_REPLACED.pack(x) for x in replaced) + invoice_records + reading_records + strings.pack()
+
+
+class _Records(Sequence):
+    """Read-only sequence view decoding one fixed-width record per access."""
+
+    def __init__(self, history: "HistorySnapshot", offset: int, count: int, record: struct.Struct,
+                 sort_field: int, decode: Callable[[tuple], object]) -> None:
+        self._history = history
+        self._sort_field = sort_field
+        self._offset = offset
+        self._count = count
+        self._record = record
+        self._decode = decode
+        # file offset of every record in order once segments were merged in, else None
+        self._offsets: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._decode(self._record.unpack_from(self._history._map, self._record_offset(index)))
+
+    def _record_offset(self, index: int) -> int:
+        if self._offsets is not None:
+            return self._offsets[index]
+        return self._offset + index * self._record.size
+
+    def _with_offsets(self) -> Iterable[Tuple[int, object]]:
+        for index in range(self._count):
+            offset = self._record_offset(index)
+            yield offset, self._decode(self._record.unpack_from(self._history._map, offset))
+
+    def _merge_in(self, appended: List[int], replaced: Set[int]) -> None:
+        """Orders the ``appended`` records among the sorted base ones and drops the ``replaced`` ones.
+
+        Only the base records an appended one lands next to are read.
+        """
+        inserts = sorted((bisect.bisect_right(_SortKeys(self), self._key_at(x)), self._key_at(x), x) for x in appended)
+        offsets = []
+        start = 0
+        for position, _, offset in inserts:
+            offsets.extend(self._offset + i * self._record.size for i in range(start, position))
+            offsets.append(offset)
+            start = position
+        offsets.extend(self._offset + i * self._record.size for i in range(start, self._count))
+        self._offsets = [x for x in offsets if x not in replaced]
+        self._count = len(self._offsets)
+
+    def _key_at(self, offset: int) -> int:
+        return self._record.unpack_from(self._history._map, offset)[self._sort_field]
+
+    def recent(self, count: int) -> list:
+        return self[max(0, self._count - count):]
+
+    def since(self, when: datetime) -> list:
+        """Records dated at or after ``when``, found by bisecting the sort key only."""
+        key = _to_epoch(when)[0]
+        start = bisect.bisect_left(_SortKeys(self), key)
+        return self[start:]
+
+    def _sort_key(self, index: int) -> int:
+        return self._key_at(self._record_offset(index))
+
+
+class _SortKeys(Sequence):
+    def __init__(self, records: _Records) -> None:
+        self._records = records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index: int) -> int:
+        return self._records._sort_key(index)
+
+
+class HistorySnapshot:
+    """Memory-mapped history file; ``invoices`` and ``readings`` decode lazily.
+
+    Opening reads the header and the headers of the appended segments only.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise HistoryFormatError("{} is empty".format(path))
+        try:
+            (magic, version, _, invoice_count, reading_count, string_count,
+             invoices_offset, readings_offset, strings_offset) = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise HistoryFormatError("{} is truncated".format(path))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise HistoryFormatError("{} is not a version {} history file".format(path, FORMAT_VERSION))
+        if len(self._map) < strings_offset + (string_count + 1) * _OFFSET.size:
+            self.close()
+            raise HistoryFormatError("{} is truncated".format(path))
+        # (first string, offset table, blob) of the base table and of every segment's strings
+        self._tables = [(0, strings_offset, strings_offset + (string_count + 1) * _OFFSET.size)]
+        self._string_count = string_count
+        self._strings: Dict[int, str] = {}
+        self.invoices = _Records(self, invoices_offset, invoice_count, _INVOICE, 1, self._decode_invoice)
+        self.readings = _Records(self, readings_offset, reading_count, _READING, 2, self._decode_reading)
+        self._end = self._tables[0][2] + self._table_size(strings_offset, string_count)
+        if self._end > len(self._map):
+            self.close()
+            raise HistoryFormatError("{} is truncated".format(path))
+        self.segments = 0
+        self._read_segments()
+
+    def _table_size(self, offset: int, count: int) -> int:
+        return _OFFSET.unpack_from(self._map, offset + count * _OFFSET.size)[0]
+
+    def _read_segments(self) -> None:
+        """Reads the segment headers up to the first incomplete one, which a crash cut short."""
+        appended_invoices: List[int] = []
+        appended_readings: List[int] = []
+        replaced: Set[int] = set()
+        position = self._end
+        while position + _SEGMENT.size <= len(self._map):
+            magic, invoice_count, reading_count, replaced_count, string_count = _SEGMENT.unpack_from(
+                self._map, position)
+            invoices = position + _SEGMENT.size + replaced_count * _REPLACED.size
+            readings = invoices + invoice_count * _INVOICE.size
+            strings = readings + reading_count * _READING.size
+            blob = strings + (string_count + 1) * _OFFSET.size
+            if magic != SEGMENT_MAGIC or blob > len(self._map):
+                break
+            end = blob + self._table_size(strings, string_count)
+            if end > len(self._map):
+                break
+            replaced.update(_REPLACED.unpack_from(self._map, position + _SEGMENT.size + i * _REPLACED.size)[0]
+                            for i in range(replaced_count))
+            appended_invoices.extend(invoices + i * _INVOICE.size for i in range(invoice_count))
+            appended_readings.extend(readings + i * _READING.size for i in range(reading_count))
+            self._tables.append((self._string_count, strings, blob))
+            self._string_count += string_count
+            self.segments += 1
+            position = self._end = end
+        if self.segments:
+            self.invoices._merge_in(appended_invoices, replaced)
+            self.readings._merge_in(appended_readings, replaced)
+
+    def __enter__(self) -> "HistorySnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def string(self, index: int) -> str:
+        value = self._strings.get(index)
+        if value is None:
+            first, offsets, blob = self._tables[bisect.bisect_right(self._tables, (index, math.inf)) - 1]
+            start, end = struct.unpack_from("<II", self._map, offsets + (index - first) * _OFFSET.size)
+            value = self._strings[index] = self._map[blob + start:blob + end].decode("utf-8")
+        return value
+
+    def _decode_invoice(self, fields: tuple) -> Invoices:
+        (number, date, sell_date, paying_deadline_date, start_date, end_date, gross_amount, amount_to_pay,
+         wear, wear_kwh, id_pp, type_, status, flags) = fields
+        dates = [_from_epoch(micros, bool(flags & 1 << bit)) for bit, micros in enumerate(
+            (date, sell_date, paying_deadline_date, start_date, end_date))]
+        return Invoices(number=self.string(number), date=dates[0], sell_date=dates[1],
+                        gross_amount=_from_float(gross_amount), amount_to_pay=_from_float(amount_to_pay),
+                        wear=_from_float(wear), wear_kwh=_from_float(wear_kwh), paying_deadline_date=dates[2],
+                        start_date=dates[3], end_date=dates[4], is_paid=bool(flags & _PAID),
+                        id_pp=self.string(id_pp), type=self.string(type_), status=self.string(status))
+
+    def _decode_reading(self, fields: tuple) -> MeterReading:
+        status, local, utc, pp_id, value, meter_number, region_code, wear, type_, color, flags = fields
+        return MeterReading(status=self.string(status), reading_date_local=_from_epoch(local, bool(flags & 1)),
+                            reading_date_utc=_from_epoch(utc, bool(flags & 2)), pp_id=pp_id, value=value,
+                            value2=None, value3=None, meter_number=self.string(meter_number),
+                            region_code=self.string(region_code), wear=wear, type=self.string(type_),
+                            color=self.string(color))
+
+
+class HistoryStore:
+    """Keeps the whole known history of an account in one file.
+
+    The invoices endpoint only returns the last 180 days, so each merge adds the
+    current window to what is already on disk instead of replacing it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def open(self) -> Optional[HistorySnapshot]:
+        if not os.path.exists(self.path):
+            return None
+        return HistorySnapshot(self.path)
+
+    def remove(self) -> None:
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def merge(self, invoices: Iterable[Invoices], readings: Iterable[MeterReading]) -> None:
+        """Appends the new and changed records, or rewrites the file every COMPACT_SEGMENTS merges."""
+        try:
+            snapshot = self.open()
+        except HistoryFormatError as e:
+            _LOGGER.warning("Rebuilding history from the current window: %s", e)
+            snapshot = None
+        if snapshot is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            write_history(self.path, {invoice_key(x): x for x in invoices}.values(),
+                          {_reading_key(x): x for x in readings}.values())
+            return
+        with snapshot:
+            new_invoices, kept_invoices, replaced = _changes(snapshot.invoices, invoices, invoice_key, _pack_invoice)
+            new_readings, kept_readings, replaced_readings = _changes(snapshot.readings, readings, _reading_key,
+                                                                      _pack_reading)
+            if not new_invoices and not new_readings:
+                return
+            replaced += replaced_readings
+            compact = snapshot.segments + 1 >= COMPACT_SEGMENTS
+            end = snapshot._end
+            # strings already decoded for the comparison are the ones the new records may share
+            strings = _StringTable({v: k for k, v in snapshot._strings.items()}, snapshot._string_count)
+        if compact:
+            write_history(self.path, [*kept_invoices, *new_invoices], [*kept_readings, *new_readings])
+            return
+        segment = _pack_segment(new_invoices, new_readings, replaced, strings)
+        with open(self.path, "r+b") as f:
+            f.seek(end)
+            f.write(segment)
+            f.truncate()
+
+
+def _changes(stored: _Records, incoming: Iterable, key: Callable, pack: Callable) -> Tuple[list, list, List[int]]:
+    """Splits ``incoming`` against the ``stored`` records.
+
+    Returns the records to write, the stored ones they leave as they are and the
+    file offsets of the stored ones they replace.
+    """
+    current = {}
+    for offset, x in stored._with_offsets():
+        current[key(x)] = offset, x
+    new, replaced = [], []
+    for k, x in {key(x): x for x in incoming}.items():
+        old = current.get(k)
+        if old is None:
+            new.append(x)
+        elif _stored_form(pack, old[1]) != _stored_form(pack, x):
+            new.append(x)
+            replaced.append(old[0])
+            del current[k]
+    return new, [x for _, x in current.values()], replaced
+
+
+def _reading_key(x: MeterReading) -> tuple:
+    return x.meter_number, _to_epoch(x.reading_date_utc)[0]
@@ -0,0 +1,199 @@
+"""Approximate memory held by an account, sampled in the background.
+
+Sizes come from walking object graphs with ``sys.getsizeof``. Each object is
+counted once per sample, for the first component that reaches it. So the
+entities of a meter only count what they hold beyond the coordinator's
+snapshot, and a client shared by several entries is counted once per entry.
+The walk does not go into Home Assistant objects, classes, modules or
+functions. It also does not go into objects that make up attributes on access,
+such as mocks, and it reads attributes without calling ``__getattr__``.
+
+A sample runs on the executor every MEMORY_SAMPLE_INTERVAL, never during a
+refresh. If the account is over its soft cap, the coordinator is asked to
+evict the oldest invoice history it keeps for forecasting, at the start of
+its next refresh.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import sys
+import types
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+_LOGGER = logging.getLogger(__name__)
+
+MEMORY_SAMPLE_INTERVAL = timedelta(minutes=15)
+# Objects visited per deep_sizeof call at most, so one sample stays cheap
+MAX_OBJECTS = 200_000
+# Objects waiting to be visited at most; references past it are not followed
+MAX_PENDING = 100_000
+
+_ATOMIC = (str, bytes, bytearray, int, float, complex, bool, type(None), datetime, memoryview, range)
+_SKIPPED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+            types.CodeType, types.FrameType)
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Bytes of ``obj`` and everything it references that is not in ``seen`` yet."""
+    seen = set() if seen is None else seen
+    total = 0
+    visited = 0
+    stack = [obj]
+
+    def push(items: Iterable[Any]) -> None:
+        stack.extend(islice(items, max(0, MAX_PENDING - len(stack))))
+
+    while stack and visited < MAX_OBJECTS:
+        current = stack.pop()
+        kind = type(current)
+        if id(current) in seen or isinstance(current, _SKIPPED) or kind.__module__.startswith("homeassistant"):
+            continue
+        seen.add(id(current))
+        visited += 1
+        total += sys.getsizeof(current, 0)
+        if isinstance(current, _ATOMIC) or not _is_plain(kind):
+            continue
+        if isinstance(current, (dict, types.MappingProxyType)):
+            push(current.keys())
+            push(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            push(current)
+        push(_attributes(current, kind))
+    return total
+
+
+@functools.lru_cache(maxsize=None)
+def _is_plain(kind: type) -> bool:
+    """False for types that make up attributes on access, such as mocks."""
+    return not any("__getattr__" in klass.__dict__ for klass in kind.__mro__)
+
+
+@functools.lru_cache(maxsize=None)
+def _slot_descriptors(kind: type) -> Tuple[Any, ...]:
+    descriptors = []
+    for klass in kind.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            descriptor = klass.__dict__.get(name)
+            if name not in ("__dict__", "__weakref__") and hasattr(descriptor, "__get__"):
+                descriptors.append(descriptor)
+    return tuple(descriptors)
+
+
+def _attributes(obj: Any, kind: type) -> Iterator[Any]:
+    """The instance dict and slot values of ``obj``, read without running its own attribute hooks."""
+    try:
+        yield object.__getattribute__(obj, "__dict__")
+    except (AttributeError, TypeError):
+        pass
+    for descriptor in _slot_descriptors(kind):
+        try:
+            yield descriptor.__get__(obj, kind)
+        except AttributeError:
+            # an unset slot
+            pass
+
+
+@dataclass
+class MemoryReport:
+    sampled_at: datetime
+    components: Dict[str, int]
+    entities: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.components.values()) + sum(self.entities.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "sampled_at": self.sampled_at.isoformat(),
+            "total_bytes": self.total,
+            "components": dict(self.components),
+            "entities": dict(self.entities),
+        }
+
+
+def measure(coordinator, entities: Iterable[Any] = ()) -> MemoryReport:
+    """Sizes the parts of one account; see the module docstring for how sharing is counted."""
+    seen: Set[int] = set()
+    api = coordinator.api
+    # seen holds ids, so every root must stay alive until the sample is done
+    roots = {
+        "snapshot": coordinator.data,
+        "aggregates": coordinator.aggregates,
+        "proration": coordinator.proration,
+        "forecasts": coordinator.forecasts,
+        "invoice_delta": coordinator.invoice_delta,
+        "response_cache": api.cache.entries,
+        "shared_disk_cache": api.shared_cache,
+        "sessions": [api.session, api.auth.session],
+    }
+    components = {name: deep_sizeof(root, seen) for name, root in roots.items()}
+    entity_roots = [(entity.entity_id or entity.unique_id,
+                     [entity.snapshot, entity.state, entity.extra_state_attributes]) for entity in entities]
+    sized = {name: deep_sizeof(root, seen) for name, root in entity_roots}
+    return MemoryReport(sampled_at=datetime.now(), components=components, entities=sized)
+
+
+class MemoryMonitor:
+    """Samples one coordinator's memory and enforces its soft cap (``None`` for no cap)."""
+
+    def __init__(self, hass: HomeAssistant, coordinator, entities: Callable[[], Iterable[Any]],
+                 soft_cap_bytes: Optional[int] = None) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self.soft_cap_bytes = soft_cap_bytes
+        self.report: Optional[MemoryReport] = None
+        self._entities = entities
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    @callback
+    def async_start(self) -> None:
+        if self._unsubscribe is None:
+            self._unsubscribe = async_track_time_interval(self.hass, self._async_scheduled_sample,
+                                                          MEMORY_SAMPLE_INTERVAL)
+
+    @callback
+    def stop(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    async def _async_scheduled_sample(self, now=None) -> None:
+        await self.async_sample()
+
+    async def async_sample(self) -> Optional[MemoryReport]:
+        if self.coordinator.refreshing:
+            return self.report
+        entities = list(self._entities())
+        try:
+            report = await self.hass.async_add_executor_job(measure, self.coordinator, entities)
+        except RuntimeError as e:
+            # a container changed size under the walk; the next sample will do
+            _LOGGER.debug("Skipped Energa24 memory sample of %s: %s", self.coordinator.account_number, e)
+            return self.report
+        self.report = report
+        if self.soft_cap_bytes and report.total > self.soft_cap_bytes:
+            history = report.components["forecasts"]
+            if not history:
+                return report
+            fraction = min(1.0, (report.total - self.soft_cap_bytes) / history)
+            _LOGGER.info("Energa24 account %s holds %d bytes over its %d byte cap, evicting %.0f%% of the history",
+                         self.coordinator.account_number, report.total, self.soft_cap_bytes, 100 * fraction)
+            self.coordinator.request_history_eviction(fraction)
+        return report
+
+    def as_dict(self) -> dict:
+        report = self.report.as_dict() if self.report is not None else None
+        return {
+            "soft_cap_bytes": self.soft_cap_bytes,
+            "evicted_invoices": self.coordinator.evicted_invoices,
+            "report": report,
+        }
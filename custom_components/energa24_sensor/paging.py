@@ -0,0 +1,51 @@
+"""Date windows and pages of the invoices endpoint.
+
+The endpoint answers one date range of at most INVOICES_MAX_DAYS days per
+request, one page at a time, so longer histories are read window by window.
+"""
+from datetime import date, timedelta
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .Energa24Api import INVOICES_MAX_DAYS, Energa24Api
+from .Invoices import Invoices
+
+PAGE_SIZE = 50
+
+Window = Tuple[date, date]
+
+
+def split_windows(start: date, end: date, window_days: int = INVOICES_MAX_DAYS) -> List[Window]:
+    """Splits [start, end] into consecutive, non-overlapping windows of at most ``window_days`` days."""
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=window_days - 1), end)
+        windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def iter_window(api: Energa24Api, account_number: str, client_number: str, window: Window,
+                page_size: int = PAGE_SIZE, before_page: Optional[Callable[[], None]] = None) -> Iterator[Invoices]:
+    """Pages through one window until an empty page, yielding each invoice as it is decoded.
+
+    A short page does not end the window, because the API may cap the page
+    size below the one requested.
+    """
+    previous = None
+    page = 0
+    while True:
+        if before_page is not None:
+            before_page()
+        first = None
+        for invoice in api.iter_invoices(account_number, client_number, from_date=window[0], to_date=window[1],
+                                         page=page, size=page_size):
+            if first is None:
+                first = invoice
+                if first == previous:
+                    # an API ignoring the page number would repeat its page forever
+                    return
+            yield invoice
+        if first is None:
+            return
+        previous = first
+        page += 1
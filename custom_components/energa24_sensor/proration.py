@@ -0,0 +1,246 @@
+"""Spreads invoiced consumption and cost over the days of each billing period.
+
+A period's kWh and gross amount are split across its days (both ends
+included) in proportion to a positive weight profile, flat by default. Amounts
+are additive: overlapping invoices both count, and a corrective invoice carries
+the (possibly negative) difference for its period. An invoice seen again under
+the same number replaces the previous version.
+
+The full rebuild is one pass: each invoice adds its rate ``amount / weight of
+its period`` to a difference array, one running sum turns that into the rate of
+every day, and the rate times the day's weight is the daily value. A single
+upsert or removal recomputes only the days that invoice covers (and covered).
+
+The coordinator keeps one engine per meter and publishes its ``usage`` with
+every refresh, which the daily consumption sensor shows.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .Invoices import Invoices
+from .aggregates import invoice_fingerprint, invoice_key
+
+WeightProfile = Callable[[date], float]
+DayRange = Tuple[date, date]
+
+# Days summed up by ProrationEngine.usage besides the last one
+USAGE_DAYS = 30
+
+
+def flat_profile(day: date) -> float:
+    return 1.0
+
+
+def weekday_profile(weights: Sequence[float]) -> WeightProfile:
+    """Weights for Monday..Sunday, e.g. less use on working days."""
+    if len(weights) != 7:
+        raise ValueError("weekday profile needs 7 weights")
+    return lambda day: weights[day.weekday()]
+
+
+def monthly_profile(weights: Sequence[float]) -> WeightProfile:
+    """Weights for January..December, e.g. heating in winter."""
+    if len(weights) != 12:
+        raise ValueError("monthly profile needs 12 weights")
+    return lambda day: weights[day.month - 1]
+
+
+@dataclass(frozen=True)
+class DailyUsage:
+    """The last prorated day of a meter and the USAGE_DAYS days up to it."""
+    day: date
+    kwh: float
+    cost: float
+    period_kwh: float
+    period_cost: float
+    period_start: date
+
+
+@dataclass(frozen=True)
+class _Period:
+    start: int
+    end: int
+    kwh: float
+    cost: float
+    fingerprint: tuple
+
+
+def _as_day(value) -> date:
+    return value.date() if hasattr(value, "date") else value
+
+
+class ProrationEngine:
+    """Daily kWh and cost series of one meter."""
+
+    def __init__(self, profile: Optional[WeightProfile] = None) -> None:
+        self.profile = profile or flat_profile
+        self._periods: Dict[Hashable, _Period] = {}
+        self._origin: Optional[int] = None
+        self._kwh: List[float] = []
+        self._cost: List[float] = []
+        # total weight of each period, reused by partial recomputes
+        self._period_weight: Dict[Tuple[int, int], float] = {}
+
+    def __len__(self) -> int:
+        return len(self._periods)
+
+    @property
+    def span(self) -> Optional[DayRange]:
+        if self._origin is None:
+            return None
+        return date.fromordinal(self._origin), date.fromordinal(self._origin + len(self._kwh) - 1)
+
+    def sync(self, invoices: Iterable[Invoices]) -> Optional[DayRange]:
+        """Makes ``invoices`` the whole set and returns the range of days that changed."""
+        current = {invoice_key(x): x for x in invoices}
+        changed = None
+        for key in [k for k in self._periods if k not in current]:
+            changed = _union(changed, self.remove(key))
+        for key, invoice in current.items():
+            changed = _union(changed, self.upsert(invoice, key))
+        return changed
+
+    def upsert(self, invoice: Invoices, key: Hashable = None) -> Optional[DayRange]:
+        key = invoice_key(invoice) if key is None else key
+        fingerprint = invoice_fingerprint(invoice)
+        previous = self._periods.get(key)
+        if previous is not None and previous.fingerprint == fingerprint:
+            return None
+        if invoice.start_date is None or invoice.end_date is None:
+            return self.remove(key)
+        start = _as_day(invoice.start_date).toordinal()
+        end = max(start, _as_day(invoice.end_date).toordinal())
+        self._periods[key] = _Period(start, end, invoice.wear_kwh or 0.0, invoice.gross_amount or 0.0, fingerprint)
+        affected = (start, end) if previous is None else (min(start, previous.start), max(end, previous.end))
+        self._recompute(*affected)
+        return date.fromordinal(affected[0]), date.fromordinal(affected[1])
+
+    def remove(self, key: Hashable) -> Optional[DayRange]:
+        previous = self._periods.pop(key, None)
+        if previous is None:
+            return None
+        self._recompute(previous.start, previous.end)
+        return date.fromordinal(previous.start), date.fromordinal(previous.end)
+
+    def rebuild(self) -> None:
+        """Recomputes every day from scratch in one pass."""
+        self._origin = None
+        self._kwh, self._cost = [], []
+        self._period_weight.clear()
+        if self._periods:
+            self._recompute(min(x.start for x in self._periods.values()),
+                            max(x.end for x in self._periods.values()))
+
+    def day(self, day: date) -> Tuple[float, float]:
+        index = self._index(day.toordinal())
+        if index is None:
+            return 0.0, 0.0
+        return self._kwh[index], self._cost[index]
+
+    def daily(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[date, float, float]]:
+        """(day, kWh, cost) for every day in [start, end], by default the whole span."""
+        if self._origin is None:
+            return []
+        first, last = self.span
+        start, end = max(start or first, first), min(end or last, last)
+        offset = start.toordinal() - self._origin
+        return [(start + timedelta(days=i), self._kwh[offset + i], self._cost[offset + i])
+                for i in range((end - start).days + 1)]
+
+    def total(self, start: date, end: date) -> Tuple[float, float]:
+        days = self.daily(start, end)
+        return sum(x[1] for x in days), sum(x[2] for x in days)
+
+    def usage(self, days: int = USAGE_DAYS) -> Optional[DailyUsage]:
+        """The last invoiced day and the ``days`` days up to it, or None before any invoice."""
+        if self._origin is None:
+            return None
+        last = self.span[1]
+        start = last - timedelta(days=days - 1)
+        kwh, cost = self.day(last)
+        period_kwh, period_cost = self.total(start, last)
+        return DailyUsage(day=last, kwh=round(kwh, 3), cost=round(cost, 2), period_kwh=round(period_kwh, 1),
+                          period_cost=round(period_cost, 2), period_start=max(start, self.span[0]))
+
+    def _index(self, ordinal: int) -> Optional[int]:
+        if self._origin is None or not 0 <= ordinal - self._origin < len(self._kwh):
+            return None
+        return ordinal - self._origin
+
+    def _ensure(self, start: int, end: int) -> None:
+        if self._origin is None:
+            self._origin = start
+            self._kwh = [0.0] * (end - start + 1)
+            self._cost = [0.0] * (end - start + 1)
+            return
+        if start < self._origin:
+            pad = self._origin - start
+            self._kwh[:0] = [0.0] * pad
+            self._cost[:0] = [0.0] * pad
+            self._origin = start
+        last = self._origin + len(self._kwh) - 1
+        if end > last:
+            self._kwh.extend([0.0] * (end - last))
+            self._cost.extend([0.0] * (end - last))
+
+    def _weight(self, period: _Period) -> float:
+        key = (period.start, period.end)
+        weight = self._period_weight.get(key)
+        if weight is None:
+            weight = sum(self.profile(date.fromordinal(x)) for x in range(period.start, period.end + 1))
+            self._period_weight[key] = weight
+        return weight
+
+    def _recompute(self, start: int, end: int) -> None:
+        """Rewrites days [start, end] from every period overlapping them."""
+        self._ensure(start, end)
+        size = end - start + 2
+        kwh_rate = [0.0] * size
+        cost_rate = [0.0] * size
+        for period in self._periods.values():
+            if period.end < start or period.start > end:
+                continue
+            weight = self._weight(period)
+            first = max(period.start, start) - start
+            last = min(period.end, end) - start + 1
+            if weight <= 0:
+                raise ValueError("weight profile is zero over {} - {}".format(
+                    date.fromordinal(period.start), date.fromordinal(period.end)))
+            kwh, cost = period.kwh / weight, period.cost / weight
+            kwh_rate[first] += kwh
+            kwh_rate[last] -= kwh
+            cost_rate[first] += cost
+            cost_rate[last] -= cost
+
+        offset = start - self._origin
+        running_kwh = running_cost = 0.0
+        profile = self.profile
+        for i in range(size - 1):
+            running_kwh += kwh_rate[i]
+            running_cost += cost_rate[i]
+            weight = profile(date.fromordinal(start + i))
+            self._kwh[offset + i] = running_kwh * weight
+            self._cost[offset + i] = running_cost * weight
+
+
+class AccountProration:
+    """One ProrationEngine per meter of an account."""
+
+    def __init__(self, profile: Optional[WeightProfile] = None) -> None:
+        self.profile = profile
+        self.meters: Dict[str, ProrationEngine] = {}
+
+    def meter(self, meter_id: str) -> ProrationEngine:
+        engine = self.meters.get(meter_id)
+        if engine is None:
+            engine = self.meters[meter_id] = ProrationEngine(self.profile)
+        return engine
+
+
+def _union(a: Optional[DayRange], b: Optional[DayRange]) -> Optional[DayRange]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a[0], b[0]), max(a[1], b[1])
@@ -0,0 +1,63 @@
+"""Energa24Api clients shared by every set-up of the same login."""
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+
+from homeassistant.core import HomeAssistant
+
+from .Energa24Api import Energa24Api
+from .const import DATA_CLIENTS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Lease:
+    api: Energa24Api
+    users: int = 0
+
+
+class ClientRegistry:
+    """Reference-counted clients keyed by credentials.
+
+    A YAML set-up and a config entry (or a re-added entry) with the same login
+    get the same Energa24Api, and so share its token, cache and revalidation.
+    The client is closed, dropping its connections and cached snapshots, when
+    the last user releases it.
+    """
+
+    def __init__(self, factory: Callable[[str, str], Energa24Api] = Energa24Api) -> None:
+        self._factory = factory
+        self._leases: Dict[Tuple[str, str], _Lease] = {}
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    def acquire(self, username: str, password: str) -> Energa24Api:
+        key = _credentials_key(username, password)
+        lease = self._leases.get(key)
+        if lease is None:
+            lease = self._leases[key] = _Lease(self._factory(username, password))
+        lease.users += 1
+        _LOGGER.debug("Energa24 client for %s has %d users", username, lease.users)
+        return lease.api
+
+    def release(self, api: Energa24Api) -> None:
+        for key, lease in self._leases.items():
+            if lease.api is api:
+                break
+        else:
+            return
+        lease.users -= 1
+        if lease.users <= 0:
+            del self._leases[key]
+            api.close()
+
+
+def get_registry(hass: HomeAssistant) -> ClientRegistry:
+    return hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CLIENTS, ClientRegistry())
+
+
+def _credentials_key(username: str, password: str) -> Tuple[str, str]:
+    # logins are e-mail addresses, which Energa matches case-insensitively
+    return username.strip().lower(), password
@@ -2,28 +2,41 @@
 from __future__ import annotations
 
 import logging
-import string
-from datetime import timedelta
-from typing import Callable, Optional
+from abc import abstractmethod
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components.sensor import SensorEntity, PLATFORM_SCHEMA, SensorStateClass, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_USERNAME, CONF_PASSWORD, UnitOfVolume, UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_USERNAME, CONF_PASSWORD, EVENT_HOMEASSISTANT_STOP, UnitOfVolume, UnitOfEnergy
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.storage import STORAGE_DIR
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .Invoices import InvoicesList, Invoices
+from .Invoices import Invoices
 from .Energa24Api import Energa24Api
+from .PgpList import PpgListElement
 from .PpgReadingForMeter import MeterReading
+from .const import (CONF_MAX_CONCURRENCY, CONF_MEMORY_SOFT_CAP, DATA_COORDINATORS, DATA_MEMORY, DEFAULT_MAX_CONCURRENCY,
+                    DEFAULT_MEMORY_SOFT_CAP, DOMAIN, HISTORY_FILE)
+from .aggregates import AccountTotals
+from .coordinator import Energa24Coordinator, MeterSnapshot
+from .discovery import async_discover_meters, meters_store
+from .forecast import Forecast
+from .memory import MemoryMonitor
+from .proration import DailyUsage
+from .registry import get_registry
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Required(CONF_USERNAME): cv.string,
     vol.Required(CONF_PASSWORD): cv.string,
+    vol.Optional(CONF_MAX_CONCURRENCY, default=DEFAULT_MAX_CONCURRENCY): cv.positive_int,
 })
-SCAN_INTERVAL = timedelta(hours=8)
 
 
 async def async_setup_entry(
@@ -33,24 +46,48 @@ async def async_setup_entry(
 ):
     user = config_entry.data[CONF_USERNAME]
     password = config_entry.data[CONF_PASSWORD]
-    api = Energa24Api(user, password)
+    registry = get_registry(hass)
+    api = registry.acquire(user, password)
+    config_entry.async_on_unload(lambda: registry.release(api))
+    store = meters_store(hass, config_entry.entry_id)
     try:
-        pgps = await hass.async_add_executor_job(api.meterList)
+        pgps = await async_discover_meters(hass, api, store)
     except Exception:
         raise ValueError
 
-    # Extract client/account info from the API response
-    client_id = pgps.client_number
-    account_id = pgps.account_number
-
-    for x in pgps.ppg_list:
-        meter_id = x.ppe_number
-        id_local = int(x.mp_id_dms) if x.mp_id_dms else 0
-        async_add_entities(
-            [Energa24Sensor(hass, api, meter_id, id_local, account_id, client_id),
-             Energa24InvoiceSensor(hass, api, meter_id, id_local, account_id, client_id),
-             Energa24CostTrackingSensor(hass, api, meter_id, id_local, account_id, client_id)],
-            update_before_add=True)
+    max_concurrency = config_entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)
+    history_path = hass.config.path(STORAGE_DIR, HISTORY_FILE.format(account_number=pgps.account_number))
+    coordinator = Energa24Coordinator(hass, api, pgps, max_concurrency, config_entry=config_entry,
+                                      history_path=history_path, meters_store=store)
+    await coordinator.async_config_entry_first_refresh()
+    entities: Dict[str, List[_Energa24Entity]] = {}
+    accounts = account_entities(coordinator)
+    soft_cap = config_entry.options.get(CONF_MEMORY_SOFT_CAP, DEFAULT_MEMORY_SOFT_CAP)
+    monitor = MemoryMonitor(hass, coordinator,
+                            lambda: [*accounts, *(entity for group in entities.values() for entity in group)],
+                            soft_cap * 1024 * 1024 or None)
+    coordinators = hass.data[DOMAIN].setdefault(DATA_COORDINATORS, {})
+    monitors = hass.data[DOMAIN].setdefault(DATA_MEMORY, {})
+    coordinators[config_entry.entry_id] = coordinator
+    monitors[config_entry.entry_id] = monitor
+
+    @callback
+    def forget_entry() -> None:
+        # must return None: HA schedules whatever an unload callback returns
+        coordinators.pop(config_entry.entry_id, None)
+        monitors.pop(config_entry.entry_id, None)
+
+    config_entry.async_on_unload(forget_entry)
+
+    def entities_for(x: PpgListElement) -> list:
+        return meter_entities(coordinator, x.ppe_number, local_id(x))
+
+    async_add_entities(accounts)
+
+    config_entry.async_on_unload(track_meters(hass, coordinator, async_add_entities, entities_for, config_entry,
+                                              entities))
+    monitor.async_start()
+    config_entry.async_on_unload(monitor.stop)
 
 
 async def async_setup_platform(
@@ -59,44 +96,173 @@ async def async_setup_platform(
         async_add_entities: Callable,
         discovery_info: Optional[DiscoveryInfoType] = None,
 ) -> None:
-    api = Energa24Api(config.get(CONF_USERNAME), config.get(CONF_PASSWORD))
+    registry = get_registry(hass)
+    api = registry.acquire(config.get(CONF_USERNAME), config.get(CONF_PASSWORD))
+
+    @callback
+    def release(event: Event) -> None:
+        registry.release(api)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, release)
     try:
-        pgps = await hass.async_add_executor_job(api.meterList)
+        pgps = await async_discover_meters(hass, api)
     except Exception:
         raise ValueError
 
+    coordinator = Energa24Coordinator(hass, api, pgps, config.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY))
+    await coordinator.async_refresh()
+
     # Use data from API for consistency
     client_id = pgps.client_number
     account_id = pgps.account_number
 
-    for x in pgps.ppg_list:
+    def entities_for(x: PpgListElement) -> list:
         meter_id = "{}-{}-{}".format(x.ppe_number, client_id, account_id)
-        id_local = int(x.mp_id_dms) if x.mp_id_dms else 0
-        async_add_entities(
-            [Energa24Sensor(hass, api, meter_id, id_local, account_id, client_id),
-             Energa24InvoiceSensor(hass, api, meter_id, id_local, account_id, client_id),
-             Energa24CostTrackingSensor(hass, api, meter_id, id_local, account_id, client_id)],
-            update_before_add=True)
+        return meter_entities(coordinator, x.ppe_number, local_id(x), meter_id)
+
+    async_add_entities(account_entities(coordinator, "{}-{}".format(client_id, account_id)))
+
+    track_meters(hass, coordinator, async_add_entities, entities_for)
+
+
+def local_id(x: PpgListElement) -> int:
+    return int(x.mp_id_dms) if x.mp_id_dms else 0
+
+
+def track_meters(hass: HomeAssistant, coordinator: Energa24Coordinator, async_add_entities: Callable,
+                 entities_for: Callable[[PpgListElement], list], config_entry: Optional[ConfigEntry] = None,
+                 entities: Optional[Dict[str, List[_Energa24Entity]]] = None) -> Callable[[], None]:
+    """Adds the entities of every current meter and keeps them in step with the PPE list.
+
+    Entities of a new PPE are added as soon as a refresh finds it; those of a
+    removed PPE are removed, together with their registry entries and device.
+    ``entities`` is filled with the current entities by PPE.
+    """
+    entities = {} if entities is None else entities
+    entities.update((x.ppe_number, entities_for(x)) for x in coordinator.meters.values())
+    async_add_entities([entity for group in entities.values() for entity in group])
+
+    @callback
+    def meters_changed(added: List[PpgListElement], removed: List[str]) -> None:
+        new_entities = []
+        for x in added:
+            entities[x.ppe_number] = entities_for(x)
+            new_entities.extend(entities[x.ppe_number])
+        if new_entities:
+            async_add_entities(new_entities)
+        for ppe_number in removed:
+            retire_entities(hass, entities.pop(ppe_number, []), config_entry)
+
+    return coordinator.async_add_meter_listener(meters_changed)
+
+
+@callback
+def retire_entities(hass: HomeAssistant, entities: List[_Energa24Entity],
+                    config_entry: Optional[ConfigEntry] = None) -> None:
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    for entity in entities:
+        if entity.registry_entry is not None:
+            # removing the registry entry also removes the entity from HA
+            entity_registry.async_remove(entity.entity_id)
+        else:
+            hass.async_create_task(entity.async_remove())
+    if config_entry is not None and entities:
+        device = device_registry.async_get_device(identifiers={("energa24_energy_sensor", entities[0].meter_id)})
+        if device is not None:
+            device_registry.async_update_device(device.id, remove_config_entry_id=config_entry.entry_id)
+
+
+def account_entities(coordinator: Energa24Coordinator, account_id: Optional[str] = None) -> list:
+    return [Energa24AccountUnpaidSensor(coordinator, account_id),
+            Energa24AccountConsumptionSensor(coordinator, account_id),
+            Energa24AccountNextDueSensor(coordinator, account_id)]
+
+
+def meter_entities(coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                   meter_id: Optional[str] = None) -> list:
+    return [Energa24Sensor(coordinator, ppe_number, id_local, meter_id),
+            Energa24InvoiceSensor(coordinator, ppe_number, id_local, meter_id),
+            Energa24CostTrackingSensor(coordinator, ppe_number, id_local, meter_id),
+            Energa24ForecastSensor(coordinator, ppe_number, id_local, meter_id),
+            Energa24DailyConsumptionSensor(coordinator, ppe_number, id_local, meter_id)]
+
+
+class _Energa24CachedEntity(CoordinatorEntity[Energa24Coordinator], SensorEntity):
+    """Caches derived state per snapshot and writes it to HA only when it changes."""
+
+    def __init__(self, coordinator: Energa24Coordinator) -> None:
+        super().__init__(coordinator)
+        self.api: Energa24Api = coordinator.api
+        self.account_number = coordinator.account_number
+        self.client_number = coordinator.client_number
+        self._state = None
+        self._cached_state = None
+        self._cached_attributes: Mapping[str, Any] = MappingProxyType({})
+        self._set_snapshot(self._source())
 
+    @property
+    def name(self) -> str:
+        return self.entity_name
 
-class Energa24Sensor(SensorEntity):
-    def __init__(self, hass, api: Energa24Api, meter_id: string,
-                 id_local: int, account_number: str, client_number: str) -> None:
-        self._attr_native_unit_of_measurement = UnitOfVolume.CUBIC_METERS
-        self._attr_device_class = SensorDeviceClass.GAS
-        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._state: MeterReading | None = None
-        self.hass = hass
-        self.api = api
-        self.meter_id = meter_id
-        self.id_local = id_local
-        self.account_number = account_number
-        self.client_number = client_number
-        self.entity_name = "Energa24 Energy Sensor " + meter_id + " " + str(id_local)
+    @property
+    def snapshot(self):
+        """The part of the coordinator data this entity shows, None when there is nothing to show."""
+        return self._state
 
     @property
-    def unique_id(self) -> str | None:
-        return "energa24_sensor" + self.meter_id + "_" + str(self.id_local)
+    def state(self):
+        return self._cached_state
+
+    @property
+    def extra_state_attributes(self):
+        return self._cached_attributes
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # entities of a meter found during a refresh are created before its snapshot exists
+        self._set_snapshot(self._source())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        previous = (self._cached_state, self._cached_attributes, self.available)
+        self._set_snapshot(self._source())
+        if (self._cached_state, self._cached_attributes, self.available) != previous:
+            self.async_write_ha_state()
+
+    @abstractmethod
+    def _source(self):
+        """The coordinator data this entity reads, or None before the first refresh."""
+
+    def _set_snapshot(self, source) -> None:
+        snapshot = self._select(source) if source is not None else None
+        self._state = snapshot
+        self._cached_state, attributes = self._derive(snapshot)
+        if attributes != self._cached_attributes:
+            self._cached_attributes = MappingProxyType(attributes)
+
+    @abstractmethod
+    def _select(self, source):
+        """The part of ``source`` this entity shows."""
+
+    @abstractmethod
+    def _derive(self, snapshot) -> Tuple[Any, dict]:
+        """State and attributes of ``snapshot``, which is None when there is nothing to show."""
+
+
+class _Energa24Entity(_Energa24CachedEntity):
+    """A sensor of one meter.
+
+    ``ppe_number`` selects the meter in the account snapshot, ``meter_id`` is the
+    identifier used in names and unique ids (it differs for YAML set-ups).
+    """
+
+    def __init__(self, coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                 meter_id: Optional[str] = None) -> None:
+        self.ppe_number = ppe_number
+        self.meter_id = meter_id or ppe_number
+        self.id_local = id_local
+        super().__init__(coordinator)
 
     @property
     def device_info(self):
@@ -108,178 +274,231 @@ class Energa24Sensor(SensorEntity):
             "via_device": None,
         }
 
-    @property
-    def name(self) -> str:
-        return self.entity_name
-
-    @property
-    def state(self):
-        if self._state is None:
+    def _source(self) -> MeterSnapshot | None:
+        if self.coordinator.data is None:
             return None
-        return self._state.value
+        return self.coordinator.data.meters.get(self.ppe_number)
 
-    @property
-    def extra_state_attributes(self):
-        attrs = dict()
-        if self._state is not None:
-            attrs["wear"] = self._state.wear
-            attrs["wear_unit_of_measurment"] = UnitOfEnergy.KILO_WATT_HOUR
-        return attrs
-
-    async def async_update(self):
-        latest_meter_reading: MeterReading = await self.hass.async_add_executor_job(self.latestMeterReading)
-        self._state = latest_meter_reading
-
-    def latestMeterReading(self):
-        readings = self.api.readingForMeter(self.meter_id, self.account_number, self.client_number).meter_readings
-        if not readings:
-            return None
-        return max(readings, key=lambda z: z.reading_date_utc)
 
+class _Energa24AccountEntity(_Energa24CachedEntity):
+    """A sensor over every meter of the account, fed from the totals of the snapshot.
 
-class Energa24InvoiceSensor(SensorEntity):
-    def __init__(self, hass, api: Energa24Api, meter_id: str, id_local: int, account_number: str,
-                 client_number: str) -> None:
-        self._attr_native_unit_of_measurement = "PLN"
-        self._attr_device_class = SensorDeviceClass.MONETARY
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-        self._state: InvoicesList | None = None
-        self.hass = hass
-        self.api = api
-        self.meter_id = meter_id
-        self.id_local = id_local
-        self.entity_name = "Energa24 Energy Invoice Sensor " + meter_id + " / " + str(id_local)
-        self.account_number = account_number
-        self.client_number = client_number
+    ``account_id`` is the identifier used in names and unique ids; like the
+    meter_id of meter sensors it differs for YAML set-ups, so they never
+    collide with a config entry of the same account.
+    """
 
-    @property
-    def unique_id(self) -> str | None:
-        return "energa24_invoice_sensor" + self.meter_id + "_" + str(self.id_local)
+    def __init__(self, coordinator: Energa24Coordinator, account_id: Optional[str] = None) -> None:
+        self.account_id = account_id or coordinator.account_number
+        super().__init__(coordinator)
 
     @property
     def device_info(self):
         return {
-            "identifiers": {("energa24_energy_sensor", self.meter_id)},
-            "name": f"Energa24 ENERGY METER ID {self.meter_id}",
+            "identifiers": {("energa24_energy_sensor", "account-" + self.account_id)},
+            "name": f"Energa24 ACCOUNT {self.account_id}",
             "manufacturer": "Energa24",
-            "model": self.meter_id,
+            "model": "Account",
             "via_device": None,
         }
 
-    @property
-    def name(self) -> str:
-        return self.entity_name
-
-    @property
-    def state(self):
-        if self._state is None:
+    def _source(self) -> AccountTotals | None:
+        if self.coordinator.data is None:
             return None
-        return self._state.get("sumOfUnpaidInvoices")
+        return self.coordinator.data.totals
 
-    @property
-    def extra_state_attributes(self):
-        attrs = dict()
-        if self._state is not None:
-            attrs["next_payment_date"] = self._state.get("nextPaymentDate")
-            attrs["next_payment_amount_to_pay"] = self._state.get("nextPaymentAmountToPay")
-            attrs["next_payment_wear"] = self._state.get("nextPaymentWear")
-            attrs["next_payment_wear_KWH"] = self._state.get("nextPaymentWearKWH")
-        return attrs
+    def _select(self, totals: AccountTotals) -> AccountTotals:
+        return totals
 
-    async def async_update(self):
-        self._state = await self.hass.async_add_executor_job(self.invoices_summary)
 
-    def invoices_summary(self):
+class Energa24Sensor(_Energa24Entity):
+    def __init__(self, coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                 meter_id: Optional[str] = None) -> None:
+        self._attr_native_unit_of_measurement = UnitOfVolume.CUBIC_METERS
+        self._attr_device_class = SensorDeviceClass.GAS
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        super().__init__(coordinator, ppe_number, id_local, meter_id)
+        self.entity_name = "Energa24 Energy Sensor " + self.meter_id + " " + str(id_local)
 
-        def upcoming_payment_for_meter(x: Invoices):
-            return self.meter_id == x.id_pp
+    @property
+    def unique_id(self) -> str | None:
+        return "energa24_sensor" + self.meter_id + "_" + str(self.id_local)
 
-        def to_amount_to_pay(x: Invoices):
-            return x.amount_to_pay
+    def _select(self, meter: MeterSnapshot) -> MeterReading | None:
+        return meter.reading
 
-        # Get the list of invoices
-        invoices_response = self.api.invoices(account_number=self.account_number, client_number=self.client_number)
-        invoices_list = invoices_response.invoices_list
+    def _derive(self, snapshot: MeterReading | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.value, {
+            "wear": snapshot.wear,
+            "wear_unit_of_measurment": UnitOfEnergy.KILO_WATT_HOUR,
+        }
 
-        # Use None as default instead of failing InvoicesList instantiation
-        next_payment_item = min(filter(upcoming_payment_for_meter, invoices_list),
-                                key=lambda z: z.date,
-                                default=None)
 
-        sum_of_unpaid_invoices = sum(map(to_amount_to_pay, filter(upcoming_payment_for_meter, invoices_list)))
+class Energa24InvoiceSensor(_Energa24Entity):
+    def __init__(self, coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                 meter_id: Optional[str] = None) -> None:
+        self._attr_native_unit_of_measurement = "PLN"
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        super().__init__(coordinator, ppe_number, id_local, meter_id)
+        self.entity_name = "Energa24 Energy Invoice Sensor " + self.meter_id + " / " + str(id_local)
 
-        # Safe access to attributes if item exists
-        return {
-            "sumOfUnpaidInvoices": sum_of_unpaid_invoices,
-            "nextPaymentDate": next_payment_item.paying_deadline_date if next_payment_item else None,
-            "nextPaymentWear": next_payment_item.wear if next_payment_item else None,
-            "nextPaymentWearKWH": next_payment_item.wear_kwh if next_payment_item else None,
-            "nextPaymentAmountToPay": next_payment_item.amount_to_pay if next_payment_item else None
+    @property
+    def unique_id(self) -> str | None:
+        return "energa24_invoice_sensor" + self.meter_id + "_" + str(self.id_local)
+
+    def _select(self, meter: MeterSnapshot) -> dict | None:
+        return meter.summary
+
+    def _derive(self, snapshot: dict | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.get("sumOfUnpaidInvoices"), {
+            "next_payment_date": snapshot.get("nextPaymentDate"),
+            "next_payment_amount_to_pay": snapshot.get("nextPaymentAmountToPay"),
+            "next_payment_wear": snapshot.get("nextPaymentWear"),
+            "next_payment_wear_KWH": snapshot.get("nextPaymentWearKWH"),
         }
 
 
-class Energa24CostTrackingSensor(SensorEntity):
-    def __init__(self, hass, api: Energa24Api, meter_id: string,
-                 id_local: int, account_number: str, client_number: str) -> None:
+class Energa24CostTrackingSensor(_Energa24Entity):
+    def __init__(self, coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                 meter_id: Optional[str] = None) -> None:
         self._attr_native_unit_of_measurement = "PLN"
         self._attr_device_class = SensorDeviceClass.MONETARY
         self._attr_state_class = SensorStateClass.MEASUREMENT
-        self._state: InvoicesList | None = None
-        self.hass = hass
-        self.api = api
-        self.meter_id = meter_id
-        self.id_local = id_local
-        self.entity_name = "Energa24 Energy Cost Tracking Sensor " + meter_id + " / " + str(id_local)
-        self.account_number = account_number
-        self.client_number = client_number
+        super().__init__(coordinator, ppe_number, id_local, meter_id)
+        self.entity_name = "Energa24 Energy Cost Tracking Sensor " + self.meter_id + " / " + str(id_local)
 
     @property
     def unique_id(self) -> str | None:
         return "energa24_cost_tracking_sensor" + self.meter_id + "_" + str(self.id_local)
 
+    def _select(self, meter: MeterSnapshot) -> Invoices | None:
+        return meter.latest_priced
+
+    def _derive(self, snapshot: Invoices | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.gross_amount, {
+            "last_invoice_date": snapshot.paying_deadline_date,
+            "last_invoice_gross_amount": snapshot.gross_amount,
+            "last_invoice_wear": snapshot.wear,
+            "last_invoice_wear_KWH": snapshot.wear_kwh,
+        }
+
+
+class Energa24ForecastSensor(_Energa24Entity):
+    def __init__(self, coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                 meter_id: Optional[str] = None) -> None:
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        super().__init__(coordinator, ppe_number, id_local, meter_id)
+        self.entity_name = "Energa24 Energy Forecast Sensor " + self.meter_id + " / " + str(id_local)
+
     @property
-    def device_info(self):
-        return {
-            "identifiers": {("energa24_energy_sensor", self.meter_id)},
-            "name": f"Energa24 ENERGY METER ID {self.meter_id}",
-            "manufacturer": "Energa24",
-            "model": self.meter_id,
-            "via_device": None,
+    def unique_id(self) -> str | None:
+        return "energa24_forecast_sensor" + self.meter_id + "_" + str(self.id_local)
+
+    def _select(self, meter: MeterSnapshot) -> Forecast | None:
+        return meter.forecast
+
+    def _derive(self, snapshot: Forecast | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.kwh, {
+            "forecast_gross_amount": snapshot.gross_amount,
+            "forecast_period_start": snapshot.period_start,
+            "forecast_period_end": snapshot.period_end,
+            "mape_kwh": snapshot.mape_kwh,
+            "mape_gross_amount": snapshot.mape_gross_amount,
+            "invoices_learned": snapshot.samples,
         }
 
+
+class Energa24DailyConsumptionSensor(_Energa24Entity):
+    def __init__(self, coordinator: Energa24Coordinator, ppe_number: str, id_local: int,
+                 meter_id: Optional[str] = None) -> None:
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        super().__init__(coordinator, ppe_number, id_local, meter_id)
+        self.entity_name = "Energa24 Daily Consumption Sensor " + self.meter_id + " / " + str(id_local)
+
     @property
-    def name(self) -> str:
-        return self.entity_name
+    def unique_id(self) -> str | None:
+        return "energa24_daily_consumption_sensor" + self.meter_id + "_" + str(self.id_local)
+
+    def _select(self, meter: MeterSnapshot) -> DailyUsage | None:
+        return meter.usage
+
+    def _derive(self, snapshot: DailyUsage | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.kwh, {
+            "day": snapshot.day,
+            "daily_cost": snapshot.cost,
+            "period_start": snapshot.period_start,
+            "period_kwh": snapshot.period_kwh,
+            "period_cost": snapshot.period_cost,
+        }
+
+
+class Energa24AccountUnpaidSensor(_Energa24AccountEntity):
+    def __init__(self, coordinator: Energa24Coordinator, account_id: Optional[str] = None) -> None:
+        self._attr_native_unit_of_measurement = "PLN"
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_state_class = SensorStateClass.TOTAL
+        super().__init__(coordinator, account_id)
+        self.entity_name = "Energa24 Account Unpaid Sensor " + self.account_id
 
     @property
-    def state(self):
-        return 1234
+    def unique_id(self) -> str | None:
+        return "energa24_account_unpaid_sensor" + self.account_id
+
+    def _derive(self, snapshot: AccountTotals | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.unpaid_total, {
+            "unpaid_invoices": snapshot.unpaid_invoices,
+        }
+
+
+class Energa24AccountConsumptionSensor(_Energa24AccountEntity):
+    def __init__(self, coordinator: Energa24Coordinator, account_id: Optional[str] = None) -> None:
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        super().__init__(coordinator, account_id)
+        self.entity_name = "Energa24 Account Last Period Consumption Sensor " + self.account_id
 
     @property
-    def extra_state_attributes(self):
-        attrs = dict()
-        if self._state is not None:
-            attrs["last_invoice_date"] = self._state.paying_deadline_date
-            attrs["last_invoice_gross_amount"] = self._state.gross_amount
-            attrs["last_invoice_wear"] = self._state.wear
-            attrs["last_invoice_wear_KWH"] = self._state.wear_kwh
-        return attrs
-
-    async def async_update(self):
-        self._state = await self.hass.async_add_executor_job(self.latest_price)
-
-    def latest_price(self):
-        meter_id = self.meter_id
-
-        def upcoming_payment_for_meter(x: InvoicesList):
-            return str(meter_id) == x.id_pp \
-                and x.wear is not None \
-                and x.wear != 0 \
-                and x.gross_amount is not None \
-                and x.gross_amount != 0
-
-        invoices_response = self.api.invoices(account_number=self.account_number, client_number=self.client_number)
-
-        return max(filter(upcoming_payment_for_meter, invoices_response.invoices_list),
-                   key=lambda z: z.date,
-                   default=None)
+    def unique_id(self) -> str | None:
+        return "energa24_account_consumption_sensor" + self.account_id
+
+    def _derive(self, snapshot: AccountTotals | None):
+        if snapshot is None:
+            return None, {}
+        return snapshot.last_period_kwh, {
+            "period_start": snapshot.last_period_start,
+            "period_end": snapshot.last_period_end,
+        }
+
+
+class Energa24AccountNextDueSensor(_Energa24AccountEntity):
+    def __init__(self, coordinator: Energa24Coordinator, account_id: Optional[str] = None) -> None:
+        self._attr_device_class = SensorDeviceClass.DATE
+        super().__init__(coordinator, account_id)
+        self.entity_name = "Energa24 Account Next Due Date Sensor " + self.account_id
+
+    @property
+    def unique_id(self) -> str | None:
+        return "energa24_account_next_due_sensor" + self.account_id
+
+    def _derive(self, snapshot: AccountTotals | None):
+        if snapshot is None or snapshot.next_due_date is None:
+            return None, {}
+        return snapshot.next_due_date.date().isoformat(), {
+            "amount_to_pay": snapshot.next_due_amount,
+            "ppe_numbers": list(snapshot.next_due_ppes),
+        }
@@ -0,0 +1,142 @@
+"""Services of the Energa24 integration."""
+import cProfile
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Optional
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import CONF_ENTRY_ID, DATA_COORDINATORS, DOMAIN, PROFILE_DIR, SERVICE_PROFILE_REFRESH
+from .coordinator import Energa24Coordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_TRACE_MEMORY = "trace_memory"
+ATTR_TOP = "top"
+ATTR_OUTPUT_DIR = "output_dir"
+
+PROFILE_REFRESH_SCHEMA = vol.Schema({
+    vol.Optional(CONF_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_TRACE_MEMORY, default=False): cv.boolean,
+    vol.Optional(ATTR_TOP, default=20): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+    vol.Optional(ATTR_OUTPUT_DIR): cv.string,
+})
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    async def profile_refresh(call: ServiceCall) -> ServiceResponse:
+        coordinator = _coordinator(hass, call.data.get(CONF_ENTRY_ID))
+        output_dir = call.data.get(ATTR_OUTPUT_DIR)
+        if output_dir is not None and not hass.config.is_allowed_path(output_dir):
+            raise ServiceValidationError("{} is not an allowed external directory".format(output_dir))
+        return await async_profile_refresh(hass, coordinator, call.data[ATTR_TRACE_MEMORY], call.data[ATTR_TOP],
+                                           output_dir)
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE_REFRESH, profile_refresh,
+                                 schema=PROFILE_REFRESH_SCHEMA, supports_response=SupportsResponse.ONLY)
+
+
+def _coordinator(hass: HomeAssistant, entry_id: Optional[str]) -> Energa24Coordinator:
+    coordinators = hass.data.get(DOMAIN, {}).get(DATA_COORDINATORS, {})
+    if entry_id is None and len(coordinators) == 1:
+        return next(iter(coordinators.values()))
+    if entry_id is None:
+        raise ServiceValidationError("entry_id is required when {} Energa24 entries are loaded".format(
+            len(coordinators)))
+    if entry_id not in coordinators:
+        raise ServiceValidationError("No loaded Energa24 entry {}".format(entry_id))
+    return coordinators[entry_id]
+
+
+async def async_profile_refresh(hass: HomeAssistant, coordinator: Energa24Coordinator,
+                                trace_memory: bool = False, top: int = 20,
+                                output_dir: Optional[str] = None) -> dict:
+    """Runs one full refresh under cProfile and writes the results to ``output_dir``.
+
+    The refresh fetches past the client cache, which other entries of the same
+    login share, and holds the refresh lock so it never overlaps a scheduled one.
+    cProfile only sees the thread it runs on, so the refresh is split in two
+    profiled parts: the fetch and per-meter work as one executor job, and the
+    entity updates on the event loop. Profilers exist only for this call.
+    Results go to ``.storage/energa24_profiles`` unless ``output_dir`` is given.
+    """
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        async with coordinator.refresh_lock:
+            await coordinator.async_prepare_refresh()
+            fetch_profile = cProfile.Profile()
+            started = time.perf_counter()
+            result = await hass.async_add_executor_job(_profiled, fetch_profile, coordinator.refresh_blocking)
+            fetch_seconds = time.perf_counter() - started
+            snapshot = await coordinator.async_finish_refresh(result)
+
+            update_profile = cProfile.Profile()
+            started = time.perf_counter()
+            _profiled(update_profile, coordinator.async_set_updated_data, snapshot)
+            update_seconds = time.perf_counter() - started
+
+        memory = tracemalloc.take_snapshot() if trace_memory else None
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    base = os.path.join(output_dir or hass.config.path(STORAGE_DIR, PROFILE_DIR), "energa24_profile_{}_{}".format(
+        coordinator.account_number, datetime.now().strftime("%Y%m%d%H%M%S")))
+    summary = await hass.async_add_executor_job(
+        _write_results, base, fetch_profile, update_profile, memory, top)
+    summary.update({
+        "account_number": coordinator.account_number,
+        "meters": len(coordinator.meter_ids),
+        "fetch_seconds": round(fetch_seconds, 3),
+        "entity_update_seconds": round(update_seconds, 3),
+    })
+    if peak is not None:
+        summary["traced_peak_bytes"] = peak
+    _LOGGER.info("Profiled Energa24 refresh of %s: %s", coordinator.account_number, summary)
+    return summary
+
+
+def _profiled(profile: cProfile.Profile, target, *args):
+    profile.enable()
+    try:
+        return target(*args)
+    finally:
+        profile.disable()
+
+
+def _write_results(base: str, fetch_profile: cProfile.Profile, update_profile: cProfile.Profile,
+                   memory: Optional[tracemalloc.Snapshot], top: int) -> dict:
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    stats = pstats.Stats(fetch_profile)
+    stats.add(update_profile)
+    stats.dump_stats(base + ".pstats")
+    summary = {"pstats": base + ".pstats", "top_cumulative": _top_functions(stats, top)}
+
+    if memory is not None:
+        allocations = memory.statistics("lineno")[:top]
+        with open(base + "_allocations.txt", "w", encoding="utf-8") as f:
+            for stat in allocations:
+                f.write("{}\n".format(stat))
+        summary["allocations"] = base + "_allocations.txt"
+        summary["top_allocations"] = [str(x) for x in allocations[:5]]
+    return summary
+
+
+def _top_functions(stats: pstats.Stats, top: int) -> list:
+    rows = []
+    for (filename, line, name), (_, calls, _, cumulative, _) in stats.stats.items():
+        rows.append((cumulative, calls, "{}:{}({})".format(filename, line, name)))
+    rows.sort(reverse=True)
+    return [{"function": function, "calls": calls, "cumulative_seconds": round(cumulative, 4)}
+            for cumulative, calls, function in rows[:top]]
@@ -0,0 +1,148 @@
+"""On-disk cache of tokens and parsed responses shared between processes.
+
+Each entry is one pickle file named after a hash of (namespace, endpoint, key),
+replaced atomically with ``os.replace`` so readers never see a partial write.
+A reader takes no lock. A process that finds an entry missing or expired takes
+an exclusive ``fcntl`` lock on the entry's lock file, reads the entry again,
+and fetches only if no other process refreshed it in the meantime. One process
+therefore logs in or fetches while the others wait for its result and read it.
+
+Entries hold access tokens, so the directory is created private to the user
+and every entry is written readable by the user only. Only point it at a
+directory no other user can write to, because the entries are unpickled.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Callable, Hashable, Mapping, Optional
+
+from .cache import Aged
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# Opts Energa24Api into the shared cache when no directory is passed explicitly
+CACHE_DIR_ENV = "ENERGA24_CACHE_DIR"
+FORMAT_VERSION = 1
+ENTRY_MODE = 0o600
+
+
+class SharedDiskCache:
+    """Entries of one login (``namespace``) with a TTL per endpoint.
+
+    Endpoints without a TTL bypass the cache. Ages use the wall clock, because
+    monotonic clocks are not comparable between processes.
+    """
+
+    def __init__(self, directory: str, namespace: str, ttls: Mapping[str, float],
+                 clock: Callable[[], float] = time.time) -> None:
+        self.directory = directory
+        self.ttls = dict(ttls)
+        self._namespace = namespace
+        self._clock = clock
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def get(self, endpoint: str, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        return self.get_aged(endpoint, key, fetch).value
+
+    def get_aged(self, endpoint: str, key: Hashable, fetch: Callable[[], Any]) -> Aged:
+        """Like ``get``, with the age of the value so an in-memory cache can expire it in step."""
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return Aged(fetch(), 0.0)
+        path = self._path(endpoint, key)
+        found = self._read(path, ttl)
+        if found is not None:
+            return found
+        with _EntryLock(path + ".lock"):
+            found = self._read(path, ttl)
+            if found is not None:
+                return found
+            value = fetch()
+            self._write(path, value)
+            return Aged(value, 0.0)
+
+    def invalidate(self, endpoint: str, key: Hashable) -> None:
+        try:
+            os.remove(self._path(endpoint, key))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, endpoint: str, key: Hashable) -> str:
+        digest = hashlib.sha256(repr((self._namespace, endpoint, key)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "{}-{}.entry".format(endpoint, digest[:32]))
+
+    def _read(self, path: str, ttl: float) -> Optional[Aged]:
+        try:
+            with open(path, "rb") as f:
+                version, fetched_at, value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # written by another version or damaged: refetch and overwrite it
+            _LOGGER.debug("Ignoring unreadable shared cache entry %s: %s", path, e)
+            return None
+        age = self._clock() - fetched_at
+        if version != FORMAT_VERSION or not 0 <= age < ttl:
+            return None
+        return Aged(value, age)
+
+    def _write(self, path: str, value: Any) -> None:
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                # mkstemp does this on POSIX already; kept explicit since entries hold bearer tokens
+                os.chmod(tmp_path, ENTRY_MODE)
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump((FORMAT_VERSION, self._clock(), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except (OSError, pickle.PicklingError) as e:
+            # the value is still returned; other processes fetch it themselves
+            _LOGGER.warning("Could not write shared cache entry %s: %s", path, e)
+
+
+class _EntryLock:
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "_EntryLock":
+        if fcntl is not None:
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, ENTRY_MODE)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def shared_cache_for(username: str, password: str, ttls: Mapping[str, float],
+                     directory: Optional[str] = None) -> Optional[SharedDiskCache]:
+    """The shared cache of a login in ``directory`` (or $ENERGA24_CACHE_DIR); None when neither is set."""
+    directory = directory or os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    return SharedDiskCache(directory, credentials_namespace(username, password), ttls)
+
+
+def credentials_namespace(username: str, password: str) -> str:
+    """Keys entries on the same credentials as the client registry.
+
+    A login with a wrong password therefore never reads the token of the right
+    one. Only a hash is kept, so the password is not recoverable from it.
+    """
+    credentials = "{}\0{}".format(username.strip().lower(), password)
+    return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
@@ -0,0 +1,185 @@
+"""Incremental JSON decoding of Energa24 responses.
+
+The response body is consumed chunk by chunk and only the array element that is
+currently being decoded is held as a dict, so peak memory is bounded by one
+record instead of the whole payload.
+"""
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Sequence, Union
+
+from .Invoices import Invoices
+from .PgpList import PpgList, PpgListElement, from_str
+
+CHUNK_SIZE = 64 * 1024
+DASHBOARD_PROFILE_PATH = ("clients", 0, "invoiceProfile", 0)
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_START = "-0123456789"
+_COMPACT_THRESHOLD = 256 * 1024
+
+
+class JsonStream:
+    """Pull parser over an iterable of byte (or text) chunks."""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        if self._pos > _COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def peek(self) -> str:
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError("Expected {!r} at offset {}, found {!r}".format(char, self._pos, found))
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next complete JSON value."""
+        first = self.peek()
+        if not first:
+            raise ValueError("Unexpected end of JSON stream")
+        while True:
+            try:
+                value, end = self._raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number running up to the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and first in _NUMBER_START and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def skip(self) -> None:
+        self.value()
+
+    def iter_array(self) -> Iterator[None]:
+        """Steps through an array; the caller consumes one element per iteration."""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            separator = self.peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError("Expected ',' or ']' in array, found {!r}".format(separator))
+
+    def iter_object(self) -> Iterator[str]:
+        """Yields object keys; the caller consumes the value of each key."""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError("Expected object key at offset {}".format(self._pos))
+            key = self.value()
+            self._expect(":")
+            yield key
+            separator = self.peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Expected ',' or '}}' in object, found {!r}".format(separator))
+
+    def items(self) -> Iterator[Any]:
+        """Yields the decoded elements of an array one at a time."""
+        for _ in self.iter_array():
+            yield self.value()
+
+    def descend(self, path: Sequence[Union[str, int]]) -> None:
+        """Advances the stream to the value at ``path``, skipping everything before it."""
+        for step in path:
+            if isinstance(step, int):
+                elements = self.iter_array()
+                for index, _ in enumerate(elements):
+                    if index == step:
+                        break
+                    self.skip()
+                else:
+                    raise KeyError(step)
+            else:
+                for key in self.iter_object():
+                    if key == step:
+                        break
+                    self.skip()
+                else:
+                    raise KeyError(step)
+
+
+def iter_invoices(chunks: Iterable[Union[bytes, str]]) -> Iterator[Invoices]:
+    """Yields invoices from an invoices response body as each element completes.
+
+    A body that is not a JSON array, such as an error object, raises ValueError
+    rather than reading as an account without invoices.
+    """
+    stream = JsonStream(chunks)
+    if stream.peek() != "[":
+        raise ValueError("Invoices response is not a JSON array")
+    for item in stream.items():
+        yield Invoices.from_dict(item)
+
+
+def iter_ppg_list_elements(chunks: Iterable[Union[bytes, str]]) -> Iterator[PpgListElement]:
+    """Yields the PPEs of the first invoice profile of a dashboard response."""
+    for key, value in _iter_profile(JsonStream(chunks)):
+        if key == "ppes":
+            yield from value
+
+
+def ppg_list_from_stream(chunks: Iterable[Union[bytes, str]]) -> PpgList:
+    ppg_list = []
+    fields = {}
+    for key, value in _iter_profile(JsonStream(chunks)):
+        if key == "ppes":
+            ppg_list.extend(value)
+        else:
+            fields[key] = value
+    return PpgList(ppg_list, from_str(fields.get("accountNumber")), from_str(fields.get("clientNumber")))
+
+
+def _iter_profile(stream: JsonStream) -> Iterator:
+    stream.descend(DASHBOARD_PROFILE_PATH)
+    for key in stream.iter_object():
+        if key == "ppes" and stream.peek() == "[":
+            yield key, (PpgListElement.from_dict(item) for item in stream.items())
+        elif key in ("accountNumber", "clientNumber"):
+            yield key, stream.value()
+        else:
+            stream.skip()
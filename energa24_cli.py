@@ -0,0 +1,106 @@
+"""Command line tools: python energa24_cli.py export ...
+
+The integration's package __init__ imports Home Assistant, so the package is
+registered here without running it. Only modules that do not need Home
+Assistant are imported.
+"""
+import argparse
+import logging
+import os
+import sys
+import types
+from datetime import date
+
+PACKAGE = "custom_components.energa24_sensor"
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), *PACKAGE.split("."))
+
+if PACKAGE not in sys.modules:
+    _package = types.ModuleType(PACKAGE)
+    _package.__path__ = [PACKAGE_DIR]
+    sys.modules[PACKAGE] = _package
+
+from custom_components.energa24_sensor.Energa24Api import Energa24Api  # noqa: E402
+from custom_components.energa24_sensor.backfill import InvoiceBackfill  # noqa: E402
+from custom_components.energa24_sensor.export import (  # noqa: E402
+    EXPORT_FORMATS,
+    CsvWriter,
+    JsonlWriter,
+    export_invoices,
+    invoice_record,
+    read_credentials,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="energa24_cli.py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Export invoice history of many accounts")
+    export.add_argument("credentials", help="CSV file with 'username' and 'password' columns")
+    export.add_argument("-o", "--output", default="-", help="Output file, '-' for stdout")
+    export.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="jsonl")
+    export.add_argument("-w", "--workers", type=int, default=4, help="Accounts fetched concurrently")
+    export.add_argument("--since", type=date.fromisoformat, help="First day, YYYY-MM-DD (default: ten years ago)")
+
+    backfill = subparsers.add_parser("backfill", help="Fetch invoice history older than 180 days")
+    backfill.add_argument("credentials", help="CSV file with 'username' and 'password' columns")
+    backfill.add_argument("--since", type=date.fromisoformat, required=True, help="First day, YYYY-MM-DD")
+    backfill.add_argument("--checkpoint-dir", default=".", help="Where per-account progress is kept")
+    backfill.add_argument("-o", "--output", default="-", help="Output file, '-' for stdout")
+    backfill.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="jsonl")
+    backfill.add_argument("-w", "--workers", type=int, default=4, help="Windows fetched concurrently")
+    backfill.add_argument("--rate", type=float, default=2.0, help="Requests per second per account")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.command == "backfill":
+        return run_backfill(args)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        with open(args.credentials, newline="", encoding="utf-8") as credentials:
+            writer = JsonlWriter(output) if args.format == "jsonl" else CsvWriter(output)
+            stats = export_invoices(read_credentials(credentials), writer, workers=args.workers, since=args.since)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(stats.summary(), file=sys.stderr)
+    return 1 if stats.failed_accounts else 0
+
+
+def run_backfill(args) -> int:
+    failed = 0
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = JsonlWriter(output) if args.format == "jsonl" else CsvWriter(output)
+        with open(args.credentials, newline="", encoding="utf-8") as credentials:
+            for username, password in read_credentials(credentials):
+                api = Energa24Api(username, password)
+                try:
+                    pgps = api.meterList()
+                    checkpoint = os.path.join(args.checkpoint_dir, "energa24_backfill_{}.jsonl".format(
+                        pgps.account_number))
+                    invoices = InvoiceBackfill(api, pgps.account_number, pgps.client_number, checkpoint,
+                                               max_workers=args.workers,
+                                               requests_per_second=args.rate).run(args.since)
+                except Exception as e:
+                    failed += 1
+                    logging.getLogger(__name__).error("Backfill failed for %s: %s", username, e)
+                    continue
+                finally:
+                    api.close()
+                account = {"username": username, "client_number": pgps.client_number,
+                           "account_number": pgps.account_number}
+                for invoice in invoices.invoices_list:
+                    writer.write(invoice_record(account, invoice))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,28 @@
 """Global fixtures for energa24_sensor integration."""
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-throughput", action="store_true", default=False,
+                     help="run the tests marked throughput, which fail on slow machines")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-throughput"):
+        return
+    skip = pytest.mark.skip(reason="throughput thresholds run with --run-throughput")
+    for item in items:
+        if "throughput" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def isolated_config_dir(request, tmp_path):
+    """Gives every test instance its own config directory.
+
+    History files and profiles are written under it, and would otherwise pile up
+    in the testing_config shared by every test run.
+    """
+    if "hass" in request.fixturenames:
+        request.getfixturevalue("hass").config.config_dir = str(tmp_path)
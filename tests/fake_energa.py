@@ -0,0 +1,159 @@
+"""Local stand-in for the Energa24 login, dashboard and invoices endpoints."""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import jwt
+
+from custom_components.energa24_sensor import EnergaAuth as energa_auth
+from custom_components.energa24_sensor import Energa24Api as energa_api
+
+from .payloads import invoice_item
+
+_USERNAME = re.compile(r"user-(\d+)")
+_TOKEN_KEY = "fake-energa-signing-key-0123456789abcdef"
+_INVOICES_PATH = re.compile(r"/api/clients/(\d+)/accounts/(\d+)/invoices")
+
+
+class FakeEnergaServer:
+    """Serves ``accounts`` accounts with ``ppes`` PPEs each on 127.0.0.1.
+
+    Every request sleeps ``latency`` seconds and fails with HTTP 503 with
+    probability ``error_rate``. Usernames are ``user-<account index>``.
+    Use as a context manager; ``patch`` points the integration at the server.
+    """
+
+    def __init__(self, accounts: int, ppes: int, latency: float = 0.0, error_rate: float = 0.0,
+                 invoices_per_ppe: int = 3, seed: int = 0) -> None:
+        self.accounts = accounts
+        self.ppes = ppes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.invoices_per_ppe = invoices_per_ppe
+        self.requests = Counter()
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.base_url = "http://127.0.0.1:{}".format(self._server.server_address[1])
+
+    def __enter__(self) -> "FakeEnergaServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def patch(self, monkeypatch) -> None:
+        monkeypatch.setattr(energa_auth, "AUTH_URL", self.base_url + "/auth")
+        monkeypatch.setattr(energa_auth, "TOKEN_URL", self.base_url + "/token")
+        monkeypatch.setattr(energa_auth, "BASE_URL", self.base_url)
+        monkeypatch.setattr(energa_auth, "REDIRECT_URI", self.base_url + "/ss/")
+        monkeypatch.setattr(energa_api, "DEVICES_LIST_URL", self.base_url + "/api/dashboard")
+        monkeypatch.setattr(energa_api, "INVOICES_URL", self.base_url + energa_api.INVOICES_URL[len("https://24.energa.pl"):])
+
+    def dashboard(self, account: int) -> dict:
+        return {"clients": [{"clientNumber": str(account), "invoiceProfile": [{
+            "accountNumber": str(account),
+            "clientNumber": str(account),
+            "ppes": [{"ppeNumber": self.ppe_number(account, i), "collectionPointCard": "",
+                      "mpIdDMS": str(i)} for i in range(self.ppes)],
+        }]}]}
+
+    def invoices(self, account: int) -> list:
+        rng = random.Random(account)
+        return [invoice_item(i, self.ppe_number(account, i % self.ppes), rng)
+                for i in range(self.ppes * self.invoices_per_ppe)]
+
+    @staticmethod
+    def ppe_number(account: int, index: int) -> str:
+        return "PL{:05d}{:05d}".format(account, index)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+
+def _handler(server: FakeEnergaServer):
+    class Handler(BaseHTTPRequestHandler):
+        # one request per connection, so no handler thread outlives the server
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            self._handle("GET")
+
+        def do_POST(self) -> None:
+            self._handle("POST")
+
+        def _handle(self, method: str) -> None:
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with server._lock:
+                server.requests[url.path if not url.path.endswith("/invoices") else "/invoices"] += 1
+            if server.latency:
+                time.sleep(server.latency)
+            if server._should_fail():
+                with server._lock:
+                    server.errors += 1
+                return self._send(503, b"unavailable", "text/plain")
+
+            if url.path == "/auth":
+                page = '<a id="oid-button" href="/broker?session=1">Log in</a>'
+                return self._send(200, page.encode(), "text/html")
+            if url.path == "/broker":
+                page = '<form action="{}/login" method="post"></form>'.format(server.base_url)
+                return self._send(200, page.encode(), "text/html")
+            if url.path == "/login" and method == "POST":
+                username = parse_qs(body.decode())["username"][0]
+                self.send_response(302)
+                self.send_header("Location", "{}/ss/#code={}".format(server.base_url, username))
+                self.send_header("Content-Length", "0")
+                return self.end_headers()
+            if url.path == "/ss/":
+                return self._send(200, b"", "text/html")
+            if url.path == "/token" and method == "POST":
+                username = parse_qs(body.decode())["code"][0]
+                token = jwt.encode({"sub": username, "email": username + "@example.com"}, _TOKEN_KEY)
+                return self._json({"access_token": token, "token_type": "Bearer"})
+
+            account = self._account()
+            if url.path == "/api/dashboard":
+                return self._json(server.dashboard(account))
+            if _INVOICES_PATH.match(url.path):
+                query = parse_qs(url.query)
+                page, size = int(query["page"][0]), int(query["size"][0])
+                return self._json(server.invoices(account)[page * size:(page + 1) * size])
+            self._send(404, b"not found", "text/plain")
+
+        def _account(self) -> int:
+            token = self.headers.get("Authorization", "").split(" ")[-1]
+            claims = jwt.decode(token, options={"verify_signature": False})
+            return int(_USERNAME.match(claims["sub"]).group(1))
+
+        def _json(self, payload) -> None:
+            self._send(200, json.dumps(payload).encode(), "application/json")
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
@@ -0,0 +1,218 @@
+"""Synthetic Energa24 API payloads and model objects for tests and benchmarks."""
+
+import dataclasses
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+
+from custom_components.energa24_sensor.Invoices import Invoices
+from custom_components.energa24_sensor.PgpList import PpgList, PpgListElement
+
+
+def invoice_item(index: int, ppe_number: str = "PL0000000001", rng: random.Random = None) -> dict:
+    rng = rng or random.Random(index)
+    start = date(2020, 1, 1) + timedelta(days=61 * index)
+    end = start + timedelta(days=60)
+    amount = round(rng.uniform(50, 900), 2)
+    paid = rng.random() < 0.7
+    return {
+        "invoiceNumber": "FV/{:08d}".format(index),
+        "issueDate": (end + timedelta(days=3)).isoformat(),
+        "paymentDate": (end + timedelta(days=17)).isoformat(),
+        "invoiceAmount": amount,
+        "payment": amount if paid else 0,
+        "status": "PAID" if paid else "UNPAID",
+        "documentType": "INVOICE",
+        "ppes": [{
+            "ppeNumber": ppe_number,
+            "startDate": start.isoformat(),
+            "endDate": end.isoformat(),
+            "consumption": rng.randint(100, 900),
+        }],
+    }
+
+
+def invoices_payload(count: int, ppes: int = 1) -> list:
+    rng = random.Random(count)
+    return [invoice_item(i, "PL{:010d}".format(i % ppes), rng) for i in range(count)]
+
+
+def dashboard_payload(ppes: int) -> dict:
+    return {
+        "clients": [{
+            "clientNumber": "1000",
+            "invoiceProfile": [{
+                "accountNumber": "2000",
+                "clientNumber": "1000",
+                "ppes": [{
+                    "ppeNumber": "PL{:010d}".format(i),
+                    "collectionPointCard": "card {}".format(i),
+                    "mpIdDMS": str(i),
+                } for i in range(ppes)],
+            }],
+        }],
+    }
+
+
+def as_chunks(payload, chunk_size: int = 64 * 1024):
+    """Serializes ``payload`` and yields it in byte chunks like requests.iter_content."""
+    body = json.dumps(payload).encode("utf-8")
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+ODD_DATES = [
+    ("2023-12-31", datetime(2023, 12, 31)),
+    ("2023-12-31T10:15:00", datetime(2023, 12, 31, 10, 15)),
+    ("2023-12-31T10:15:00.000Z", datetime(2023, 12, 31, 10, 15, tzinfo=timezone.utc)),
+    ("2023-12-31T10:15:00+01:00", datetime(2023, 12, 31, 10, 15, tzinfo=timezone(timedelta(hours=1)))),
+    ("2023-12-31 10:15", datetime(2023, 12, 31, 10, 15)),
+    ("31.12.2023", datetime(2023, 12, 31)),
+    ("05.01.2024", datetime(2024, 1, 5)),
+    ("01/02/2024", datetime(2024, 1, 2)),
+]
+
+ODD_AMOUNTS = [
+    (123.45, 123.45),
+    ("123.45", 123.45),
+    ("123,45", 123.45),
+    (100, 100.0),
+    (None, 0.0),
+    ("", 0.0),
+]
+
+
+def odd_invoice_item(index: int, rng: random.Random) -> tuple:
+    """Returns an invoice item with missing fields and odd formats plus the Invoices
+    attribute values it must decode to."""
+    item = invoice_item(index, rng=rng)
+    expected = {"number": item["invoiceNumber"], "status": item["status"], "is_paid": item["status"] == "PAID"}
+
+    issue_raw, issue = rng.choice(ODD_DATES)
+    item["issueDate"] = issue_raw
+    expected["date"] = issue
+    payment_raw, payment = rng.choice(ODD_DATES)
+    item["paymentDate"] = payment_raw
+    expected["paying_deadline_date"] = payment
+
+    amount_raw, amount = rng.choice(ODD_AMOUNTS)
+    item["invoiceAmount"] = amount_raw
+    item["payment"] = 0
+    expected["gross_amount"] = amount
+    expected["amount_to_pay"] = amount
+
+    shape = rng.choice(["full", "no_ppes", "empty_ppes", "bare_ppe", "no_status"])
+    ppe = item["ppes"][0]
+    if shape == "no_ppes":
+        del item["ppes"]
+    elif shape == "empty_ppes":
+        item["ppes"] = []
+    elif shape == "bare_ppe":
+        item["ppes"] = [{"ppeNumber": ppe["ppeNumber"]}]
+    elif shape == "no_status":
+        del item["status"]
+        expected["status"] = ""
+        expected["is_paid"] = False
+
+    if shape in ("full", "no_status"):
+        expected.update(start_date=datetime.fromisoformat(ppe["startDate"]),
+                        end_date=datetime.fromisoformat(ppe["endDate"]),
+                        wear=float(ppe["consumption"]), wear_kwh=float(ppe["consumption"]),
+                        id_pp=ppe["ppeNumber"])
+    else:
+        expected.update(start_date=issue, end_date=issue, wear=0.0, wear_kwh=0.0,
+                        id_pp=ppe["ppeNumber"] if shape == "bare_ppe" else "")
+    expected["sell_date"] = expected["end_date"]
+    return item, expected
+
+
+def meter_readings_payload(count: int) -> dict:
+    rng = random.Random(count)
+    start = datetime(2021, 1, 1, 6, 0)
+    return {
+        "MeterReadings": [{
+            "Status": "ACCEPTED",
+            "ReadingDateLocal": (start + timedelta(days=30 * i)).isoformat(),
+            "ReadingDateUtc": (start + timedelta(days=30 * i, hours=-1)).isoformat() + "Z",
+            "PpId": str(1000 + i % 7),
+            "Value": 1000 + 37 * i,
+            "Value2": None,
+            "Value3": None,
+            "MeterNumber": "M{}".format(i % 7),
+            "RegionCode": "PL",
+            "Wear": rng.randint(10, 90),
+            "Type": "READING",
+            "Color": "black",
+        } for i in range(count)],
+        "Code": 0,
+        "Message": None,
+        "DisplayToEndUser": False,
+        "EndUserMessage": None,
+        "TokenExpireDate": "2030-01-01T00:00:00",
+        "TokenExpireDateUtc": "2030-01-01T00:00:00Z",
+    }
+
+
+def any_ppg_list(ppe_numbers) -> PpgList:
+    return PpgList([PpgListElement(ppe, "", str(i)) for i, ppe in enumerate(ppe_numbers)], "account", "client")
+
+
+def any_invoice(number: str = "FV/1", ppe: str = "1", amount: float = 100, issued: datetime = datetime(2022, 6, 6),
+                **changes) -> Invoices:
+    """An unpaid two-month invoice of ``ppe`` issued when its period ends; ``changes`` replace any field."""
+    invoice = Invoices(number=number,
+                       date=issued,
+                       sell_date=issued,
+                       gross_amount=amount,
+                       amount_to_pay=amount,
+                       wear=1,
+                       wear_kwh=1,
+                       paying_deadline_date=issued + timedelta(days=14),
+                       start_date=issued - timedelta(days=61),
+                       end_date=issued,
+                       is_paid=False,
+                       id_pp=ppe,
+                       type="INVOICE",
+                       status="UNPAID")
+    return dataclasses.replace(invoice, **changes)
+
+
+def random_invoice(rng: random.Random, number: str, ppe: str = "1") -> Invoices:
+    date = datetime(2020, 1, 1) + timedelta(days=rng.randint(0, 1500))
+    gross_amount = rng.choice([0, round(rng.uniform(10, 500), 2)])
+    return Invoices(number=number,
+                    date=date,
+                    sell_date=date,
+                    gross_amount=gross_amount,
+                    amount_to_pay=round(rng.uniform(0, gross_amount), 2),
+                    wear=rng.choice([0, None, rng.randint(1, 500)]),
+                    wear_kwh=rng.randint(1, 500),
+                    paying_deadline_date=date + timedelta(days=14),
+                    start_date=date - timedelta(days=60),
+                    end_date=date,
+                    is_paid=False,
+                    id_pp=ppe,
+                    type="INVOICE",
+                    status="UNPAID")
+
+
+def bimonthly_invoices(count, daily_kwh):
+    invoices = []
+    start = datetime(2023, 1, 1)
+    for i in range(count):
+        end = start + timedelta(days=60)
+        kwh = daily_kwh(i, (start + timedelta(days=30)).month) * 60
+        invoices.append(Invoices(number="FV/{}".format(i), date=end, sell_date=end, gross_amount=kwh,
+                                 amount_to_pay=kwh, wear=kwh, wear_kwh=kwh, paying_deadline_date=end,
+                                 start_date=start, end_date=end, is_paid=False, id_pp="1", type="INVOICE",
+                                 status="UNPAID"))
+        start = end
+    return invoices
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
@@ -0,0 +1,97 @@
+"""Energa24 aggregates test pack."""
+
+import dataclasses
+import random
+
+from custom_components.energa24_sensor.aggregates import AccountAggregates, MeterAggregates, account_totals, is_priced
+
+from .payloads import random_invoice
+
+
+def test_aggregates_match_full_scan():
+    """Energa24 aggregates test - incremental values equal a full recomputation."""
+    rng = random.Random(7)
+    aggregates = MeterAggregates("1")
+    current = {}
+    for _ in range(500):
+        action = rng.random()
+        if action < 0.5 or not current:
+            invoice = random_invoice(rng, "FV/{}".format(rng.randint(0, 60)))
+            current[invoice.number] = invoice
+            aggregates.upsert(invoice)
+        elif action < 0.8:
+            number = rng.choice(list(current))
+            invoice = dataclasses.replace(current[number], amount_to_pay=0, is_paid=True, status="PAID")
+            current[number] = invoice
+            aggregates.upsert(invoice)
+        else:
+            number = rng.choice(list(current))
+            del current[number]
+            aggregates.remove(number)
+
+        invoices = list(current.values())
+        assert aggregates.unpaid_total == round(sum(x.amount_to_pay for x in invoices), 2)
+        assert aggregates.next_payment == min(invoices, key=lambda z: z.date, default=None)
+        latest = max(filter(is_priced, invoices), key=lambda z: z.date, default=None)
+        assert (aggregates.latest_priced and aggregates.latest_priced.date) == (latest and latest.date)
+
+
+def test_sync_reports_changes_only():
+    """Energa24 aggregates test - syncing an unchanged snapshot is a no-op."""
+    rng = random.Random(1)
+    invoices = [random_invoice(rng, "FV/{}".format(i), ppe) for i, ppe in enumerate(["1", "2", "1"])]
+    aggregates = AccountAggregates()
+
+    assert aggregates.sync(invoices)
+    assert not aggregates.sync(list(invoices))
+    assert len(aggregates.meter("1")) == 2
+
+    assert aggregates.sync(invoices[1:])
+    assert len(aggregates.meter("1")) == 1
+
+
+def test_account_totals_match_full_scan():
+    """Energa24 aggregates test - account totals equal sums over the listed meters only."""
+    rng = random.Random(3)
+    invoices = [random_invoice(rng, "FV/{}".format(i), rng.choice(["1", "2", "3"])) for i in range(40)]
+    aggregates = AccountAggregates()
+    aggregates.sync(invoices)
+
+    totals = account_totals(aggregates, ["1", "2"], invoices)
+
+    listed = [x for x in invoices if x.id_pp in ("1", "2")]
+    unpaid = [x for x in listed if x.amount_to_pay > 0]
+    latest = [max(filter(is_priced, [x for x in listed if x.id_pp == ppe]), key=lambda z: z.date, default=None)
+              for ppe in ("1", "2")]
+    due = min(x.paying_deadline_date for x in unpaid)
+    assert totals.unpaid_total == round(sum(x.amount_to_pay for x in listed), 2)
+    assert totals.unpaid_invoices == len(unpaid)
+    assert totals.last_period_kwh == sum(x.wear_kwh for x in latest if x is not None)
+    assert totals.next_due_date == due
+    assert totals.next_due_amount == round(sum(x.amount_to_pay for x in unpaid if x.paying_deadline_date == due), 2)
+
+
+def test_paid_invoice_with_amount_to_pay_is_not_unpaid():
+    """Energa24 aggregates test - the unpaid total and count agree on a paid invoice that still shows an amount."""
+    rng = random.Random(4)
+    unpaid = dataclasses.replace(random_invoice(rng, "FV/1"), gross_amount=30, amount_to_pay=30)
+    paid = dataclasses.replace(random_invoice(rng, "FV/2"), gross_amount=20, amount_to_pay=20, is_paid=True,
+                               status="PAID")
+    aggregates = AccountAggregates()
+    aggregates.sync([unpaid, paid])
+
+    totals = account_totals(aggregates, ["1"], [unpaid, paid])
+
+    assert aggregates.meter("1").unpaid_total == 30
+    assert totals.unpaid_total == 30
+    assert totals.unpaid_invoices == 1
+
+
+def test_account_totals_of_empty_account():
+    """Energa24 aggregates test - no invoices give no period and no due date."""
+    totals = account_totals(AccountAggregates(), ["1"], [])
+
+    assert totals.unpaid_total == 0
+    assert totals.last_period_kwh is None
+    assert totals.next_due_date is None
+    assert totals.next_due_ppes == ()
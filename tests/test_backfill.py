@@ -0,0 +1,112 @@
+"""Energa24 backfill test pack."""
+
+import json
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from custom_components.energa24_sensor.backfill import BackfillIncomplete, InvoiceBackfill, split_windows
+
+from .payloads import any_invoice
+
+
+def test_windows_cover_the_range_without_overlap():
+    """Energa24 backfill test - windows stay within the API limit."""
+    windows = split_windows(date(2019, 1, 1), date(2021, 12, 31), 180)
+
+    assert windows[0][0] == date(2019, 1, 1)
+    assert windows[-1][1] == date(2021, 12, 31)
+    assert all((end - start).days < 180 for start, end in windows)
+    assert all(b[0] - a[1] == timedelta(days=1) for a, b in zip(windows, windows[1:]))
+
+
+def test_backfill_pages_merges_and_deduplicates(tmp_path):
+    """Energa24 backfill test - every window is paged and duplicates are merged."""
+    history = [any_invoice("FV/{}".format(i), issued=datetime(2019, 1, 1) + timedelta(days=20 * i)) for i in range(60)]
+    api = fake_api(history)
+
+    invoices = InvoiceBackfill(api, "acc", "cli", str(tmp_path / "checkpoint.jsonl"), page_size=3,
+                               requests_per_second=0).run(date(2019, 1, 1), date(2022, 6, 1))
+
+    assert [x.number for x in invoices.invoices_list] == [x.number for x in history]
+
+
+def test_capped_page_size_does_not_truncate_windows():
+    """Energa24 backfill test - pages shorter than requested do not end a window."""
+    history = [any_invoice("FV/{}".format(i), issued=datetime(2019, 1, 1) + timedelta(days=2 * i)) for i in range(60)]
+    api = fake_api(history, max_page=10)
+
+    invoices = InvoiceBackfill(api, "acc", "cli", page_size=50, requests_per_second=0).run(
+        date(2019, 1, 1), date(2019, 12, 31))
+
+    assert len(invoices.invoices_list) == 60
+
+
+def test_invoices_without_numbers_are_kept_apart():
+    """Energa24 backfill test - invoices with an empty number are merged only with themselves."""
+    history = [any_invoice("", issued=datetime(2019, 1, 1) + timedelta(days=20 * i)) for i in range(5)]
+    api = fake_api(history)
+
+    invoices = InvoiceBackfill(api, "acc", "cli", requests_per_second=0).run(date(2019, 1, 1), date(2019, 12, 31))
+
+    assert len(invoices.invoices_list) == 5
+
+
+def test_checkpoint_is_appended_per_window(tmp_path):
+    """Energa24 backfill test - a window line cut short by an interruption is fetched again."""
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    history = [any_invoice("FV/{}".format(i), issued=datetime(2019, 1, 1) + timedelta(days=20 * i)) for i in range(60)]
+    InvoiceBackfill(fake_api(history), "acc", "cli", str(checkpoint), requests_per_second=0).run(
+        date(2019, 1, 1), date(2022, 6, 1))
+    lines = checkpoint.read_text(encoding="utf-8").splitlines(keepends=True)
+    windows = len(split_windows(date(2019, 1, 1), date(2022, 6, 1)))
+    assert len(lines) == 1 + windows
+
+    checkpoint.write_text("".join(lines[:-1]) + lines[-1][:20], encoding="utf-8")
+    api = fake_api(history)
+    invoices = InvoiceBackfill(api, "acc", "cli", str(checkpoint), requests_per_second=0).run(
+        date(2019, 1, 1), date(2022, 6, 1))
+
+    assert len(invoices.invoices_list) == 60
+    assert len({c.kwargs["from_date"] for c in api.iter_invoices.call_args_list}) == 1
+    assert len(checkpoint.read_text(encoding="utf-8").splitlines()) == 1 + windows
+
+
+@pytest.mark.parametrize("error", [requests.HTTPError("503 Server Error"),
+                                   ValueError("Invoices response is not a JSON array")])
+def test_interrupted_backfill_resumes_from_checkpoint(tmp_path, error):
+    """Energa24 backfill test - failed windows are not checkpointed and a rerun only fetches those."""
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    history = [any_invoice("FV/{}".format(i), issued=datetime(2019, 1, 1) + timedelta(days=20 * i)) for i in range(60)]
+    api = fake_api(history, fail_from=date(2020, 6, 1), error=error)
+
+    with pytest.raises(BackfillIncomplete):
+        InvoiceBackfill(api, "acc", "cli", checkpoint, max_workers=1,
+                        requests_per_second=0).run(date(2019, 1, 1), date(2022, 6, 1))
+    with open(checkpoint, encoding="utf-8") as f:
+        finished = [json.loads(line)["window"] for line in f.readlines()[1:]]
+    assert finished and all(window < "2020-06-01" for window in finished)
+
+    api = fake_api(history)
+    invoices = InvoiceBackfill(api, "acc", "cli", checkpoint, requests_per_second=0).run(
+        date(2019, 1, 1), date(2022, 6, 1))
+
+    assert len(invoices.invoices_list) == 60
+    assert api.iter_invoices.call_count > 0
+    assert all(c.kwargs["from_date"] >= date(2020, 5, 1) for c in api.iter_invoices.call_args_list)
+
+
+def fake_api(history, fail_from=None, max_page=None, error=None):
+    def iter_invoices(account_number, client_number, from_date, to_date, page, size):
+        if fail_from and from_date >= fail_from:
+            raise error or requests.ConnectionError("Connection reset")
+        size = min(size, max_page or size)
+        # windows overlap by one invoice to exercise deduplication
+        found = [x for x in history if from_date - timedelta(days=20) <= x.date.date() <= to_date]
+        return iter(found[page * size:(page + 1) * size])
+
+    api = MagicMock()
+    api.iter_invoices = MagicMock(side_effect=iter_invoices)
+    return api
@@ -0,0 +1,130 @@
+"""Energa24 stale-while-revalidate cache test pack."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+from custom_components.energa24_sensor.cache import SwrCache
+
+from .payloads import FakeClock
+
+
+def test_fresh_value_is_served_from_cache():
+    """Energa24 cache test - no upstream call within the TTL."""
+    clock = FakeClock()
+    cache = SwrCache({"invoices": 60}, clock=clock)
+    fetch = MagicMock(return_value="v1")
+
+    assert cache.get("invoices", "a", fetch) == "v1"
+    clock.now = 59
+    assert cache.get("invoices", "a", fetch) == "v1"
+    assert fetch.call_count == 1
+
+
+def test_stale_value_is_returned_while_one_revalidation_runs():
+    """Energa24 cache test - stale reads do not wait and trigger a single background fetch."""
+    clock = FakeClock()
+    cache = SwrCache({"invoices": 60}, clock=clock)
+    release = threading.Event()
+    revalidated = threading.Event()
+    cache.add_listener(lambda endpoint, key, error: revalidated.set())
+    values = iter(["v1", "v2"])
+
+    def fetch():
+        value = next(values)
+        if value == "v2":
+            release.wait(5)
+        return value
+
+    assert cache.get("invoices", "a", fetch) == "v1"
+    clock.now = 90
+    started = time.perf_counter()
+    assert [cache.get("invoices", "a", fetch) for _ in range(10)] == ["v1"] * 10
+    assert time.perf_counter() - started < 1
+
+    release.set()
+    assert revalidated.wait(5)
+    assert cache.get("invoices", "a", fetch) == "v2"
+
+
+def test_value_past_max_stale_is_fetched_synchronously():
+    """Energa24 cache test - expired tokens are never served."""
+    clock = FakeClock()
+    cache = SwrCache({"token": 60}, {"token": 10}, clock=clock)
+    fetch = MagicMock(side_effect=["t1", "t2"])
+
+    assert cache.get("token", None, fetch) == "t1"
+    clock.now = 100
+    assert cache.get("token", None, fetch) == "t2"
+
+
+def test_endpoint_without_ttl_is_not_cached():
+    """Energa24 cache test - no TTL means every call goes upstream."""
+    cache = SwrCache({})
+    fetch = MagicMock(return_value="v")
+
+    cache.get("dashboard", None, fetch)
+    cache.get("dashboard", None, fetch)
+    assert fetch.call_count == 2
+
+
+def test_failed_revalidation_is_reported_and_bounded():
+    """Energa24 cache test - listeners get the error, and a value stale for another TTL is not served."""
+    clock = FakeClock()
+    cache = SwrCache({"invoices": 60}, clock=clock)
+    errors = []
+    reported = threading.Event()
+    cache.add_listener(lambda endpoint, key, error: (errors.append(error), reported.set()))
+    cache.get("invoices", "a", lambda: "v1")
+
+    def failing_fetch():
+        raise OSError("down")
+
+    clock.now = 61
+    assert cache.get("invoices", "a", failing_fetch) == "v1"
+    assert reported.wait(5)
+    assert isinstance(errors[0], OSError)
+
+    clock.now = 121
+    assert cache.get("invoices", "a", lambda: "v2") == "v2"
+
+
+def test_close_discards_revalidation_in_flight():
+    """Energa24 cache test - a revalidation finishing after close neither stores nor notifies."""
+    clock = FakeClock()
+    cache = SwrCache({"invoices": 60}, clock=clock)
+    listener = MagicMock()
+    cache.add_listener(listener)
+    cache.get("invoices", "a", lambda: "v1")
+    release = threading.Event()
+
+    def slow_fetch():
+        release.wait(5)
+        return "v2"
+
+    clock.now = 61
+    assert cache.get("invoices", "a", slow_fetch) == "v1"
+    cache.close()
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name.startswith("energa24-revalidate"):
+            thread.join(5)
+
+    assert cache.peek("invoices", "a") is None
+    listener.assert_not_called()
+    cache.get("invoices", "a", slow_fetch)
+    assert not any(x.name.startswith("energa24-revalidate") for x in threading.enumerate())
+
+
+def test_value_put_with_age_expires_on_schedule():
+    """Energa24 cache test - a primed value counts as fetched ``age`` seconds ago."""
+    clock = FakeClock()
+    clock.now = 1000
+    cache = SwrCache({"dashboard": 60}, {"dashboard": 0}, clock=clock)
+    fetch = MagicMock(return_value="fresh")
+
+    cache.put("dashboard", None, "stored", age=30)
+    assert cache.get("dashboard", None, fetch) == "stored"
+    clock.now = 1031
+    assert cache.get("dashboard", None, fetch) == "fresh"
+    assert fetch.call_count == 1
@@ -0,0 +1,211 @@
+"""Energa24 coordinator test pack."""
+
+import asyncio
+import dataclasses
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.energa24_sensor.Invoices import InvoicesList
+from custom_components.energa24_sensor.cache import SwrCache
+from custom_components.energa24_sensor.const import EVENT_INVOICE_ADDED, EVENT_INVOICE_CHANGED
+from custom_components.energa24_sensor.coordinator import Energa24Coordinator
+from custom_components.energa24_sensor.forecast import KEPT_INVOICES
+from custom_components.energa24_sensor.history import write_history
+
+from .payloads import any_invoice, any_ppg_list
+
+
+@pytest.mark.asyncio
+async def test_meters_share_one_invoices_fetch(hass: HomeAssistant):
+    """Energa24 coordinator test - one invoices call per refresh, whatever the meter count."""
+    energa24_api = MagicMock()
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([any_invoice("FV/1", "1", 10), any_invoice("FV/2", "2", 20)]))
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1", "2", "3"]))
+
+    await coordinator.async_refresh()
+
+    assert energa24_api.invoices.call_count == 1
+    assert coordinator.data.meters["1"].summary["sumOfUnpaidInvoices"] == 10
+    assert coordinator.data.meters["2"].latest_priced.gross_amount == 20
+    assert coordinator.data.meters["3"].latest_priced is None
+    assert coordinator.data.meters["2"].forecast.gross_amount == 20
+
+
+@pytest.mark.asyncio
+async def test_meters_refresh_concurrently(hass: HomeAssistant):
+    """Energa24 coordinator test - refresh time does not add up per meter."""
+    energa24_api = MagicMock()
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([]))
+
+    def slow_reading(*args, **kwargs):
+        time.sleep(0.2)
+        return MagicMock(meter_readings=[])
+
+    energa24_api.readingForMeter = MagicMock(side_effect=slow_reading)
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list([str(i) for i in range(8)]),
+                                      max_concurrency=8)
+
+    started = time.perf_counter()
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert len(coordinator.data.meters) == 8
+    assert time.perf_counter() - started < 8 * 0.2 / 2
+
+
+@pytest.mark.asyncio
+async def test_new_and_changed_invoices_fire_events(hass: HomeAssistant):
+    """Energa24 coordinator test - events carry only the invoice delta."""
+    energa24_api = MagicMock()
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([any_invoice("FV/1", "1", 10)]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1", "2"]))
+    added, changed = [], []
+    hass.bus.async_listen(EVENT_INVOICE_ADDED, added.append)
+    hass.bus.async_listen(EVENT_INVOICE_CHANGED, changed.append)
+
+    await coordinator.async_refresh()
+    energa24_api.invoices.return_value = InvoicesList([any_invoice("FV/1", "1", 0), any_invoice("FV/2", "2", 20)])
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert [x.data["invoice"]["number"] for x in added] == ["FV/2"]
+    assert len(changed) == 1
+    assert changed[0].data["invoice_number"] == "FV/1"
+    assert changed[0].data["changes"] == {"gross_amount": {"old": 10, "new": 0},
+                                          "amount_to_pay": {"old": 10, "new": 0}}
+
+
+@pytest.mark.asyncio
+async def test_added_and_removed_meters_are_reported(hass: HomeAssistant):
+    """Energa24 coordinator test - a changed PPE list reaches the meter listeners, other meters keep their state."""
+    energa24_api = MagicMock()
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([any_invoice("FV/1", "1", 10), any_invoice("FV/3", "3", 30)]))
+    energa24_api.meterList = MagicMock(return_value=any_ppg_list(["1", "2"]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1", "2"]))
+    changes = []
+    coordinator.async_add_meter_listener(lambda added, removed: changes.append(
+        ([x.ppe_number for x in added], removed)))
+
+    await coordinator.async_refresh()
+    aggregates = coordinator.aggregates.meter("1")
+    energa24_api.meterList.return_value = any_ppg_list(["1", "3"])
+    await coordinator.async_refresh()
+
+    assert changes == [(["3"], ["2"])]
+    assert coordinator.meter_ids == ["1", "3"]
+    assert set(coordinator.data.meters) == {"1", "3"}
+    assert coordinator.data.meters["3"].summary["sumOfUnpaidInvoices"] == 30
+    assert coordinator.aggregates.meter("1") is aggregates
+    assert "2" not in coordinator.aggregates.meters
+
+
+@pytest.mark.asyncio
+async def test_empty_meter_list_keeps_meters(hass: HomeAssistant):
+    """Energa24 coordinator test - an empty dashboard does not retire every meter."""
+    energa24_api = MagicMock()
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([]))
+    energa24_api.meterList = MagicMock(return_value=any_ppg_list([]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1", "2"]))
+
+    await coordinator.async_refresh()
+
+    assert coordinator.meter_ids == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_every_fetched_meter_list_is_stored(hass: HomeAssistant):
+    """Energa24 coordinator test - a refetched PPE list is saved even when no meter changed."""
+    energa24_api = MagicMock()
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([]))
+    pgps = any_ppg_list(["1"])
+    energa24_api.meterList = MagicMock(return_value=pgps)
+    store = MagicMock()
+    coordinator = Energa24Coordinator(hass, energa24_api, pgps, meters_store=store)
+
+    await coordinator.async_refresh()
+    store.async_delay_save.assert_not_called()
+
+    energa24_api.meterList.return_value = any_ppg_list(["1"])
+    await coordinator.async_refresh()
+    store.async_delay_save.assert_called_once()
+    assert store.async_delay_save.call_args[0][0]()["ppes"][0]["ppeNumber"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_refresh_waits_for_the_refresh_lock(hass: HomeAssistant):
+    """Energa24 coordinator test - a scheduled refresh does not start while another holds the lock."""
+    energa24_api = MagicMock()
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([any_invoice("FV/1", "1", 10)]))
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1"]))
+
+    async with coordinator.refresh_lock:
+        refresh = hass.async_create_task(coordinator.async_refresh())
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert coordinator.refreshing
+        energa24_api.meterList.assert_not_called()
+    await refresh
+
+    energa24_api.invoices.assert_called_once()
+    assert not coordinator.refreshing
+
+
+@pytest.mark.asyncio
+async def test_failed_revalidation_is_kept_for_diagnostics(hass: HomeAssistant):
+    """Energa24 coordinator test - a background revalidation error reaches the coordinator, a success clears it."""
+    now = [0.0]
+    energa24_api = MagicMock()
+    energa24_api.cache = SwrCache({"invoices": 60}, clock=lambda: now[0])
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1"]))
+    key = (coordinator.account_number, coordinator.client_number)
+    energa24_api.cache.get("invoices", key, lambda: InvoicesList([]))
+
+    def failing_fetch():
+        raise OSError("down")
+
+    now[0] = 61
+    await hass.async_add_executor_job(energa24_api.cache.get, "invoices", key, failing_fetch)
+    await hass.async_add_executor_job(_join_revalidations)
+    await hass.async_block_till_done()
+    assert isinstance(coordinator.revalidation_error, OSError)
+
+    await hass.async_add_executor_job(energa24_api.cache.get, "invoices", key, lambda: InvoicesList([]))
+    await hass.async_add_executor_job(_join_revalidations)
+    await hass.async_block_till_done()
+    assert coordinator.revalidation_error is None
+
+
+def _join_revalidations():
+    for thread in threading.enumerate():
+        if thread.name.startswith("energa24-revalidate"):
+            thread.join(5)
+
+
+@pytest.mark.asyncio
+async def test_forecasts_are_seeded_from_the_recent_history(hass: HomeAssistant, tmp_path):
+    """Energa24 coordinator test - seeding decodes only the trailing invoices the forecasts keep."""
+    path = str(tmp_path / "history.bin")
+    months = [datetime(2000 + i // 12, 1 + i % 12, 1) for i in range(3 * KEPT_INVOICES + 1)]
+    write_history(path, [dataclasses.replace(any_invoice("FV/1", "1", 10), number="FV/{}".format(i), date=end, start_date=start,
+                                             end_date=end) for i, (start, end) in enumerate(zip(months, months[1:]))], [])
+    energa24_api = MagicMock()
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([]))
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1"]), history_path=path)
+
+    await coordinator.async_refresh()
+
+    forecast = coordinator.forecasts.meter("1")
+    assert len(forecast) == KEPT_INVOICES
+    assert min(x.start_date for x in forecast._invoices.values()) == months[2 * KEPT_INVOICES]
@@ -0,0 +1,88 @@
+"""Energa24 decoder test pack."""
+
+import json
+import random
+import time
+
+import pytest
+
+from custom_components.energa24_sensor import decoders
+from custom_components.energa24_sensor.Invoices import invoices_from_dict
+from custom_components.energa24_sensor.PgpList import ppg_list_from_dict
+from custom_components.energa24_sensor.PpgReadingForMeter import ppg_reading_for_meter_from_dict
+from custom_components.energa24_sensor.streaming import iter_invoices
+
+from .payloads import as_chunks, dashboard_payload, invoices_payload, meter_readings_payload, odd_invoice_item
+
+
+@pytest.fixture(params=["typed", "fallback"])
+def decoder(request, monkeypatch):
+    if request.param == "typed":
+        if not decoders.TYPED_DECODER:
+            pytest.skip("msgspec is not installed")
+    else:
+        monkeypatch.setattr(decoders, "_invoices_decoder", None)
+        monkeypatch.setattr(decoders, "_dashboard_decoder", None)
+        monkeypatch.setattr(decoders, "_meter_readings_decoder", None)
+    return decoders
+
+
+def test_invoices_match_from_dict(decoder):
+    """Energa24 decoder test - bytes decode to the same invoices as from_dict."""
+    payload = invoices_payload(2000, ppes=10)
+    rng = random.Random(35)
+    payload += [odd_invoice_item(i, rng)[0] for i in range(500)]
+
+    assert decoder.decode_invoices(json.dumps(payload).encode()) == invoices_from_dict(payload).invoices_list
+
+
+def test_invoices_error_body_is_empty(decoder):
+    """Energa24 decoder test - error objects and malformed PPE lists."""
+    with pytest.raises(ValueError):
+        decoder.decode_invoices(b'{"error": "unauthorized"}')
+    item = invoices_payload(1)[0]
+    item["ppes"] = ["PL0000000001"]
+    assert decoder.decode_invoices(json.dumps([item]).encode())[0].id_pp == ""
+
+
+def test_dashboard_matches_from_dict(decoder):
+    """Energa24 decoder test - dashboard PPE list."""
+    payload = dashboard_payload(500)
+    payload["clients"][0]["invoiceProfile"][0]["ppes"][0]["mpIdDMS"] = 1234
+
+    assert decoder.decode_dashboard(json.dumps(payload).encode()) == \
+        ppg_list_from_dict(payload["clients"][0]["invoiceProfile"][0])
+
+
+def test_meter_readings_match_from_dict(decoder):
+    """Energa24 decoder test - meter readings."""
+    payload = meter_readings_payload(1000)
+    del payload["MeterReadings"][0]["PpId"]
+
+    assert decoder.decode_meter_readings(json.dumps(payload).encode()) == \
+        ppg_reading_for_meter_from_dict(payload).meter_readings
+    assert decoder.decode_meter_readings(b'{"Code": 0}') == []
+
+
+def best_rate(decode, count: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        decode()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+
+def test_decoder_benchmark():
+    """Energa24 decoder benchmark - typed decoding against json.loads + from_dict and streaming."""
+    payload = invoices_payload(20000, ppes=20)
+    body = json.dumps(payload).encode()
+
+    current = best_rate(lambda: invoices_from_dict(json.loads(body)), len(payload))
+    streamed = best_rate(lambda: list(iter_invoices(as_chunks(payload))), len(payload))
+    decoded = best_rate(lambda: decoders.decode_invoices(body), len(payload))
+    rates = "invoices/s: json+from_dict {:.0f}, streaming {:.0f}, decoders ({}) {:.0f}".format(
+        current, streamed, "msgspec" if decoders.TYPED_DECODER else "fallback", decoded)
+
+    if decoders.TYPED_DECODER:
+        assert decoded > current, rates
@@ -0,0 +1,51 @@
+"""Energa24 delta test pack."""
+
+import dataclasses
+from datetime import datetime
+
+from custom_components.energa24_sensor.Invoices import Invoices
+from custom_components.energa24_sensor.delta import InvoiceDeltaTracker, event_value
+
+from .payloads import any_invoice
+
+
+def test_first_snapshot_is_baseline():
+    """Energa24 delta test - the first snapshot reports nothing."""
+    tracker = InvoiceDeltaTracker()
+
+    assert tracker.update([any_invoice("FV/1")]) is None
+    assert not tracker.update([any_invoice("FV/1")])
+
+
+def test_reports_added_and_changed_fields_only():
+    """Energa24 delta test - only new invoices and the fields that changed are reported."""
+    tracker = InvoiceDeltaTracker()
+    first, second = any_invoice("FV/1"), any_invoice("FV/2")
+    tracker.update([first, second])
+
+    paid = dataclasses.replace(first, amount_to_pay=0, is_paid=True, status="PAID")
+    third = any_invoice("FV/3")
+    delta = tracker.update(invoice for invoice in [paid, third])
+
+    assert delta.added == [third]
+    assert delta.changed == [(paid, {"amount_to_pay": (100, 0), "is_paid": (False, True),
+                                     "status": ("UNPAID", "PAID")})]
+    assert delta.removed == ["FV/2"]
+
+
+def test_invoice_without_dates_is_not_reported_as_changed():
+    """Energa24 delta test - missing dates parse the same on every refresh."""
+    raw = {"invoiceNumber": "FV/1", "invoiceAmount": "10", "payment": "0", "status": "UNPAID",
+           "ppes": [{"ppeNumber": "PL1"}]}
+    tracker = InvoiceDeltaTracker()
+    tracker.update([Invoices.from_dict(raw)])
+
+    invoice = Invoices.from_dict(raw)
+    assert invoice.date is None and invoice.paying_deadline_date is None
+    assert not tracker.update([invoice])
+
+
+def test_event_value_is_serialisable():
+    """Energa24 delta test - datetimes are sent as ISO strings."""
+    assert event_value(datetime(2022, 6, 6)) == "2022-06-06T00:00:00"
+    assert event_value(1.5) == 1.5
@@ -0,0 +1,50 @@
+"""Energa24 PPE list discovery test pack."""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.energa24_sensor.cache import SwrCache
+from custom_components.energa24_sensor.discovery import async_discover_meters, meter_list_record
+
+from .payloads import any_ppg_list
+
+
+@pytest.mark.asyncio
+async def test_fresh_stored_list_is_served_without_saving(hass: HomeAssistant):
+    """Energa24 discovery test - a list within the TTL is served from the store as it is."""
+    energa24_api, store = discovery_fixtures(age=10)
+
+    pgps = await async_discover_meters(hass, energa24_api, store)
+
+    assert [x.ppe_number for x in pgps.ppg_list] == ["1"]
+    energa24_api.fetch.assert_not_called()
+    store.async_save.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refetched_list_is_saved_with_its_new_age(hass: HomeAssistant):
+    """Energa24 discovery test - a list too old to serve is refetched and saved with a new fetchedAt."""
+    energa24_api, store = discovery_fixtures(age=1000)
+
+    pgps = await async_discover_meters(hass, energa24_api, store)
+
+    assert [x.ppe_number for x in pgps.ppg_list] == ["1", "2"]
+    record = store.async_save.call_args[0][0]
+    assert time.time() - record["fetchedAt"] < 60
+    assert [x["ppeNumber"] for x in record["ppes"]] == ["1", "2"]
+
+
+def discovery_fixtures(age: float):
+    energa24_api = MagicMock()
+    energa24_api.cache = SwrCache({"dashboard": 100}, {"dashboard": 100})
+    energa24_api.fetch = MagicMock(return_value=any_ppg_list(["1", "2"]))
+    energa24_api.meterList = lambda: energa24_api.cache.get("dashboard", None, energa24_api.fetch)
+    record = meter_list_record(any_ppg_list(["1"]))
+    record["fetchedAt"] -= age
+    store = MagicMock()
+    store.async_load = AsyncMock(return_value=record)
+    store.async_save = AsyncMock()
+    return energa24_api, store
@@ -0,0 +1,89 @@
+"""Energa24 export test pack."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+from datetime import date, datetime
+from unittest.mock import patch
+
+from custom_components.energa24_sensor import export
+from custom_components.energa24_sensor.PgpList import PpgList
+
+from .payloads import any_invoice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_export_streams_every_account():
+    """Energa24 export test - every account ends up in the output."""
+    credentials = io.StringIO("username,password\nfirst,a\nsecond,b\nthird,c\n")
+    output = io.StringIO()
+    with patch.object(export.Energa24Api, "meterList", return_value=PpgList([], "acc", "cli")), \
+            patch.object(export.Energa24Api, "iter_invoices", side_effect=paged([any_invoice()])):
+        stats = export.export_invoices(export.read_credentials(credentials), export.JsonlWriter(output), workers=2)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(r["username"] for r in records) == ["first", "second", "third"]
+    assert records[0]["date"] == "2022-06-06T00:00:00"
+    assert stats.accounts == 3
+    assert stats.records == 3
+    assert stats.failed_accounts == 0
+
+
+def test_export_counts_failed_accounts():
+    """Energa24 export test - a failing login does not stop the export."""
+    credentials = io.StringIO("username,password\nfirst,a\n")
+    output = io.StringIO()
+    with patch.object(export.Energa24Api, "meterList", side_effect=Exception("Login failed")):
+        stats = export.export_invoices(export.read_credentials(credentials), export.CsvWriter(output))
+
+    assert stats.failed_accounts == 1
+    assert output.getvalue().splitlines() == [",".join(export.ACCOUNT_FIELDS + export.INVOICE_FIELDS)]
+
+
+def test_export_pages_through_the_whole_history():
+    """Energa24 export test - every page of every window is written, each record as it is decoded."""
+    history = [any_invoice("FV/{}".format(i), issued=datetime(2015 + i // 12, 1 + i % 12, 1)) for i in range(100)]
+    written = []
+    with patch.object(export.Energa24Api, "meterList", return_value=PpgList([], "acc", "cli")), \
+            patch.object(export.Energa24Api, "iter_invoices", side_effect=paged(history, max_page=4, written=written)):
+        stats = export.export_invoices(export.read_credentials(io.StringIO("username,password\nfirst,a\n")),
+                                       RecordingWriter(written), since=date(2015, 1, 1))
+
+    assert stats.records == 100
+    assert [x["number"] for x in written if isinstance(x, dict)] == [x.number for x in history]
+    # each record is written before the next invoice of its page is decoded
+    assert written[:3] == [("decoded", "FV/0"), written[1], ("decoded", "FV/1")]
+    assert written[1]["number"] == "FV/0"
+
+
+def test_cli_runs_without_home_assistant():
+    """Energa24 export test - the command line script does not import the integration's __init__."""
+    code = "import sys; sys.modules['homeassistant'] = None; sys.argv = ['energa24_cli.py', 'export', '--help']; " \
+           "import runpy; runpy.run_path('energa24_cli.py', run_name='__main__')"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert "credentials" in result.stdout
+
+
+class RecordingWriter:
+    def __init__(self, written: list) -> None:
+        self.written = written
+
+    def write(self, record: dict) -> None:
+        self.written.append(record)
+
+
+def paged(history, max_page=None, written=None):
+    """iter_invoices over ``history``, noting in ``written`` each invoice it hands out."""
+    def iter_invoices(account_number, client_number, from_date, to_date, page, size):
+        size = min(size, max_page or size)
+        found = [x for x in history if from_date <= x.date.date() <= to_date][page * size:(page + 1) * size]
+        for invoice in found:
+            if written is not None:
+                written.append(("decoded", invoice.number))
+            yield invoice
+    return iter_invoices
@@ -0,0 +1,92 @@
+"""Energa24 forecast test pack."""
+
+import dataclasses
+from datetime import datetime, timedelta
+
+from custom_components.energa24_sensor.forecast import MeterForecast
+
+from .payloads import bimonthly_invoices
+
+
+def test_steady_consumption_is_forecast_exactly():
+    """Energa24 forecast test - constant daily use gives the same next invoice and no error."""
+    forecast = MeterForecast()
+    forecast.sync(bimonthly_invoices(6, lambda i, month: 10.0))
+
+    result = forecast.forecast()
+
+    assert result.kwh == 600
+    assert result.gross_amount == 600
+    assert result.period_start == datetime(2023, 1, 1) + timedelta(days=6 * 60)
+    assert result.mape_kwh == 0
+    assert result.samples == 6
+
+
+def test_trend_is_followed():
+    """Energa24 forecast test - rising use is extrapolated instead of averaged."""
+    forecast = MeterForecast()
+    forecast.sync(bimonthly_invoices(12, lambda i, month: 10.0 + i))
+
+    assert forecast.forecast().kwh > 60 * 21
+
+
+def test_seasonal_pattern_lowers_error():
+    """Energa24 forecast test - after a year the seasonal index beats the level alone."""
+    forecast = MeterForecast()
+    invoices = bimonthly_invoices(36, lambda i, month: 20.0 if month in (12, 1, 2) else 8.0)
+    forecast.sync(invoices[:6])
+    first_year = forecast.forecast().mape_kwh
+    forecast.sync(invoices)
+
+    assert forecast.forecast().mape_kwh < first_year
+
+
+def test_incremental_equals_replay():
+    """Energa24 forecast test - invoices learned one by one equal one replay of the history."""
+    invoices = bimonthly_invoices(20, lambda i, month: 5.0 + (i * 7) % 11)
+    incremental = MeterForecast()
+    for invoice in invoices:
+        incremental.sync([invoice])
+    replayed = MeterForecast()
+    replayed.sync(reversed(invoices))
+
+    assert incremental.forecast() == replayed.forecast()
+
+
+def test_corrected_invoice_replays_and_payment_does_not():
+    """Energa24 forecast test - only a change of amounts or period is relearned."""
+    invoices = bimonthly_invoices(4, lambda i, month: 10.0)
+    forecast = MeterForecast()
+    forecast.sync(invoices)
+    before = forecast.forecast()
+
+    assert not forecast.sync([dataclasses.replace(invoices[1], is_paid=True, amount_to_pay=0)])
+    assert forecast.sync([dataclasses.replace(invoices[1], wear_kwh=1200)])
+    assert forecast.forecast() != before
+    assert len(forecast) == 4
+
+
+def test_evicted_history_is_not_relearned():
+    """Energa24 forecast test - evicting kept invoices keeps the model and ignores them when seen again."""
+    invoices = bimonthly_invoices(10, lambda i, month: 5.0 + i)
+    forecast = MeterForecast()
+    forecast.sync(invoices)
+    before = forecast.forecast()
+
+    assert forecast.evict_oldest(0.5) == 5
+    assert not forecast.sync(invoices)
+    assert forecast.forecast() == before
+    assert forecast.sync([dataclasses.replace(invoices[-1], wear_kwh=1)])
+    assert len(forecast) == 5
+
+
+def test_kept_invoices_are_capped():
+    """Energa24 forecast test - only the latest invoices are kept for replays, the model learns them all."""
+    invoices = bimonthly_invoices(12, lambda i, month: 5.0 + i)
+    forecast = MeterForecast(kept_invoices=4)
+    for invoice in invoices:
+        forecast.sync([invoice])
+
+    assert len(forecast) == 12
+    assert sorted(forecast._invoices) == ["FV/10", "FV/11", "FV/8", "FV/9"]
+    assert not forecast.sync(invoices[:8])
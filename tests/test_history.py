@@ -0,0 +1,160 @@
+"""Energa24 history file test pack."""
+
+import dataclasses
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from custom_components.energa24_sensor.Invoices import invoice_to_record
+from custom_components.energa24_sensor.PpgReadingForMeter import MeterReading
+from custom_components.energa24_sensor.history import (
+    COMPACT_SEGMENTS,
+    HistoryFormatError,
+    HistorySnapshot,
+    HistoryStore,
+    write_history,
+)
+
+from .payloads import random_invoice
+
+
+def any_reading(day: int, meter: str = "M1") -> MeterReading:
+    date = datetime(2022, 1, 1, 6, 0) + timedelta(days=day)
+    return MeterReading(status="INVOICE", reading_date_local=date,
+                        reading_date_utc=(date - timedelta(hours=1)).replace(tzinfo=timezone.utc),
+                        pp_id=0, value=100 + day, value2=None, value3=None, meter_number=meter,
+                        region_code="", wear=day, type="INVOICE", color="black")
+
+
+def test_round_trip(tmp_path):
+    """Energa24 history test - records load back equal and sorted by date."""
+    rng = random.Random(38)
+    invoices = [random_invoice(rng, "FV/{}".format(i), str(i % 3)) for i in range(300)]
+    invoices[0] = dataclasses.replace(invoices[0], date=datetime(2021, 5, 1, 12, 30, tzinfo=timezone.utc),
+                                      number="FV/ąę")
+    invoices[1] = dataclasses.replace(invoices[1], paying_deadline_date=None)
+    readings = [any_reading(day) for day in (30, 10, 20)]
+    path = str(tmp_path / "history")
+
+    write_history(path, invoices, readings)
+
+    with HistorySnapshot(path) as snapshot:
+        assert list(snapshot.invoices) == sorted(invoices, key=lambda z: z.date.replace(tzinfo=None))
+        assert list(snapshot.readings) == sorted(readings, key=lambda z: z.reading_date_utc)
+        assert snapshot.invoices[-1] == snapshot.invoices.recent(1)[0]
+
+
+def test_since_and_recent(tmp_path):
+    """Energa24 history test - recent records without decoding the older ones."""
+    invoices = [dataclasses.replace(random_invoice(random.Random(i), "FV/{}".format(i)),
+                                    date=datetime(2020, 1, 1) + timedelta(days=i)) for i in range(1000)]
+    path = str(tmp_path / "history")
+    write_history(path, invoices, [])
+
+    with HistorySnapshot(path) as snapshot:
+        assert [x.number for x in snapshot.invoices.recent(3)] == ["FV/997", "FV/998", "FV/999"]
+        since = snapshot.invoices.since(datetime(2020, 1, 1) + timedelta(days=990))
+        assert [x.number for x in since] == ["FV/{}".format(i) for i in range(990, 1000)]
+        assert len(snapshot._strings) < 20
+
+
+def test_merge_keeps_history_beyond_the_window(tmp_path):
+    """Energa24 history test - merging adds to the history instead of replacing it."""
+    rng = random.Random(1)
+    old = [random_invoice(rng, "FV/{}".format(i)) for i in range(5)]
+    store = HistoryStore(str(tmp_path / "storage" / "history"))
+    store.merge(old, [any_reading(1)])
+
+    paid = dataclasses.replace(old[4], amount_to_pay=0, is_paid=True, status="PAID")
+    store.merge([paid, random_invoice(rng, "FV/new")], [any_reading(1), any_reading(2)])
+
+    with store.open() as snapshot:
+        invoices = {x.number: x for x in snapshot.invoices}
+        assert len(invoices) == 6
+        assert invoices["FV/4"].is_paid
+        assert len(snapshot.readings) == 2
+
+
+def test_merge_appends_only_what_changed(tmp_path):
+    """Energa24 history test - a merge appends the changed records and leaves the rest of the file as it is."""
+    rng = random.Random(4)
+    old = [dataclasses.replace(random_invoice(rng, "FV/{}".format(i)), date=datetime(2020, 1, 1) + timedelta(days=i))
+           for i in range(200)]
+    path = tmp_path / "history"
+    store = HistoryStore(str(path))
+    store.merge(old, [any_reading(1)])
+    written = path.read_bytes()
+
+    store.merge(old[-10:], [any_reading(1)])
+    assert path.read_bytes() == written
+
+    paid = dataclasses.replace(old[5], amount_to_pay=0, is_paid=True, status="PAID AFTER DEADLINE")
+    store.merge([paid, dataclasses.replace(old[-1], number="FV/new")], [any_reading(1), any_reading(2, "M2")])
+
+    appended = path.read_bytes()
+    assert appended.startswith(written)
+    assert len(appended) - len(written) < 400
+    with store.open() as snapshot:
+        assert snapshot.segments == 1
+        assert [x.number for x in snapshot.invoices] == [x.number for x in old] + ["FV/new"]
+        assert snapshot.invoices[5] == paid
+        assert [x.meter_number for x in snapshot.readings] == ["M1", "M2"]
+        assert [x.number for x in snapshot.invoices.since(datetime(2020, 1, 1) + timedelta(days=199))] == [
+            "FV/199", "FV/new"]
+
+
+def test_merge_compacts_and_survives_a_torn_segment(tmp_path):
+    """Energa24 history test - a segment cut short is ignored, and many segments are rewritten into one file."""
+    rng = random.Random(5)
+    path = tmp_path / "history"
+    store = HistoryStore(str(path))
+    store.merge([random_invoice(rng, "FV/0")], [])
+    store.merge([random_invoice(rng, "FV/1")], [])
+    path.write_bytes(path.read_bytes()[:-3])
+
+    with store.open() as snapshot:
+        assert [x.number for x in snapshot.invoices] == ["FV/0"]
+    for i in range(1, COMPACT_SEGMENTS + 1):
+        store.merge([random_invoice(rng, "FV/{}".format(i))], [])
+
+    with store.open() as snapshot:
+        assert snapshot.segments == 0
+        assert sorted(x.number for x in snapshot.invoices) == sorted("FV/{}".format(i)
+                                                                      for i in range(COMPACT_SEGMENTS + 1))
+
+
+def test_unreadable_file(tmp_path):
+    """Energa24 history test - foreign or truncated files are rejected and rebuilt."""
+    path = tmp_path / "history"
+    path.write_bytes(b"{}")
+    with pytest.raises(HistoryFormatError):
+        HistorySnapshot(str(path))
+
+    store = HistoryStore(str(path))
+    store.merge([random_invoice(random.Random(2), "FV/1")], [])
+    with store.open() as snapshot:
+        assert len(snapshot.invoices) == 1
+
+
+def test_history_size_and_load_time(tmp_path):
+    """Energa24 history benchmark - years of invoices across many PPEs."""
+    rng = random.Random(3)
+    invoices = [random_invoice(rng, "FV/{:08d}".format(i), "PL{:010d}".format(i % 200)) for i in range(50000)]
+    path = str(tmp_path / "history")
+    write_history(path, invoices, [])
+    binary_size = (tmp_path / "history").stat().st_size
+    json_size = len(json.dumps([invoice_to_record(x) for x in invoices]))
+
+    started = time.perf_counter()
+    with HistorySnapshot(path) as snapshot:
+        recent = snapshot.invoices.recent(50)
+    load_seconds = time.perf_counter() - started
+    figures = "history: {} bytes binary, {} bytes JSON, {:.1f} ms to open and read 50 recent".format(
+        binary_size, json_size, load_seconds * 1000)
+
+    assert len(recent) == 50
+    assert binary_size < json_size / 3, figures
+    assert load_seconds < 0.05, figures
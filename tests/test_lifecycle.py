@@ -0,0 +1,151 @@
+"""Energa24 unload and reload test pack."""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.energa24_sensor.Energa24Api import ClientClosedError, Energa24Api
+from custom_components.energa24_sensor.Invoices import InvoicesList
+from custom_components.energa24_sensor.PpgReadingForMeter import PpgReadingForMeter
+from custom_components.energa24_sensor.const import DATA_COORDINATORS, DOMAIN
+from custom_components.energa24_sensor.coordinator import Energa24Coordinator
+from custom_components.energa24_sensor.registry import get_registry
+
+from .fake_energa import FakeEnergaServer
+from .payloads import any_ppg_list
+
+
+def test_closed_client_refuses_calls():
+    """Energa24 lifecycle test - calls after close fail fast without touching the network."""
+    api = Energa24Api("user-0", "secret")
+    api.close()
+
+    with pytest.raises(ClientClosedError):
+        api.meterList()
+    with pytest.raises(ClientClosedError):
+        api.invoices("account", "client")
+
+
+def test_close_does_not_wait_for_request_in_flight(socket_enabled, monkeypatch):
+    """Energa24 lifecycle test - close returns at once while a slow request is running."""
+    with FakeEnergaServer(1, 2, latency=0.3) as server:
+        server.patch(monkeypatch)
+        api = Energa24Api("user-0", "secret")
+        worker = threading.Thread(target=_swallow, args=(api.meterList,))
+        worker.start()
+        time.sleep(0.1)
+
+        started = time.perf_counter()
+        api.close()
+        assert time.perf_counter() - started < 0.1
+
+        worker.join(5)
+        assert not worker.is_alive()
+        assert api.cache.peek("dashboard", None) is None
+
+
+def _swallow(call):
+    try:
+        call()
+    except Exception:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_shutdown_abandons_running_refresh(hass: HomeAssistant):
+    """Energa24 lifecycle test - unloading does not wait for a slow Energa request."""
+    started_fetch = threading.Event()
+    release = threading.Event()
+    energa24_api = MagicMock()
+
+    # plain functions: the test harness runs Mock targets inline instead of on the executor
+    def meter_list():
+        return any_ppg_list(["1"])
+
+    def slow_invoices(*args):
+        started_fetch.set()
+        release.wait(5)
+        return InvoicesList([])
+
+    def reading_for_meter(*args, **kwargs):
+        return PpgReadingForMeter(meter_readings=[], code=0, message=None, display_to_end_user=False,
+                                  end_user_message=None, token_expire_date=datetime.now(),
+                                  token_expire_date_utc=datetime.now())
+
+    energa24_api.meterList = meter_list
+    energa24_api.invoices = slow_invoices
+    energa24_api.readingForMeter = reading_for_meter
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1"]))
+    refresh = hass.async_create_task(coordinator._async_update_data())
+    assert await hass.async_add_executor_job(started_fetch.wait, 5)
+    assert coordinator.refreshing
+
+    started = time.perf_counter()
+    await coordinator.async_shutdown()
+    with pytest.raises(asyncio.CancelledError):
+        await refresh
+    assert time.perf_counter() - started < 1
+    release.set()
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_unload_and_reload_release_the_client(hass: HomeAssistant, enable_custom_integrations,
+                                                    socket_enabled, monkeypatch):
+    """Energa24 lifecycle test - reload and unload shut the entry down and release its client."""
+    entry = MockConfigEntry(domain=DOMAIN, title="Energa24 sensor",
+                            data={CONF_USERNAME: "user-0", CONF_PASSWORD: "secret"})
+    entry.add_to_hass(hass)
+    registry = get_registry(hass)
+
+    with FakeEnergaServer(1, 2) as server:
+        server.patch(monkeypatch)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        first_api = hass.data[DOMAIN][DATA_COORDINATORS][entry.entry_id].api
+
+        assert await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.LOADED
+        assert first_api.closed
+        assert len(registry) == 1
+        second_api = hass.data[DOMAIN][DATA_COORDINATORS][entry.entry_id].api
+        assert second_api is not first_api
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.NOT_LOADED
+    assert len(registry) == 0
+    assert second_api.closed
+    assert entry.entry_id not in hass.data[DOMAIN][DATA_COORDINATORS]
+
+
+@pytest.mark.asyncio
+async def test_remove_entry_deletes_its_history(hass: HomeAssistant, enable_custom_integrations,
+                                                socket_enabled, monkeypatch):
+    """Energa24 lifecycle test - removing the entry deletes the history file of its account."""
+    entry = MockConfigEntry(domain=DOMAIN, title="Energa24 sensor",
+                            data={CONF_USERNAME: "user-0", CONF_PASSWORD: "secret"})
+    entry.add_to_hass(hass)
+
+    with FakeEnergaServer(1, 2) as server:
+        server.patch(monkeypatch)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        history_path = hass.data[DOMAIN][DATA_COORDINATORS][entry.entry_id].history.path
+        assert os.path.exists(history_path)
+
+        await hass.config_entries.async_remove(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert not os.path.exists(history_path)
@@ -0,0 +1,132 @@
+"""Energa24 load test pack.
+
+Sets up N config entries with M PPEs each against tests/fake_energa.py and
+measures one full refresh wave. Sizes come from the environment, so the same
+test is a quick check in CI and a scaling run by hand, e.g.::
+
+    ENERGA24_LOAD_ENTRIES=300 ENERGA24_LOAD_PPES=10 ENERGA24_LOAD_LATENCY=0.2 \\
+    ENERGA24_LOAD_ERROR_RATE=0.02 ENERGA24_LOAD_REPORT=load_report.jsonl \\
+    pytest tests/test_load.py
+
+Each run appends one JSON line to ENERGA24_LOAD_REPORT so limits can be
+tracked over time.
+"""
+
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.energa24_sensor.const import DOMAIN
+from custom_components.energa24_sensor.export import peak_rss_bytes
+
+from .fake_energa import FakeEnergaServer
+
+LOAD_ENTRIES = int(os.environ.get("ENERGA24_LOAD_ENTRIES", "10"))
+LOAD_PPES = int(os.environ.get("ENERGA24_LOAD_PPES", "5"))
+LOAD_LATENCY = float(os.environ.get("ENERGA24_LOAD_LATENCY", "0.01"))
+LOAD_ERROR_RATE = float(os.environ.get("ENERGA24_LOAD_ERROR_RATE", "0"))
+LOAD_REPORT = os.environ.get("ENERGA24_LOAD_REPORT")
+# Longest the event loop may stall while the wave runs
+MAX_LOOP_LAG = float(os.environ.get("ENERGA24_LOAD_MAX_LOOP_LAG", "1.0"))
+# Login (5), dashboard and invoices; meters must not add requests of their own
+REQUESTS_PER_ENTRY = 7
+SENSORS_PER_PPE = 5
+SENSORS_PER_ACCOUNT = 3
+
+
+class LoadProbe:
+    """Samples event-loop lag and executor queue depth while running."""
+
+    def __init__(self, hass: HomeAssistant, interval: float = 0.01) -> None:
+        self.hass = hass
+        self.interval = interval
+        self.lags = []
+        self.queue_depths = []
+        self._task = None
+
+    def __enter__(self) -> "LoadProbe":
+        self._task = self.hass.loop.create_task(self._sample())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+    async def _sample(self) -> None:
+        loop = self.hass.loop
+        executor = getattr(loop, "_default_executor", None)
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+            if executor is not None:
+                self.queue_depths.append(executor._work_queue.qsize())
+
+    def lag_percentile(self, percentile: float) -> float:
+        if not self.lags:
+            return 0.0
+        ordered = sorted(self.lags)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+
+@pytest.mark.asyncio
+async def test_refresh_wave(hass: HomeAssistant, enable_custom_integrations, socket_enabled, monkeypatch, tmp_path):
+    """Energa24 load test - N entries x M PPEs set up and refreshed at once."""
+    entries = []
+    for account in range(LOAD_ENTRIES):
+        entry = MockConfigEntry(domain=DOMAIN, title="Energa24 sensor",
+                                data={CONF_USERNAME: "user-{}".format(account), CONF_PASSWORD: "secret"})
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    with FakeEnergaServer(LOAD_ENTRIES, LOAD_PPES, LOAD_LATENCY, LOAD_ERROR_RATE) as server:
+        server.patch(monkeypatch)
+        tracemalloc.start()
+        started = time.perf_counter()
+        with LoadProbe(hass) as probe:
+            await asyncio.gather(*(hass.config_entries.async_setup(x.entry_id) for x in entries))
+            await hass.async_block_till_done()
+        wall_seconds = time.perf_counter() - started
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "entries": LOAD_ENTRIES,
+            "ppes_per_entry": LOAD_PPES,
+            "latency": LOAD_LATENCY,
+            "error_rate": LOAD_ERROR_RATE,
+            "wall_seconds": round(wall_seconds, 3),
+            "loaded_entries": sum(x.state is ConfigEntryState.LOADED for x in entries),
+            "sensors": len(hass.states.async_entity_ids("sensor")),
+            "outbound_requests": server.total_requests,
+            "requests_by_path": dict(server.requests),
+            "server_errors": server.errors,
+            "loop_lag_max_ms": round(max(probe.lags, default=0.0) * 1000, 1),
+            "loop_lag_p95_ms": round(probe.lag_percentile(0.95) * 1000, 1),
+            "executor_queue_max": max(probe.queue_depths, default=0),
+            "traced_peak_bytes": traced_peak,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        for entry in entries:
+            if entry.state is ConfigEntryState.LOADED:
+                await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    report_path = LOAD_REPORT or str(tmp_path / "load_report.jsonl")
+    with open(report_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+
+    assert report["loop_lag_max_ms"] < MAX_LOOP_LAG * 1000
+    if LOAD_ERROR_RATE == 0:
+        assert report["loaded_entries"] == LOAD_ENTRIES
+        assert report["sensors"] == LOAD_ENTRIES * (LOAD_PPES * SENSORS_PER_PPE + SENSORS_PER_ACCOUNT)
+        assert report["outbound_requests"] <= LOAD_ENTRIES * REQUESTS_PER_ENTRY
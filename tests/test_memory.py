@@ -0,0 +1,99 @@
+"""Energa24 memory accounting test pack."""
+
+import sys
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.energa24_sensor.Energa24Api import Energa24Api
+from custom_components.energa24_sensor.Invoices import InvoicesList
+from custom_components.energa24_sensor.PpgReadingForMeter import PpgReadingForMeter
+from custom_components.energa24_sensor.const import CONF_MEMORY_SOFT_CAP, DATA_MEMORY, DOMAIN
+from custom_components.energa24_sensor.coordinator import Energa24Coordinator
+from custom_components.energa24_sensor.diagnostics import async_get_config_entry_diagnostics
+from custom_components.energa24_sensor.memory import MemoryMonitor, deep_sizeof
+
+from .fake_energa import FakeEnergaServer
+from .payloads import any_invoice, any_ppg_list, bimonthly_invoices
+
+
+def test_shared_objects_are_counted_once():
+    """Energa24 memory test - a list referenced twice adds its size only for the first owner."""
+    shared = [str(i) * 1000 for i in range(10)]
+    seen = set()
+
+    first_owner, second_owner = {"a": shared}, {"b": shared}
+
+    first = deep_sizeof(first_owner, seen)
+    second = deep_sizeof(second_owner, seen)
+
+    assert first > 10 * sys.getsizeof("0" * 1000)
+    assert 0 < second < sys.getsizeof("0" * 1000)
+
+
+def test_mocks_are_not_walked():
+    """Energa24 memory test - objects that make up attributes on access are sized but not entered."""
+    mock = MagicMock()
+
+    assert deep_sizeof({"api": mock}) > 0
+    # sys.getsizeof itself asks for __sizeof__; nothing else may be made up
+    assert set(mock._mock_children) <= {"__sizeof__"}
+
+
+@pytest.mark.asyncio
+async def test_soft_cap_evicts_forecast_history(hass: HomeAssistant):
+    """Energa24 memory test - an account over its cap drops old history at its next refresh."""
+    energa24_api = Energa24Api("user-0", "secret")
+    # plain functions on a real client, so the walk sees what it would in production
+    energa24_api.meterList = lambda: any_ppg_list(["1"])
+    energa24_api.invoices = lambda *args: InvoicesList([any_invoice("FV/1", "1", 10)])
+    energa24_api.readingForMeter = lambda *args, **kwargs: PpgReadingForMeter(
+        meter_readings=[], code=0, message=None, display_to_end_user=False, end_user_message=None,
+        token_expire_date=datetime.now(), token_expire_date_utc=datetime.now())
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1"]))
+    coordinator.forecasts.meter("1").sync(bimonthly_invoices(100, lambda i, month: 10.0))
+    await coordinator.async_refresh()
+    monitor = MemoryMonitor(hass, coordinator, lambda: [], soft_cap_bytes=1)
+
+    try:
+        report = await monitor.async_sample()
+        await coordinator.async_refresh()
+    finally:
+        energa24_api.close()
+
+    assert report.components["forecasts"] > 0
+    assert coordinator.evicted_invoices > 0
+    assert monitor.as_dict()["evicted_invoices"] == coordinator.evicted_invoices
+
+
+@pytest.mark.asyncio
+async def test_entry_reports_memory_in_diagnostics(hass: HomeAssistant, enable_custom_integrations,
+                                                   socket_enabled, monkeypatch):
+    """Energa24 memory test - a loaded entry samples its account and entities under its soft cap."""
+    entry = MockConfigEntry(domain=DOMAIN, title="Energa24 sensor",
+                            data={CONF_USERNAME: "user-0", CONF_PASSWORD: "secret"},
+                            options={CONF_MEMORY_SOFT_CAP: 64})
+    entry.add_to_hass(hass)
+
+    with FakeEnergaServer(1, 2) as server:
+        server.patch(monkeypatch)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        monitor = hass.data[DOMAIN][DATA_MEMORY][entry.entry_id]
+
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    memory = diagnostics["memory"]
+    assert memory["soft_cap_bytes"] == 64 * 1024 * 1024
+    assert memory["report"]["total_bytes"] > 0
+    # five sensors per PPE and three for the account
+    assert len(memory["report"]["entities"]) == 2 * 5 + 3
+    assert entry.entry_id not in hass.data[DOMAIN][DATA_MEMORY]
+    assert monitor._unsubscribe is None
@@ -0,0 +1,136 @@
+"""Energa24 parser correctness and throughput test pack."""
+
+import os
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+from custom_components.energa24_sensor.Invoices import Invoices, invoices_from_dict
+from custom_components.energa24_sensor.PgpList import ppg_list_from_dict
+from custom_components.energa24_sensor.PpgReadingForMeter import MeterReading, ppg_reading_for_meter_from_dict
+
+from .payloads import dashboard_payload, invoices_payload, meter_readings_payload, odd_invoice_item
+
+# Minimal records/second on a CI runner, checked with --run-throughput only;
+# ENERGA24_THROUGHPUT_SCALE relaxes or tightens all of them.
+THROUGHPUT_SCALE = float(os.environ.get("ENERGA24_THROUGHPUT_SCALE", "1"))
+MIN_INVOICES_PER_SECOND = 40000
+MIN_METER_READINGS_PER_SECOND = 50000
+MIN_PPES_PER_SECOND = 200000
+
+
+def reference_invoice(item: dict) -> Invoices:
+    """Straightforward decoding of a well-formed invoice item."""
+    ppe = item["ppes"][0]
+    end_date = datetime.fromisoformat(ppe["endDate"])
+    return Invoices(number=item["invoiceNumber"],
+                    date=datetime.fromisoformat(item["issueDate"]),
+                    sell_date=end_date,
+                    gross_amount=float(item["invoiceAmount"]),
+                    amount_to_pay=float(item["invoiceAmount"]) - float(item["payment"]),
+                    wear=float(ppe["consumption"]),
+                    wear_kwh=float(ppe["consumption"]),
+                    paying_deadline_date=datetime.fromisoformat(item["paymentDate"]),
+                    start_date=datetime.fromisoformat(ppe["startDate"]),
+                    end_date=end_date,
+                    is_paid=item["status"] == "PAID",
+                    id_pp=ppe["ppeNumber"],
+                    type=item["documentType"],
+                    status=item["status"])
+
+
+def test_large_invoice_payload_matches_reference():
+    """Energa24 parser test - thousands of invoices across many PPEs."""
+    payload = invoices_payload(5000, ppes=40)
+
+    decoded = invoices_from_dict(payload).invoices_list
+
+    assert decoded == [reference_invoice(item) for item in payload]
+
+
+def test_odd_invoice_items_decode_consistently():
+    """Energa24 parser test - missing fields, odd dates and amounts."""
+    rng = random.Random(30)
+    for index in range(2000):
+        item, expected = odd_invoice_item(index, rng)
+        invoice = Invoices.from_dict(item)
+        for name, value in expected.items():
+            assert getattr(invoice, name) == value, (name, item)
+
+
+def test_invoices_body_that_is_not_a_list_is_empty():
+    """Energa24 parser test - error bodies decode to no invoices."""
+    assert invoices_from_dict({"error": "unauthorized"}).invoices_list == []
+
+
+def test_invoice_item_that_is_not_an_object_is_rejected():
+    """Energa24 parser test - a malformed invoice item raises ValueError, also under python -O."""
+    with pytest.raises(ValueError):
+        invoices_from_dict([["FV/1"]])
+
+
+def test_meter_readings_match_reference():
+    """Energa24 parser test - meter readings."""
+    payload = meter_readings_payload(3000)
+
+    readings = ppg_reading_for_meter_from_dict(payload).meter_readings
+
+    assert len(readings) == 3000
+    for item, reading in zip(payload["MeterReadings"], readings):
+        assert reading == MeterReading(status=item["Status"],
+                                       reading_date_local=datetime.fromisoformat(item["ReadingDateLocal"]),
+                                       reading_date_utc=datetime.fromisoformat(item["ReadingDateUtc"]),
+                                       pp_id=int(item["PpId"]),
+                                       value=item["Value"],
+                                       value2=None,
+                                       value3=None,
+                                       meter_number=item["MeterNumber"],
+                                       region_code=item["RegionCode"],
+                                       wear=item["Wear"],
+                                       type=item["Type"],
+                                       color=item["Color"])
+
+
+def test_meter_readings_missing_fields():
+    """Energa24 parser test - readings without PpId and responses without readings."""
+    item = meter_readings_payload(1)["MeterReadings"][0]
+    del item["PpId"]
+
+    assert MeterReading.from_dict(item).pp_id == 0
+    assert ppg_reading_for_meter_from_dict({"Code": 0, "DisplayToEndUser": False,
+                                            "TokenExpireDate": "2030-01-01",
+                                            "TokenExpireDateUtc": "2030-01-01"}).meter_readings == []
+
+
+def test_dashboard_with_many_ppes():
+    """Energa24 parser test - PPE list, numeric ids and missing lists."""
+    profile = dashboard_payload(1000)["clients"][0]["invoiceProfile"][0]
+    profile["ppes"][0]["mpIdDMS"] = 1234
+
+    ppg_list = ppg_list_from_dict(profile)
+
+    assert len(ppg_list.ppg_list) == 1000
+    assert ppg_list.ppg_list[0].mp_id_dms == "1234"
+    assert ppg_list.ppg_list[999].ppe_number == "PL0000000999"
+    assert (ppg_list.account_number, ppg_list.client_number) == ("2000", "1000")
+    assert ppg_list_from_dict({"accountNumber": "1"}).ppg_list == []
+
+
+@pytest.mark.parametrize("name, decode, payload, count, minimum", [
+    ("invoices", invoices_from_dict, invoices_payload(5000, ppes=20), 5000, MIN_INVOICES_PER_SECOND),
+    ("meter readings", ppg_reading_for_meter_from_dict, meter_readings_payload(5000), 5000,
+     MIN_METER_READINGS_PER_SECOND),
+    ("ppes", lambda payload: ppg_list_from_dict(payload["clients"][0]["invoiceProfile"][0]),
+     dashboard_payload(20000), 20000, MIN_PPES_PER_SECOND),
+])
+@pytest.mark.throughput
+def test_parser_throughput(name, decode, payload, count, minimum):
+    """Energa24 parser benchmark - fails when parsing gets slower than the threshold."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        decode(payload)
+        best = min(best, time.perf_counter() - started)
+    assert count / best >= minimum * THROUGHPUT_SCALE, "{}: {:.0f} records/s".format(name, count / best)
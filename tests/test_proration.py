@@ -0,0 +1,129 @@
+"""Energa24 proration test pack."""
+
+import dataclasses
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from custom_components.energa24_sensor.proration import ProrationEngine, monthly_profile, weekday_profile
+
+from .payloads import random_invoice
+
+
+def period_invoice(number: str, start: date, end: date, kwh: float, cost: float):
+    invoice = random_invoice(random.Random(0), number)
+    return dataclasses.replace(invoice, start_date=datetime.combine(start, datetime.min.time()),
+                               end_date=datetime.combine(end, datetime.min.time()),
+                               wear_kwh=kwh, gross_amount=cost)
+
+
+def reference(invoices, profile):
+    """Day-by-day proration without difference arrays."""
+    days = {}
+    for invoice in invoices:
+        start, end = invoice.start_date.date(), invoice.end_date.date()
+        span = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        weight = sum(profile(x) for x in span)
+        for day in span:
+            kwh, cost = days.get(day, (0.0, 0.0))
+            days[day] = (kwh + invoice.wear_kwh * profile(day) / weight,
+                         cost + invoice.gross_amount * profile(day) / weight)
+    return days
+
+
+def test_flat_period_is_spread_evenly():
+    """Energa24 proration test - 61 days of one invoice, both ends included."""
+    engine = ProrationEngine()
+    engine.upsert(period_invoice("FV/1", date(2023, 1, 1), date(2023, 3, 2), 610, 122))
+
+    assert engine.day(date(2023, 1, 1)) == pytest.approx((10, 2))
+    assert engine.day(date(2023, 3, 2)) == pytest.approx((10, 2))
+    assert engine.day(date(2023, 3, 3)) == (0.0, 0.0)
+    assert engine.total(date(2023, 1, 1), date(2023, 3, 2)) == pytest.approx((610, 122))
+
+
+def test_usage_of_the_last_invoiced_days():
+    """Energa24 proration test - the last day and the 30 days up to it, clipped to the invoiced span."""
+    engine = ProrationEngine()
+    assert engine.usage() is None
+    engine.upsert(period_invoice("FV/1", date(2023, 1, 1), date(2023, 3, 2), 610, 122))
+
+    usage = engine.usage()
+
+    assert (usage.day, usage.kwh, usage.cost) == (date(2023, 3, 2), 10, 2)
+    assert (usage.period_start, usage.period_kwh, usage.period_cost) == (date(2023, 2, 1), 300, 60)
+    assert engine.usage(days=100).period_start == date(2023, 1, 1)
+
+
+def test_overlapping_and_corrective_invoices_add_up():
+    """Energa24 proration test - corrections carry the difference for their period."""
+    engine = ProrationEngine()
+    engine.upsert(period_invoice("FV/1", date(2023, 1, 1), date(2023, 1, 10), 100, 50))
+    engine.upsert(period_invoice("FV/2", date(2023, 1, 6), date(2023, 1, 15), 50, 20))
+    engine.upsert(period_invoice("KOR/1", date(2023, 1, 1), date(2023, 1, 10), -20, -10))
+
+    assert engine.day(date(2023, 1, 1)) == pytest.approx((8, 4))
+    assert engine.day(date(2023, 1, 6)) == pytest.approx((13, 6))
+    assert engine.day(date(2023, 1, 15)) == pytest.approx((5, 2))
+
+    changed = engine.upsert(period_invoice("KOR/1", date(2023, 1, 1), date(2023, 1, 10), -10, -10))
+    assert changed == (date(2023, 1, 1), date(2023, 1, 10))
+    assert engine.day(date(2023, 1, 1)) == pytest.approx((9, 4))
+    assert engine.remove("FV/2") == (date(2023, 1, 6), date(2023, 1, 15))
+    assert engine.day(date(2023, 1, 15)) == (0.0, 0.0)
+
+
+def test_incremental_matches_rebuild_with_profile():
+    """Energa24 proration test - partial recomputes equal a full pass."""
+    rng = random.Random(40)
+    profile = monthly_profile([1.4, 1.3, 1.1, 1.0, 0.9, 0.8, 0.8, 0.8, 0.9, 1.0, 1.2, 1.4])
+    engine = ProrationEngine(profile)
+    invoices = {}
+    for step in range(400):
+        number = "FV/{}".format(rng.randint(0, 40))
+        if rng.random() < 0.2 and number in invoices:
+            del invoices[number]
+            engine.remove(number)
+            continue
+        start = date(2020, 1, 1) + timedelta(days=rng.randint(0, 900))
+        invoices[number] = period_invoice(number, start, start + timedelta(days=rng.randint(0, 90)),
+                                          rng.uniform(-50, 900), rng.uniform(-20, 400))
+        engine.upsert(invoices[number])
+
+    expected = reference(invoices.values(), profile)
+    for day, kwh, cost in engine.daily():
+        assert (kwh, cost) == pytest.approx(expected.get(day, (0.0, 0.0)), abs=1e-9)
+    engine.rebuild()
+    for day, kwh, cost in engine.daily():
+        assert (kwh, cost) == pytest.approx(expected.get(day, (0.0, 0.0)), abs=1e-9)
+
+
+def test_sync_reports_changed_days_only():
+    """Energa24 proration test - an unchanged snapshot changes nothing."""
+    engine = ProrationEngine(weekday_profile([1, 1, 1, 1, 1, 2, 2]))
+    invoices = [period_invoice("FV/{}".format(i), date(2023, 1, 1) + timedelta(days=61 * i),
+                               date(2023, 1, 1) + timedelta(days=61 * i + 60), 300, 100) for i in range(5)]
+
+    assert engine.sync(invoices) == (date(2023, 1, 1), date(2023, 11, 1))
+    assert engine.sync(list(invoices)) is None
+    assert engine.sync(invoices[1:]) == (date(2023, 1, 1), date(2023, 3, 2))
+    saturday, monday = engine.day(date(2023, 3, 4)), engine.day(date(2023, 3, 6))
+    assert saturday[0] == pytest.approx(2 * monday[0])
+
+
+def test_proration_benchmark():
+    """Energa24 proration benchmark - ten years of invoices in one pass, then one new invoice."""
+    invoices = [period_invoice("FV/{}".format(i), date(2014, 1, 1) + timedelta(days=61 * i),
+                               date(2014, 1, 1) + timedelta(days=61 * i + 60), 300, 100) for i in range(60)]
+    engine = ProrationEngine()
+    started = time.perf_counter()
+    engine.sync(invoices)
+    engine.rebuild()
+    full = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.upsert(period_invoice("FV/new", date(2024, 1, 1), date(2024, 2, 29), 300, 100))
+    incremental = time.perf_counter() - started
+    assert incremental < full, "proration: full {:.2f} ms, one invoice {:.3f} ms".format(full * 1000, incremental * 1000)
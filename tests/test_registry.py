@@ -0,0 +1,48 @@
+"""Energa24 client registry test pack."""
+
+from unittest.mock import MagicMock
+
+from custom_components.energa24_sensor.const import DATA_CLIENTS, DOMAIN
+from custom_components.energa24_sensor.registry import ClientRegistry, get_registry
+
+
+def test_same_login_shares_one_client():
+    """Energa24 registry test - identical credentials get the same client."""
+    registry = ClientRegistry(factory=lambda username, password: MagicMock())
+
+    first = registry.acquire("Jan@example.com", "secret")
+    second = registry.acquire(" jan@example.com", "secret")
+    other = registry.acquire("jan@example.com", "another")
+
+    assert first is second
+    assert other is not first
+    assert len(registry) == 2
+
+
+def test_client_released_by_last_user():
+    """Energa24 registry test - the client is closed by the last user."""
+    registry = ClientRegistry(factory=lambda username, password: MagicMock())
+    api = registry.acquire("jan@example.com", "secret")
+    registry.acquire("jan@example.com", "secret")
+
+    registry.release(api)
+    assert len(registry) == 1
+    api.close.assert_not_called()
+
+    registry.release(api)
+    assert len(registry) == 0
+    api.close.assert_called_once_with()
+    assert registry.acquire("jan@example.com", "secret") is not api
+
+    registry.release(api)
+    assert len(registry) == 1
+
+
+def test_registry_lives_in_hass_data():
+    """Energa24 registry test - one registry per hass instance."""
+    hass = MagicMock(data={})
+
+    registry = get_registry(hass)
+
+    assert hass.data[DOMAIN][DATA_CLIENTS] is registry
+    assert get_registry(hass) is registry
@@ -1,6 +1,7 @@
 """Energa24 sensor test pack."""
 
-from datetime import datetime
+import dataclasses
+from datetime import date, datetime
 from unittest.mock import MagicMock
 
 import pytest
@@ -11,14 +12,19 @@ from custom_components.energa24_sensor.PpgReadingForMeter import (
     PpgReadingForMeter,
 )
 from custom_components.energa24_sensor.sensor import Energa24Sensor, Energa24InvoiceSensor, Energa24CostTrackingSensor
+from custom_components.energa24_sensor.sensor import Energa24DailyConsumptionSensor, account_entities
 from custom_components.energa24_sensor.Invoices import Invoices, InvoicesList
+from custom_components.energa24_sensor.PgpList import PpgList, PpgListElement
+from custom_components.energa24_sensor.coordinator import Energa24Coordinator
+
+from . import payloads
+from .payloads import any_ppg_list
 
 
 @pytest.mark.asyncio
 async def test_newer_takes_precedence(hass: HomeAssistant):
     """Energa24 sensor test - test_newer_takes_precedence."""
     # given
-    energa24_api = MagicMock()
     reading_newer = any_meter_reading()
     reading_newer.reading_date_utc = datetime(2022, 7, 5)
     reading_newer.value = 2
@@ -26,14 +32,9 @@ async def test_newer_takes_precedence(hass: HomeAssistant):
     reading_older = any_meter_reading()
     reading_older.reading_date_utc = datetime(2022, 7, 4)
     reading_older.value = 3
-    energa24_api.readingForMeter = MagicMock(return_value=(
-        PpgReadingForMeter(meter_readings=[reading_older, reading_newer], code=0, message=None,
-                           display_to_end_user=None,
-                           token_expire_date=None,
-                           token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24Sensor(hass, energa24_api, "1", 2)
+    coordinator = await refreshed_coordinator(hass, readings=[reading_older, reading_newer])
     # when
-    await sensor.async_update()
+    sensor = Energa24Sensor(coordinator, '12', 2)
     # then
     assert sensor._state.value == 2
 
@@ -41,15 +42,11 @@ async def test_newer_takes_precedence(hass: HomeAssistant):
 @pytest.mark.asyncio
 async def test_multiple_invocies(hass: HomeAssistant):
     """Energa24 sensor test - test_multiple_invocies."""
-    energa24_api = MagicMock()
-    energa24_api.invoices = MagicMock(return_value=(Invoices(invoices_list=[any_invoice(), any_invoice()],
-                                                          code=0, message=None,
-                                                          display_to_end_user=None,
-                                                          token_expire_date=None, allow_load_after30_days=None,
-                                                          has_non_paid_forecast=None,
-                                                          token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24InvoiceSensor(hass, energa24_api, '12', 1)
-    await sensor.async_update()
+    first = any_invoice()
+    second = any_invoice()
+    second.number = "b"
+    coordinator = await refreshed_coordinator(hass, invoices=[first, second])
+    sensor = Energa24InvoiceSensor(coordinator, '12', 1)
     # then
     assert sensor._state.get('nextPaymentAmountToPay') == 1
 
@@ -57,72 +54,80 @@ async def test_multiple_invocies(hass: HomeAssistant):
 @pytest.mark.asyncio
 async def test_a_price(hass: HomeAssistant):
     """Energa24 sensor test - test_multiple_invocies."""
-    energa24_api = MagicMock()
     invoice = any_invoice()
     invoice.gross_amount = 10
     invoice.wear = 1
-    energa24_api.invoices = MagicMock(return_value=(Invoices(invoices_list=[invoice],
-                                                          code=0, message=None,
-                                                          display_to_end_user=None,
-                                                          token_expire_date=None, allow_load_after30_days=None,
-                                                          has_non_paid_forecast=None,
-                                                          token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24CostTrackingSensor(hass, energa24_api, '12', 1)
-    await sensor.async_update()
+    coordinator = await refreshed_coordinator(hass, invoices=[invoice])
+    sensor = Energa24CostTrackingSensor(coordinator, '12', 1)
     # then
     assert sensor.state == 10.0
 
+
 @pytest.mark.asyncio
 async def test_latest_price(hass: HomeAssistant):
     """Energa24 sensor test - test_multiple_invocies."""
-    energa24_api = MagicMock()
     old_invoice = any_invoice()
+    old_invoice.number = "old"
     old_invoice.date = datetime(2022, 7, 15)
     old_invoice.gross_amount = 1
     old_invoice.wear = 1
 
     new_invoice = any_invoice()
+    new_invoice.number = "new"
     new_invoice.date = datetime(2022, 8, 15)
     new_invoice.gross_amount = 2
     new_invoice.wear = 1
 
-    energa24_api.invoices = MagicMock(return_value=(Invoices(invoices_list=[old_invoice,new_invoice],
-                                                          code=0, message=None,
-                                                          display_to_end_user=None,
-                                                          token_expire_date=None, allow_load_after30_days=None,
-                                                          has_non_paid_forecast=None,
-                                                          token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24CostTrackingSensor(hass, energa24_api, '12', 1)
-    await sensor.async_update()
+    coordinator = await refreshed_coordinator(hass, invoices=[old_invoice, new_invoice])
+    sensor = Energa24CostTrackingSensor(coordinator, '12', 1)
     # then
     assert sensor.state == 2.0
+
+
 @pytest.mark.asyncio
 async def test_non_zero_latest_price(hass: HomeAssistant):
     """Energa24 sensor test - test_multiple_invocies."""
-    energa24_api = MagicMock()
     zero_invoice = any_invoice()
+    zero_invoice.number = "zero"
     zero_invoice.date = datetime(2022, 9, 15)
     zero_invoice.gross_amount = 1
     zero_invoice.wear = 0
 
     null_invoice = any_invoice()
+    null_invoice.number = "null"
+    null_invoice.date = datetime(2022, 9, 15)
+    null_invoice.gross_amount = 1
+    null_invoice.wear = None
+
+    new_invoice = any_invoice()
+    new_invoice.number = "new"
+    new_invoice.date = datetime(2022, 8, 15)
+    new_invoice.gross_amount = 2
+    new_invoice.wear = 1
+
+    coordinator = await refreshed_coordinator(hass, invoices=[zero_invoice, new_invoice])
+    sensor = Energa24CostTrackingSensor(coordinator, '12', 1)
+    # then
+    assert sensor.state == 2.0
+
+
+@pytest.mark.asyncio
+async def test_latest_price_skips_invoice_without_wear(hass: HomeAssistant):
+    """Energa24 sensor test - a newer invoice with no wear does not replace the price."""
+    null_invoice = any_invoice()
+    null_invoice.number = "null"
     null_invoice.date = datetime(2022, 9, 15)
     null_invoice.gross_amount = 1
     null_invoice.wear = None
 
     new_invoice = any_invoice()
+    new_invoice.number = "new"
     new_invoice.date = datetime(2022, 8, 15)
     new_invoice.gross_amount = 2
     new_invoice.wear = 1
 
-    energa24_api.invoices = MagicMock(return_value=(Invoices(invoices_list=[zero_invoice,new_invoice],
-                                                          code=0, message=None,
-                                                          display_to_end_user=None,
-                                                          token_expire_date=None, allow_load_after30_days=None,
-                                                          has_non_paid_forecast=None,
-                                                          token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24CostTrackingSensor(hass, energa24_api, '12', 1)
-    await sensor.async_update()
+    coordinator = await refreshed_coordinator(hass, invoices=[null_invoice, new_invoice])
+    sensor = Energa24CostTrackingSensor(coordinator, '12', 1)
     # then
     assert sensor.state == 2.0
 
@@ -130,70 +135,121 @@ async def test_non_zero_latest_price(hass: HomeAssistant):
 @pytest.mark.asyncio
 async def test_gross_amount_is_none(hass: HomeAssistant):
     """Energa24 sensor test - test_multiple_invocies."""
-    energa24_api = MagicMock()
     invoice = any_invoice()
     invoice.gross_amount = None
     invoice.wear = 1
-    energa24_api.invoices = MagicMock(return_value=(Invoices(invoices_list=[invoice],
-                                                          code=0, message=None,
-                                                          display_to_end_user=None,
-                                                          token_expire_date=None, allow_load_after30_days=None,
-                                                          has_non_paid_forecast=None,
-                                                          token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24CostTrackingSensor(hass, energa24_api, '12', 1)
-    await sensor.async_update()
+    coordinator = await refreshed_coordinator(hass, invoices=[invoice])
+    sensor = Energa24CostTrackingSensor(coordinator, '12', 1)
     # then
-    assert sensor.state == None
+    assert sensor.state is None
+
 
 @pytest.mark.asyncio
 async def test_wear_is_none(hass: HomeAssistant):
     """Energa24 sensor test - test_multiple_invocies."""
-    energa24_api = MagicMock()
     invoice = any_invoice()
     invoice.gross_amount = 1
     invoice.wear = None
-    energa24_api.invoices = MagicMock(return_value=(Invoices(invoices_list=[invoice],
-                                                          code=0, message=None,
-                                                          display_to_end_user=None,
-                                                          token_expire_date=None, allow_load_after30_days=None,
-                                                          has_non_paid_forecast=None,
-                                                          token_expire_date_utc=None, end_user_message=None)))
-    sensor = Energa24CostTrackingSensor(hass, energa24_api, '12', 1)
-    await sensor.async_update()
+    coordinator = await refreshed_coordinator(hass, invoices=[invoice])
+    sensor = Energa24CostTrackingSensor(coordinator, '12', 1)
     # then
-    assert sensor.state == None
-
-def any_invoice() -> InvoicesList:
-    return InvoicesList(number="a",
-                        date=datetime(2022, 6, 6),
-                        sell_date=datetime(2022, 6, 6),
-                        gross_amount=22,
-                        amount_to_pay=1,
-                        wear=112321,
-                        wear_kwh=221,
-                        paying_deadline_date=datetime(2022, 6, 6),
-                        start_date=datetime(2022, 6, 6),
-                        end_date=datetime(2022, 6, 6),
-                        is_paid=False,
-                        id_pp=1,
-                        type='a',
-                        temp_type='a',
-                        days_remaining_to_deadline=1,
-                        has_iban=True,
-                        status='a',
-                        pdf_exists=True,
-                        is_interest_note=True,
-                        color='a',
-                        agreement_name='a',
-                        agreement_number='a',
-                        is_additional_agreement=True,
-                        agreement_end_date=None,
-                        agreement_expired=True,
-                        pdf_print_allowed=True,
-                        payment_process_allowed=True,
-                        agreement_has_card=True,
-                        is_insurance_policy=True,
-                        is_lawyer_agreement=True)
+    assert sensor.state is None
+
+
+@pytest.mark.asyncio
+async def test_state_written_only_when_changed(hass: HomeAssistant):
+    """Energa24 sensor test - unchanged snapshots do not write state."""
+    energa24_api = MagicMock()
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    invoice = any_invoice()
+    energa24_api.invoices = MagicMock(return_value=InvoicesList(invoices_list=[invoice]))
+    coordinator = Energa24Coordinator(hass, energa24_api, PpgList([PpgListElement('12', '', '1')], 'account', 'client'))
+    await coordinator.async_refresh()
+    sensor = Energa24InvoiceSensor(coordinator, '12', 1)
+    sensor.async_write_ha_state = MagicMock()
+
+    attributes = sensor.extra_state_attributes
+    await coordinator.async_refresh()
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 0
+    assert sensor.extra_state_attributes is attributes
+
+    invoice.amount_to_pay = 5
+    await coordinator.async_refresh()
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 1
+    assert sensor.state == 5
+
+
+@pytest.mark.asyncio
+async def test_account_sensors_add_up_meters(hass: HomeAssistant):
+    """Energa24 sensor test - account sensors come from the same refresh as the meter sensors."""
+    energa24_api = MagicMock()
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    second = payloads.any_invoice("FV/2", "2", 20)
+    second.paying_deadline_date = datetime(2022, 6, 10)
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([payloads.any_invoice("FV/1", "1", 10), second]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1", "2"]))
+    await coordinator.async_refresh()
+
+    unpaid, consumption, next_due = account_entities(coordinator)
+
+    assert energa24_api.invoices.call_count == 1
+    assert unpaid.state == 30
+    assert consumption.state == 2
+    assert next_due.state == "2022-06-10"
+    assert next_due.extra_state_attributes["ppe_numbers"] == ["2"]
+
+
+@pytest.mark.asyncio
+async def test_yaml_account_sensors_do_not_collide_with_config_entry(hass: HomeAssistant):
+    """Energa24 sensor test - YAML account sensors get client-namespaced ids, like YAML meter sensors."""
+    coordinator = await refreshed_coordinator(hass)
+
+    entry = account_entities(coordinator)
+    yaml = account_entities(coordinator, "client-account")
+
+    assert [x.unique_id for x in entry] == ["energa24_account_unpaid_sensoraccount",
+                                            "energa24_account_consumption_sensoraccount",
+                                            "energa24_account_next_due_sensoraccount"]
+    assert not {x.unique_id for x in entry} & {x.unique_id for x in yaml}
+    assert entry[0].device_info["identifiers"] != yaml[0].device_info["identifiers"]
+
+
+@pytest.mark.asyncio
+async def test_daily_consumption_comes_from_the_prorated_invoices(hass: HomeAssistant):
+    """Energa24 sensor test - the last invoiced day of the meter, spread evenly over its period."""
+    invoice = dataclasses.replace(any_invoice(), start_date=datetime(2022, 5, 7), end_date=datetime(2022, 6, 5),
+                                  wear_kwh=300, gross_amount=90)
+    coordinator = await refreshed_coordinator(hass, [invoice])
+
+    sensor = Energa24DailyConsumptionSensor(coordinator, '12', 1)
+
+    assert sensor.state == 10
+    assert sensor.extra_state_attributes["day"] == date(2022, 6, 5)
+    assert sensor.extra_state_attributes["daily_cost"] == 3
+    assert sensor.extra_state_attributes["period_kwh"] == 300
+
+
+def any_invoice() -> Invoices:
+    return payloads.any_invoice("a", "12", 22, amount_to_pay=1, wear=112321, wear_kwh=221,
+                                paying_deadline_date=datetime(2022, 6, 6), start_date=datetime(2022, 6, 6),
+                                type="a", status="a")
+
+
+async def refreshed_coordinator(hass: HomeAssistant, invoices=(), readings=()) -> Energa24Coordinator:
+    """Coordinator of meter '12' after one refresh over ``invoices`` and ``readings``."""
+    energa24_api = MagicMock()
+    energa24_api.invoices = MagicMock(return_value=InvoicesList(list(invoices)))
+    energa24_api.readingForMeter = MagicMock(return_value=(
+        PpgReadingForMeter(meter_readings=list(readings), code=0, message=None,
+                           display_to_end_user=None,
+                           token_expire_date=None,
+                           token_expire_date_utc=None, end_user_message=None)))
+    coordinator = Energa24Coordinator(hass, energa24_api, PpgList([PpgListElement('12', '', '1')], 'account', 'client'))
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    return coordinator
 
 
 def any_meter_reading():
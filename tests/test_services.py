@@ -0,0 +1,75 @@
+"""Energa24 services test pack."""
+
+import os
+import pstats
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.energa24_sensor.Invoices import InvoicesList
+from custom_components.energa24_sensor.const import DATA_COORDINATORS, DOMAIN, SERVICE_PROFILE_REFRESH
+from custom_components.energa24_sensor.coordinator import Energa24Coordinator
+from custom_components.energa24_sensor.services import async_register_services
+
+from .payloads import any_invoice, any_ppg_list
+
+
+def profiled_coordinator(hass: HomeAssistant) -> Energa24Coordinator:
+    energa24_api = MagicMock()
+    energa24_api.meterList = MagicMock(return_value=any_ppg_list(["1", "2"]))
+    energa24_api.invoices = MagicMock(return_value=InvoicesList([any_invoice("FV/1", "1", 10)]))
+    energa24_api.readingForMeter = MagicMock(return_value=MagicMock(meter_readings=[]))
+    coordinator = Energa24Coordinator(hass, energa24_api, any_ppg_list(["1", "2"]))
+    hass.data.setdefault(DOMAIN, {})[DATA_COORDINATORS] = {"entry": coordinator}
+    async_register_services(hass)
+    return coordinator
+
+
+@pytest.mark.asyncio
+async def test_profile_refresh_writes_stats(hass: HomeAssistant, tmp_path):
+    """Energa24 services test - one refresh is profiled past the cache and its stats written under .storage."""
+    hass.config.config_dir = str(tmp_path)
+    coordinator = profiled_coordinator(hass)
+
+    result = await hass.services.async_call(DOMAIN, SERVICE_PROFILE_REFRESH, {"trace_memory": True, "top": 5},
+                                            blocking=True, return_response=True)
+
+    coordinator.api.cache.invalidate.assert_not_called()
+    coordinator.api.meterList.assert_called_once_with(cached=False)
+    coordinator.api.invoices.assert_called_once_with(coordinator.account_number, coordinator.client_number,
+                                                     cached=False)
+    assert not coordinator.refreshing
+    assert coordinator.data.meters["1"].latest_priced.gross_amount == 10
+    assert result["meters"] == 2
+    assert len(result["top_cumulative"]) == 5
+    assert result["traced_peak_bytes"] > 0
+    assert result["pstats"].startswith(str(tmp_path / ".storage" / "energa24_profiles"))
+    assert pstats.Stats(result["pstats"]).total_calls > 0
+    assert os.path.exists(result["allocations"])
+
+
+@pytest.mark.asyncio
+async def test_profile_refresh_writes_to_allowed_output_dir(hass: HomeAssistant, tmp_path):
+    """Energa24 services test - results go to an allowed output directory, others are refused."""
+    profiled_coordinator(hass)
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+
+    result = await hass.services.async_call(DOMAIN, SERVICE_PROFILE_REFRESH, {"output_dir": str(tmp_path / "out")},
+                                            blocking=True, return_response=True)
+
+    assert os.path.dirname(result["pstats"]) == str(tmp_path / "out")
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE_REFRESH, {"output_dir": "/etc"},
+                                       blocking=True, return_response=True)
+
+
+@pytest.mark.asyncio
+async def test_profile_refresh_needs_entry_id_for_many_accounts(hass: HomeAssistant):
+    """Energa24 services test - the entry must be named when several accounts are loaded."""
+    hass.data.setdefault(DOMAIN, {})[DATA_COORDINATORS] = {"a": MagicMock(), "b": MagicMock()}
+    async_register_services(hass)
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE_REFRESH, {}, blocking=True, return_response=True)
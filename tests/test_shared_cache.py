@@ -0,0 +1,113 @@
+"""Energa24 shared disk cache test pack."""
+
+import os
+import stat
+import threading
+import time
+from unittest.mock import MagicMock
+
+from custom_components.energa24_sensor.Energa24Api import Energa24Api
+from custom_components.energa24_sensor.shared_cache import SharedDiskCache, shared_cache_for
+
+from .fake_energa import FakeEnergaServer
+from .payloads import FakeClock
+
+
+def test_entry_is_read_by_other_instances(tmp_path):
+    """Energa24 shared cache test - a second cache on the same directory does not fetch again."""
+    clock = FakeClock()
+    writer = SharedDiskCache(str(tmp_path), "user", {"invoices": 60}, clock=clock)
+    reader = SharedDiskCache(str(tmp_path), "user", {"invoices": 60}, clock=clock)
+    fetch = MagicMock(return_value={"a": 1})
+
+    assert writer.get("invoices", ("1", "2"), fetch) == {"a": 1}
+    clock.now = 20
+    aged = reader.get_aged("invoices", ("1", "2"), fetch)
+    assert aged.value == {"a": 1} and aged.age == 20
+    assert fetch.call_count == 1
+
+    clock.now = 61
+    reader.get("invoices", ("1", "2"), fetch)
+    assert fetch.call_count == 2
+
+
+def test_logins_do_not_share_entries(tmp_path):
+    """Energa24 shared cache test - entries are kept apart per login."""
+    first = SharedDiskCache(str(tmp_path), "first", {"token": 60})
+    second = SharedDiskCache(str(tmp_path), "second", {"token": 60})
+
+    first.get("token", None, lambda: "t1")
+
+    assert second.get("token", None, lambda: "t2") == "t2"
+
+
+def test_wrong_password_does_not_reuse_token(tmp_path):
+    """Energa24 shared cache test - entries are kept apart per credentials, not only per login."""
+    right = shared_cache_for("User@example.com", "secret", {"token": 60}, str(tmp_path))
+    same = shared_cache_for(" user@example.com", "secret", {"token": 60}, str(tmp_path))
+    wrong = shared_cache_for("user@example.com", "guess", {"token": 60}, str(tmp_path))
+
+    right.get("token", None, lambda: "t1")
+
+    assert same.get("token", None, lambda: "t2") == "t1"
+    assert wrong.get("token", None, lambda: "t3") == "t3"
+
+
+def test_entries_are_private(tmp_path):
+    """Energa24 shared cache test - entry files are readable by their owner only."""
+    cache = SharedDiskCache(str(tmp_path), "user", {"token": 60})
+    cache.get("token", None, lambda: "t1")
+
+    modes = {stat.S_IMODE(os.stat(path).st_mode) for path in tmp_path.glob("*.entry")}
+    assert modes == {0o600}
+
+
+def test_one_refresh_for_concurrent_misses(tmp_path):
+    """Energa24 shared cache test - misses racing on the file lock fetch once."""
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return "v1"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        SharedDiskCache(str(tmp_path), "user", {"invoices": 60}).get("invoices", "a", fetch))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["v1"] * 6
+    assert len(calls) == 1
+
+
+def test_unreadable_entry_is_refetched(tmp_path):
+    """Energa24 shared cache test - a damaged entry is overwritten instead of failing."""
+    cache = SharedDiskCache(str(tmp_path), "user", {"invoices": 60})
+    cache.get("invoices", "a", lambda: "v1")
+    for path in tmp_path.glob("*.entry"):
+        path.write_bytes(b"garbage")
+
+    assert cache.get("invoices", "a", lambda: "v2") == "v2"
+
+
+def test_clients_share_login_and_fetches(tmp_path, socket_enabled, monkeypatch):
+    """Energa24 shared cache test - a second client reuses the token and responses of the first."""
+    with FakeEnergaServer(1, 2) as server:
+        server.patch(monkeypatch)
+        first = Energa24Api("user-0", "secret", shared_cache_dir=str(tmp_path))
+        pgps = first.meterList()
+        first.invoices(pgps.account_number, pgps.client_number)
+        requests = server.total_requests
+        first.close()
+
+        second = Energa24Api("user-0", "secret", shared_cache_dir=str(tmp_path))
+        try:
+            assert second.meterList() == pgps
+            second.invoices(pgps.account_number, pgps.client_number)
+            assert second.get_headers()["Authorization"].startswith("Bearer ")
+        finally:
+            second.close()
+        assert server.total_requests == requests
@@ -0,0 +1,96 @@
+"""Energa24 streaming decoder test pack."""
+
+import json
+import tracemalloc
+
+import pytest
+import requests
+
+from custom_components.energa24_sensor.Energa24Api import Energa24Api
+from custom_components.energa24_sensor.Invoices import invoices_from_dict
+from custom_components.energa24_sensor.PgpList import ppg_list_from_dict
+from custom_components.energa24_sensor.streaming import (
+    JsonStream,
+    iter_invoices,
+    ppg_list_from_stream,
+)
+
+from .fake_energa import FakeEnergaServer
+from .payloads import as_chunks, dashboard_payload, invoices_payload
+
+
+def test_streamed_invoices_match_full_decode():
+    """Energa24 streaming test - same invoices as the json() path, even with tiny chunks."""
+    payload = invoices_payload(50, ppes=3)
+    expected = invoices_from_dict(payload).invoices_list
+
+    assert list(iter_invoices(as_chunks(payload, chunk_size=7))) == expected
+
+
+def test_streamed_dashboard_matches_full_decode():
+    """Energa24 streaming test - dashboard PPEs and account numbers."""
+    payload = dashboard_payload(20)
+    expected = ppg_list_from_dict(payload["clients"][0]["invoiceProfile"][0])
+
+    assert ppg_list_from_stream(as_chunks(payload, chunk_size=5)) == expected
+
+
+def test_numbers_split_across_chunks():
+    """Energa24 streaming test - a number cut by a chunk boundary is not truncated."""
+    stream = JsonStream([b"[12", b"34, 5", b"6]"])
+
+    assert list(stream.items()) == [1234, 56]
+
+
+def test_non_list_invoices_body_is_an_error():
+    """Energa24 streaming test - error bodies fail instead of decoding to no invoices."""
+    with pytest.raises(ValueError):
+        list(iter_invoices([b'{"error": "unauthorized"}']))
+
+
+def test_error_status_fails_instead_of_reading_as_empty(socket_enabled, monkeypatch):
+    """Energa24 streaming test - a 503 from the dashboard or invoices raises and nothing is cached."""
+    with FakeEnergaServer(1, 2) as server:
+        server.patch(monkeypatch)
+        api = Energa24Api("user-0", "secret")
+        api.cached_login()
+        server.error_rate = 1.0
+
+        with pytest.raises(requests.HTTPError):
+            api.meterList()
+        with pytest.raises(requests.HTTPError):
+            api.invoices("0", "0")
+
+        server.error_rate = 0.0
+        assert len(api.invoices("0", "0").invoices_list) == 6
+        api.close()
+
+
+def test_streaming_peak_memory_is_bounded_by_a_record():
+    """Energa24 streaming benchmark - peak memory on a multi-megabyte response."""
+    payload = invoices_payload(15000, ppes=10)
+    body = json.dumps(payload).encode("utf-8")
+    del payload
+    assert len(body) > 4 * 1024 * 1024
+
+    def chunks():
+        for start in range(0, len(body), 64 * 1024):
+            yield body[start:start + 64 * 1024]
+
+    tracemalloc.start()
+    try:
+        full = invoices_from_dict(json.loads(body))
+        del full
+        _, full_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        count = sum(1 for _ in iter_invoices(chunks()))
+        _, streaming_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    peaks = "payload {:.1f} MiB: json() path peak {:.1f} MiB, streaming peak {:.2f} MiB".format(
+        len(body) / 2 ** 20, full_peak / 2 ** 20, streaming_peak / 2 ** 20)
+    assert count == 15000
+    assert streaming_peak < full_peak / 10, peaks
+    assert streaming_peak < 2 * 1024 * 1024, peaks